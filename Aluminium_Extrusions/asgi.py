@@ -3,6 +3,9 @@ ASGI config for Aluminium_Extrusions project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The dashboard views are async and fan their queries out concurrently; serve
+them with an ASGI server, e.g. ``uvicorn Aluminium_Extrusions.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
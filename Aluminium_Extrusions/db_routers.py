@@ -0,0 +1,62 @@
+"""
+Database routing between the primary MySQL and an optional read replica /
+analytics database.
+
+Writes (LoRa ingest, CRUD) always go to `default`. Reads go to
+settings.DATABASE_READ_ALIAS only while `use_read_replica` is active, which
+ReplicaRoutingMiddleware does for the read-only report/dashboard views listed
+in settings.REPLICA_READ_VIEWS.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_use_read_replica = ContextVar('use_read_replica', default=False)
+
+
+def read_alias():
+    """The configured read alias, or None when it is not defined in DATABASES"""
+    alias = getattr(settings, 'DATABASE_READ_ALIAS', None)
+    if alias and alias in settings.DATABASES:
+        return alias
+    return None
+
+
+def activate_read_replica():
+    """Route reads to the replica for the current context. Returns a token for `deactivate_read_replica`"""
+    return _use_read_replica.set(True)
+
+
+def deactivate_read_replica(token):
+    _use_read_replica.reset(token)
+
+
+@contextmanager
+def use_read_replica():
+    """`with use_read_replica():` - for management commands / exports outside the request cycle"""
+    token = activate_read_replica()
+    try:
+        yield
+    finally:
+        deactivate_read_replica(token)
+
+
+class ReadReplicaRouter:
+    """Send reads to the replica while routing is active, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _use_read_replica.get():
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica and primary hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
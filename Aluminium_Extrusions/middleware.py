@@ -0,0 +1,118 @@
+import re
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .db_routers import activate_read_replica, deactivate_read_replica, read_alias
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+ACCEPTS_BR_RE = re.compile(r'\bbr\b')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route read-only views (settings.REPLICA_READ_VIEWS, by URL name) to the
+    read replica.
+
+    After a successful write the client gets a short-lived cookie that pins
+    it to the primary, so a user never reads a page older than their own
+    last save (read-your-writes) while replication catches up.
+    """
+
+    cookie_name = 'db_pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                deactivate_read_replica(request._replica_token)
+                request._replica_token = None
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(
+                self.cookie_name,
+                str(int(time.time()) + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or read_alias() is None:
+            return None
+        match = request.resolver_match
+        if not match or match.url_name not in getattr(settings, 'REPLICA_READ_VIEWS', ()):
+            return None
+        if self._pinned_to_primary(request):
+            return None
+        request._replica_token = activate_read_replica()
+        return None
+
+    def _pinned_to_primary(self, request):
+        try:
+            return int(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class CompressionMiddleware:
+    """
+    Compress JSON responses larger than settings.RESPONSE_COMPRESSION_MIN_BYTES
+    with brotli (when the brotli package is installed and the client accepts
+    it) or gzip. Streaming responses and already encoded bodies are left alone.
+
+    HTML is never compressed: pages carry the CSRF token next to reflected
+    request input, which compression would leak through the body size (BREACH).
+    """
+
+    compressible_types = ('application/json',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'RESPONSE_COMPRESSION_MIN_BYTES', 1024)
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        self.brotli = brotli
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < self.min_bytes
+            or not response.get('Content-Type', '').startswith(self.compressible_types)
+        ):
+            return response
+
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if self.brotli is not None and ACCEPTS_BR_RE.search(accepted):
+            content, encoding = self.brotli.compress(response.content, quality=5), 'br'
+        elif ACCEPTS_GZIP_RE.search(accepted):
+            content, encoding = compress_string(response.content), 'gzip'
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # The body is no longer byte-identical to the uncompressed one
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
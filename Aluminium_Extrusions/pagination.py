@@ -0,0 +1,202 @@
+"""
+Keyset (seek) pagination for the list views.
+
+django.core.paginator.Paginator runs a full COUNT(*) and an OFFSET per page,
+so deep pages of a large table get slower and slower. `KeysetPaginator`
+orders by (created_at, id) and fetches the page after / before the row a
+cursor points at, which costs the same on page 1000 as on page 1. Cursors are
+signed, opaque strings (?cursor=...).
+
+The page object behaves like django's Page where the templates and views use
+it (iteration, number, start_index, paginator.count / num_pages), so it can
+replace Paginator.get_page directly. Templates link Prev / Next with
+page_obj.previous_cursor / next_cursor (templates/Includes/keyset_pagination.html);
+a ?page=N link is served with an OFFSET. Totals are capped or estimated
+unless approximate_count=False: show paginator.count_display.
+
+Ordering fields must be non-null.
+"""
+import math
+from collections.abc import Sequence
+
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'Aluminium_Extrusions.pagination'
+
+
+class KeysetPage(Sequence):
+    def __init__(self, object_list, number, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<Page {self.number} (keyset)>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.make_cursor(self.object_list[-1], self.number + 1, backwards=False)
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.make_cursor(self.object_list[0], self.number - 1, backwards=True)
+
+
+class KeysetPaginator:
+    def __init__(self, object_list, per_page, ordering=('-created_at', '-id'),
+                 approximate_count=True, count_limit=10000):
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = int(per_page)
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.approximate_count = approximate_count
+        self.count_limit = count_limit
+        self.count_is_exact = True
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Cursors
+    # ─────────────────────────────────────────────────────────────────────────
+    def _fields(self):
+        meta = self.object_list.model._meta
+        return [meta.pk if name == 'pk' else meta.get_field(name) for name, _ in self.ordering]
+
+    def make_cursor(self, obj, number, backwards):
+        values = []
+        for field in self._fields():
+            value = getattr(obj, field.attname)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps({'k': values, 'n': number, 'b': backwards}, salt=CURSOR_SALT, compress=True)
+
+    def _read_cursor(self, cursor):
+        """(key values, page number, backwards) or None for a missing / tampered / stale cursor"""
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+            fields = self._fields()
+            if len(payload['k']) != len(fields):
+                return None
+            values = [field.to_python(value) for field, value in zip(fields, payload['k'])]
+            return values, max(int(payload['n']), 1), bool(payload['b'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None
+
+    def _seek(self, values, backwards):
+        """Rows strictly after (or before) `values` in the paginator's ordering"""
+        names = [name for name, _ in self.ordering]
+        condition = Q()
+        for i, ((name, descending), value) in enumerate(zip(self.ordering, values)):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**{f'{name}__{lookup}': value}, **dict(zip(names[:i], values[:i])))
+        return condition
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Pages
+    # ─────────────────────────────────────────────────────────────────────────
+    def get_page(self, cursor=None, page=None):
+        """
+        The page a cursor points to. Without a (valid) cursor, a legacy
+        ?page=N is served with an OFFSET so existing links keep working, and
+        anything else gives the first page.
+        """
+        position = self._read_cursor(cursor) if cursor else None
+        if position is not None:
+            values, number, backwards = position
+            if backwards:
+                reverse = [name if descending else f'-{name}' for name, descending in self.ordering]
+                rows = list(self.object_list.filter(self._seek(values, True)).order_by(*reverse)[:self.per_page + 1])
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                # Rows added at the top since the cursor was made can leave "page 1" short
+                return KeysetPage(rows, number if has_previous else 1, self, True, has_previous)
+            rows = list(self.object_list.filter(self._seek(values, False))[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], number, self, len(rows) > self.per_page, True)
+
+        try:
+            number = max(int(page), 1)
+        except (TypeError, ValueError):
+            number = 1
+        offset = (number - 1) * self.per_page
+        rows = list(self.object_list[offset:offset + self.per_page + 1])
+        return KeysetPage(rows[:self.per_page], number, self, len(rows) > self.per_page, number > 1)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Totals
+    # ─────────────────────────────────────────────────────────────────────────
+    @cached_property
+    def count(self):
+        """
+        Exact up to count_limit rows (a COUNT over a LIMITed subquery). Beyond
+        that the table statistics estimate is used for unfiltered lists, and
+        the cap otherwise; count_is_exact tells which.
+        """
+        queryset = self.object_list.order_by()
+        if not self.approximate_count:
+            return queryset.count()
+        capped = queryset[:self.count_limit + 1].count()
+        if capped <= self.count_limit:
+            return capped
+        self.count_is_exact = False
+        estimate = self._table_estimate() if not queryset.query.where else None
+        return max(estimate or 0, capped)
+
+    @cached_property
+    def count_display(self):
+        """count for templates: '10000+' when capped, 'about N' when estimated"""
+        count = self.count
+        if self.count_is_exact:
+            return str(count)
+        if count > self.count_limit + 1:
+            return f"about {count}"
+        return f"{self.count_limit}+"
+
+    @cached_property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def _table_estimate(self):
+        connection = connections[self.object_list.db]
+        table = self.object_list.model._meta.db_table
+        if connection.vendor == 'mysql':
+            sql = "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        elif connection.vendor == 'postgresql':
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)"
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
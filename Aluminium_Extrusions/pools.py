@@ -0,0 +1,30 @@
+"""
+Process pools for CPU-heavy work (PDF printing, image derivatives).
+
+One pool per name, started on first use and kept for the life of the
+process. Workers are spawned, not forked, so they never inherit database
+connections or locks; the functions they run must live in modules that do
+not import Django models.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(name, max_workers):
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+            )
+        return pool
+
+
+def reset_pool(name):
+    """Forget a pool whose worker died (BrokenProcessPool); the next use starts a new one"""
+    with _lock:
+        _pools.pop(name, None)
@@ -0,0 +1,68 @@
+"""
+Fast JSON responses.
+
+`FastJsonResponse` is a drop-in replacement for django.http.JsonResponse
+that encodes with orjson when it is installed (pip install orjson) and
+falls back to the stdlib json module otherwise. Values orjson does not
+handle natively go through the same encoder as before (DjangoJSONEncoder
+by default), and datetimes are passed to it too, so the decoded values are
+the same whichever encoder is in use (orjson just writes compact UTF-8).
+
+`FastJSONRenderer` does the same for the Django REST framework views.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data, encoder=DjangoJSONEncoder, **json_dumps_params):
+    """Serialize `data` to UTF-8 JSON bytes"""
+    if orjson is not None and not json_dumps_params:
+        try:
+            return orjson.dumps(data, default=encoder().default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder handles
+            pass
+    return json.dumps(data, cls=encoder, **json_dumps_params).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """Same arguments and behaviour as django.http.JsonResponse"""
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data, encoder, **(json_dumps_params or {})), **kwargs)
+
+
+try:
+    from rest_framework.renderers import JSONRenderer
+except ImportError:
+    JSONRenderer = None
+
+if JSONRenderer is not None:
+    class FastJSONRenderer(JSONRenderer):
+        """JSONRenderer that encodes with orjson when the request does not ask for indentation"""
+
+        def render(self, data, accepted_media_type=None, renderer_context=None):
+            if data is None:
+                return b''
+            if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            try:
+                return orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+            except TypeError:
+                return super().render(data, accepted_media_type, renderer_context)
@@ -55,12 +55,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'Aluminium_Extrusions.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Aluminium_Extrusions.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'Aluminium_Extrusions.urls'
@@ -97,6 +99,88 @@ DATABASES = {
     }
 }
 
+# Optional read replica / analytics database for dashboards and reports.
+# Enabled by setting REPLICA_DB_HOST; see Aluminium_Extrusions/db_routers.py
+DATABASE_READ_ALIAS = os.environ.get('DATABASE_READ_ALIAS', 'replica')  # e.g. 'analytics'
+if os.environ.get('REPLICA_DB_HOST'):
+    DATABASES[DATABASE_READ_ALIAS] = {
+        'ENGINE': 'django.db.backends.mysql',
+        'HOST': os.environ['REPLICA_DB_HOST'],
+        'USER': os.environ.get('REPLICA_DB_USER', 'root'),
+        'PASSWORD': os.environ.get('REPLICA_DB_PASSWORD', 'root'),
+        'NAME': os.environ.get('REPLICA_DB_NAME', 'ExtrusionsDB'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Store-and-forward edge mode for a press-side box (see raw_data/edge.py).
+# Setting EDGE_NODE_ID makes 'default' a local SQLite database in WAL mode, so
+# ingest keeps working while the network is down, and moves the MySQL server
+# to the EDGE_CENTRAL_ALIAS alias that `manage.py sync_edge_readings` ships to.
+EDGE_NODE_ID = os.environ.get('EDGE_NODE_ID', '')
+EDGE_CENTRAL_ALIAS = 'central'
+EDGE_SYNC_BATCH_SIZE = 500
+if EDGE_NODE_ID:
+    DATABASES[EDGE_CENTRAL_ALIAS] = {
+        'ENGINE': os.environ.get('CENTRAL_DB_ENGINE', 'django.db.backends.mysql'),
+        'HOST': os.environ.get('CENTRAL_DB_HOST', DATABASES['default']['HOST']),
+        'USER': os.environ.get('CENTRAL_DB_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('CENTRAL_DB_PASSWORD', DATABASES['default']['PASSWORD']),
+        'NAME': os.environ.get('CENTRAL_DB_NAME', DATABASES['default']['NAME']),
+        'TEST': {'DEPENDENCIES': []},
+    }
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('EDGE_DB_PATH', str(BASE_DIR / 'edge.sqlite3')),
+        'OPTIONS': {
+            # WAL: readers never block the ingest writer, and a power cut loses at most the last commit
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000;',
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+
+# Spooled ingest (see raw_data/spool.py). With INGEST_SPOOL_DIR set, the LoRa
+# endpoint appends readings to per-sensor shards there and answers 202;
+# `manage.py run_ingest_workers` stores them, one shard set per process.
+INGEST_SPOOL_DIR = os.environ.get('INGEST_SPOOL_DIR') or None
+INGEST_SHARDS = 16  # fixed once readings are spooled: a sensor's shard is crc32(name) % INGEST_SHARDS
+INGEST_SEGMENT_SECONDS = 1  # spool files roll over this often
+# Workers leave a segment alone this long after its time is up, for writers held up between picking
+# its name and writing; far above the admission queue_timeout and any request timeout
+INGEST_SEGMENT_GRACE_SECONDS = 30
+INGEST_BATCH_SIZE = 200  # readings per worker transaction
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', os.cpu_count() or 1))
+
+# Admission control of the LoRa endpoint (raw_data.admission): see DEFAULT_ADMISSION_SETTINGS
+# there for the keys. Limits are per server process.
+INGEST_ADMISSION = {
+    'gateway_rate': 20.0,
+    'sensor_rate': 2.0,
+    'max_in_flight': 8,
+    'bulk_max_in_flight': 2,
+}
+
+DATABASE_ROUTERS = ['Aluminium_Extrusions.db_routers.ReadReplicaRouter']
+REPLICA_STICKY_SECONDS = 10  # read-your-writes: stay on the primary this long after a POST
+
+# URL names of read-only views served from DATABASE_READ_ALIAS (GET/HEAD only)
+REPLICA_READ_VIEWS = [
+    'dashboard',
+    'dashboard_bundle_api',
+    'dashboard_recovery_table_api',
+    'dashboard-order-table-api',
+    'dashboard_production_table_api',
+    'dashboard_new',
+    'press_production_data',
+    'current_production',
+    'sensor_details',
+    'daily_production_report',
+    'shift_production_report_api',
+    'lora_receive',  # GET dumps raw_machine_data; POST ingest stays on the primary
+    'reading_series_api',
+    'requisition_progress_api',
+    'dashboard_analytics_api',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -149,3 +233,80 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Die life: service after this many pushes / this much length since last service
+DIE_SERVICE_THRESHOLDS = {
+    'pushes': 5000,
+    'length': 150000,
+    'warning_ratio': 0.8,
+}
+
+# OEE / recovery analytics (dashboard.analytics): cache lifetime of windows that include today / past windows
+ANALYTICS_CACHE_SECONDS = 60
+ANALYTICS_CACHE_SECONDS_PAST = 60 * 60
+
+# Out-of-band pushes per (sensor, die): see raw_data.anomaly.DEFAULT_ANOMALY_SETTINGS for the keys
+READING_ANOMALY = {
+    'warmup': 30,
+    'z': 4.0,
+    'cooldown_seconds': 300,
+}
+
+# Press scheduling (planning.scheduler): see DEFAULT_SCHEDULING_SETTINGS there for the keys
+PRODUCTION_SCHEDULING = {
+    'horizon_days': 14,
+    'die_change_minutes': 45,
+    'default_pieces_per_hour': 240,
+}
+
+# Server-side PDF printing of requisitions / work orders (order_management.printing; needs weasyprint, pypdf)
+PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', os.path.join(BASE_DIR, 'pdf_cache'))
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 2))
+PDF_CACHE_MAX_AGE_DAYS = 30  # `manage.py prune_pdf_cache` removes PDFs not printed for this long
+
+# Resized copies of Die / Section / Profile images (master.images): bounding box in px and
+# encoder quality per variant; rendered in a process pool when an image is uploaded
+IMAGE_DERIVATIVES = {
+    'thumb': {'size': (160, 160), 'quality': 75},
+    'preview': {'size': (800, 800), 'quality': 82},
+}
+IMAGE_DERIVATIVE_FORMAT = 'WEBP'
+IMAGE_RENDER_WORKERS = int(os.environ.get('IMAGE_RENDER_WORKERS', 2))
+
+# Parquet exports of sensor / production history (python manage.py export_parquet; needs pyarrow)
+PARQUET_EXPORT_DIR = os.environ.get('PARQUET_EXPORT_DIR', os.path.join(BASE_DIR, 'exports'))
+# How long a run keeps looking for rows committed after it passed their id / updated_at
+PARQUET_EXPORT_LATE_COMMIT_SECONDS = 900
+
+# Cold readings: archive_raw_data moves whole months older than this into compact segment files
+RAW_ARCHIVE_DIR = os.environ.get('RAW_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+RAW_ARCHIVE_AFTER_DAYS = 180
+
+# Sensor clocks (raw_data.clock): the offset is re-estimated every window and only applied
+# beyond the tolerance; larger offsets are taken for buffered/replayed data, not skew.
+# A higher estimate is only trusted after CONFIRM_WINDOWS equal windows; until then it
+# rises by MAX_DRIFT per window, so a replayed backlog cannot shift live readings.
+# Sensor times are read in TIME_ZONE: sensors on another zone show it as offset.
+# Chart buckets become final once a sensor's watermark (latest reading - allowed lateness)
+# passes their end; idle sensors' watermarks follow the server clock.
+SENSOR_CLOCK_WINDOW_SECONDS = 300
+SENSOR_CLOCK_TOLERANCE_SECONDS = 5
+SENSOR_CLOCK_MAX_OFFSET_SECONDS = 6 * 60 * 60
+SENSOR_CLOCK_MAX_DRIFT_SECONDS = 1
+SENSOR_CLOCK_CONFIRM_WINDOWS = 3
+SENSOR_ALLOWED_LATENESS_SECONDS = 120
+SENSOR_IDLE_SECONDS = 600
+
+# JSON bodies are encoded with orjson when installed; JSON responses at least this big are
+# gzip/brotli compressed by CompressionMiddleware (HTML is not, see BREACH)
+RESPONSE_COMPRESSION_MIN_BYTES = 1024
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'Aluminium_Extrusions.responses.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Trusted reverse proxies in front of the app, each appending to X-Forwarded-For. Client addresses
+    # (throttles, ingest admission per gateway) are read that many entries from the end of the header;
+    # 0 uses REMOTE_ADDR and ignores the header, which any client can set
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
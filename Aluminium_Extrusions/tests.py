@@ -0,0 +1,148 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from raw_data.models import Raw_data
+from .db_routers import ReadReplicaRouter, use_read_replica
+from .middleware import ReplicaRoutingMiddleware
+from .pagination import KeysetPaginator
+
+router = ReadReplicaRouter()
+
+# Edge mode with CENTRAL_DB_ENGINE=django.db.backends.sqlite3 gives a second real database, e.g.
+# EDGE_NODE_ID=test CENTRAL_DB_ENGINE=django.db.backends.sqlite3 CENTRAL_DB_NAME=central.sqlite3 manage.py test
+SECOND_ALIAS = getattr(settings, 'EDGE_CENTRAL_ALIAS', 'central')
+HAS_SECOND_DATABASE = SECOND_ALIAS in settings.DATABASES
+
+
+class ReadReplicaRouterTests(SimpleTestCase):
+    @override_settings(DATABASE_READ_ALIAS=DEFAULT_DB_ALIAS)
+    def test_reads_use_the_read_alias_only_while_active(self):
+        self.assertIsNone(router.db_for_read(Raw_data))
+        with use_read_replica():
+            self.assertEqual(router.db_for_read(Raw_data), DEFAULT_DB_ALIAS)
+        self.assertIsNone(router.db_for_read(Raw_data))
+
+    @override_settings(DATABASE_READ_ALIAS='no_such_alias')
+    def test_unconfigured_read_alias_falls_back_to_default(self):
+        with use_read_replica():
+            self.assertIsNone(router.db_for_read(Raw_data))
+
+    def test_writes_always_go_to_the_primary(self):
+        with use_read_replica():
+            self.assertEqual(router.db_for_write(Raw_data), DEFAULT_DB_ALIAS)
+
+
+@override_settings(DATABASE_READ_ALIAS=DEFAULT_DB_ALIAS, REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.routed = []
+        self.status = 200
+
+        def get_response(request):
+            # Django's handler runs process_view between the middleware chain and the view
+            self.middleware.process_view(request, None, (), {})
+            self.routed.append(router.db_for_read(Raw_data))
+            return HttpResponse(status=self.status)
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def call(self, method, url_name, cookies=None):
+        url = reverse(url_name)
+        request = getattr(self.factory, method)(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(url)
+        return self.middleware(request)
+
+    def test_listed_read_view_is_served_from_the_read_alias(self):
+        self.call('get', 'dashboard')
+        self.assertEqual(self.routed, [DEFAULT_DB_ALIAS])
+        # Routing ends with the request
+        self.assertIsNone(router.db_for_read(Raw_data))
+
+    def test_unlisted_view_and_writes_stay_on_the_primary(self):
+        self.call('get', 'parquet_export_api')
+        self.call('post', 'dashboard')
+        self.assertEqual(self.routed, [None, None])
+
+    def test_successful_write_sets_the_sticky_cookie(self):
+        response = self.call('post', 'lora_receive')
+        cookie = response.cookies[ReplicaRoutingMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertAlmostEqual(int(cookie.value), time.time() + 10, delta=2)
+
+    def test_failed_write_sets_no_cookie(self):
+        self.status = 400
+        response = self.call('post', 'lora_receive')
+        self.assertNotIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+
+    def test_pinned_client_reads_from_the_primary_until_the_cookie_expires(self):
+        name = ReplicaRoutingMiddleware.cookie_name
+        self.call('get', 'dashboard', {name: str(int(time.time()) + 10)})
+        self.call('get', 'dashboard', {name: str(int(time.time()) - 1)})
+        self.call('get', 'dashboard', {name: 'garbage'})
+        self.assertEqual(self.routed, [None, DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS])
+
+
+@unittest.skipUnless(HAS_SECOND_DATABASE, "needs a second database alias (see SECOND_ALIAS)")
+@override_settings(DATABASE_READ_ALIAS=SECOND_ALIAS)
+class TwoDatabaseRoutingTests(TestCase):
+    databases = {DEFAULT_DB_ALIAS, SECOND_ALIAS} if HAS_SECOND_DATABASE else {DEFAULT_DB_ALIAS}
+
+    def test_queries_follow_the_router(self):
+        Raw_data.objects.create(sensor_name='S1', datetime='2025-10-30T10:00:00Z', t_factor=1, die_number='1', length=1)
+        self.assertEqual(Raw_data.objects.count(), 1)
+        with use_read_replica():
+            # Reads hit the (empty) second database, writes still the primary
+            self.assertEqual(Raw_data.objects.count(), 0)
+            Raw_data.objects.create(sensor_name='S1', datetime='2025-10-30T10:01:00Z', t_factor=1, die_number='1', length=1)
+        self.assertEqual(Raw_data.objects.count(), 2)
+        self.assertEqual(Raw_data.objects.using(SECOND_ALIAS).count(), 0)
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        start = timezone.make_aware(datetime(2025, 10, 30, 10, 0))
+        # Pairs of readings at the same time: the id breaks the tie
+        Raw_data.objects.bulk_create([
+            Raw_data(sensor_name='S1', datetime=start + timedelta(minutes=i // 2), t_factor=1, die_number='1', length=1)
+            for i in range(25)
+        ])
+        self.ids = list(Raw_data.objects.order_by('-datetime', '-id').values_list('id', flat=True))
+
+    def paginator(self, **kwargs):
+        return KeysetPaginator(Raw_data.objects.all(), 10, ordering=('-datetime', '-id'), **kwargs)
+
+    def test_links_follow_the_cursors_both_ways(self):
+        pages, page = [], self.paginator().get_page()
+        while True:
+            pages.append(page)
+            html = render_to_string('Includes/keyset_pagination.html', {'page_obj': page, 'global_search': 'a b'})
+            self.assertNotIn('page=', html)
+            if not page.has_next():
+                break
+            link = urlparse(html.split('href="')[-1].split('"')[0].replace('&amp;', '&'))
+            query = parse_qs(link.query)
+            self.assertEqual(query['global_search'], ['a b'])
+            page = self.paginator().get_page(query['cursor'][0])
+
+        self.assertEqual([row.id for page in pages for row in page], self.ids)
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        back = self.paginator().get_page(pages[-1].previous_cursor)
+        self.assertEqual((back.number, [row.id for row in back]), (2, self.ids[10:20]))
+
+    def test_count_beyond_the_limit_is_not_shown_as_exact(self):
+        self.assertEqual(self.paginator().count_display, '25')
+        paginator = self.paginator(count_limit=20)
+        self.assertEqual(paginator.count_display, '20+')
+        self.assertFalse(paginator.count_is_exact)
@@ -1,3 +1,50 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from master.models import CompanyPress
+from raw_data.archive import archive_before
+from raw_data.models import Raw_data
+
+
+class CurrentProductionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+        cls.press = CompanyPress.objects.exclude(sensor='').order_by('id').first()
+
+    def profile_count(self):
+        with mock.patch('current_production.views.render', return_value=HttpResponse()) as render:
+            self.client.get(reverse('current_production'))
+        return next(
+            card['profile_count'] for card in render.call_args.args[2]['sensors']
+            if card['sensor_name'] == self.press.sensor
+        )
+
+    def test_readings_stored_before_the_press_link_still_count(self):
+        # Stored before the sensor was assigned to the press: no press FK
+        Raw_data.objects.create(
+            sensor_name=self.press.sensor, datetime=timezone.make_aware(datetime(2020, 1, 1, 10)),
+            t_factor=1.12, die_number='UNLINKED', length=37.3,
+        )
+        total = Raw_data.objects.filter(sensor_name=self.press.sensor).count()
+
+        self.assertEqual(self.profile_count(), total)
+
+        response = self.client.get(reverse('sensor_details'), {'sensor_name': self.press.sensor})
+        self.assertEqual(response.json()['total_records'], total)
+
+    def test_archived_readings_still_count(self):
+        total = self.profile_count()
+        with tempfile.TemporaryDirectory() as archive_dir, override_settings(RAW_ARCHIVE_DIR=archive_dir):
+            self.assertTrue(archive_before(timezone.now() + timedelta(days=1), sensor_name=self.press.sensor))
+            self.assertEqual(self.profile_count(), total)
+            response = self.client.get(reverse('sensor_details'), {'sensor_name': self.press.sensor})
+            self.assertEqual(response.json()['total_records'], total)
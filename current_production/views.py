@@ -1,9 +1,11 @@
 from django.shortcuts import render
 from django.views import View
-from django.http import JsonResponse
-from master.models import Die, CompanyPress
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
+from django.db.models import Count
+from master.models import CompanyPress, Die
 from production.models import OnlineProductionReport
 from raw_data.models import Raw_data
+from raw_data.archive import archived_counts, iter_readings
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  Views for Current Production Dashboard
@@ -13,28 +15,32 @@ class CurrentProductionView(View):
 
     def get(self, request):
         try:
-            # Get all sensor names that are assigned to presses in CompanyPress
-            configured_sensors = CompanyPress.objects.values_list(
-                'sensor', flat=True
-            ).distinct()
+            # Reading counts per configured sensor in one grouped query. Matched on
+            # sensor_name, not the press FK: readings stored before the sensor was
+            # assigned to its press have no (or another) press
+            presses = {}
+            for press_info in CompanyPress.objects.select_related('company').order_by('id'):
+                presses.setdefault(press_info.sensor, press_info)
+            counts = dict(
+                Raw_data.objects.filter(sensor_name__in=list(presses))
+                .values_list('sensor_name')
+                .annotate(total=Count('id'))
+                .order_by()
+            )
+            # ... plus the readings moved to the archive
+            for sensor, archived in archived_counts(set(presses)).items():
+                counts[sensor] = counts.get(sensor, 0) + archived
 
             # Build list with profile counts - ONLY for configured sensors
             sensors = []
-            for sensor in configured_sensors:
-                # Count Raw_data records for this sensor
-                profile_count = Raw_data.objects.filter(sensor_name=sensor).count()
-                
-                # Only add sensors that have data in Raw_data
-                if profile_count > 0:
-                    # Get the press name(s) associated with this sensor
-                    press_info = CompanyPress.objects.filter(sensor=sensor).first()
-                    
-                    sensors.append({
-                        'sensor_name': sensor,
-                        'profile_count': profile_count,
-                        'press_name': press_info.name if press_info else 'N/A',
-                        'company_name': press_info.company.name if press_info else 'N/A'
-                    })
+            for sensor, profile_count in counts.items():
+                press_info = presses[sensor]
+                sensors.append({
+                    'sensor_name': sensor,
+                    'profile_count': profile_count,
+                    'press_name': press_info.name,
+                    'company_name': press_info.company.name
+                })
 
             # Sort by sensor name for consistent display
             sensors = sorted(sensors, key=lambda x: x['sensor_name'])
@@ -66,45 +72,44 @@ class SensorDetailView(View):
                 return JsonResponse({'success': False, 'message': 'Sensor name required'}, status=400)
 
             # Verify this sensor is configured in a press
-            if not CompanyPress.objects.filter(sensor=sensor_name).exists():
+            press_obj = CompanyPress.objects.filter(sensor=sensor_name).order_by('id').first()
+            if not press_obj:
                 return JsonResponse({
                     'success': False, 
                     'message': 'Sensor not configured in any press'
                 }, status=404)
 
-            # Fetch raw data for this sensor
-            raw_records = Raw_data.objects.filter(
-                sensor_name=sensor_name
-            ).order_by('-datetime')
-            
+            # Readings of this sensor, newest first: live table merged with the cold archive
+            raw_records = list(iter_readings(sensor_name=sensor_name, newest_first=True))
+
+            # Die names and order numbers for all dies of this sensor in one query each
+            die_names = dict(Die.objects.filter(
+                id__in={raw.die_id for raw in raw_records if raw.die_id}
+            ).values_list('id', 'die_name'))
+            die_numbers = {raw.die_number for raw in raw_records}
+            order_numbers = {}
+            for die_no, production_id in OnlineProductionReport.objects.filter(
+                die_no__in=die_numbers
+            ).values_list('die_no', 'production_id'):
+                order_numbers.setdefault(die_no, production_id)
+
             order_details = []
 
             for raw in raw_records:
                 die_no = raw.die_number
                 die_name = 'N/A'
-                
-                # Try to get die name from Die model
-                if die_no:
-                    try:
-                        die = Die.objects.get(die_no=die_no)
-                        die_name = die.die_name or die_no
-                    except Die.DoesNotExist:
-                        die_name = die_no
-
-                # Try to get order number from OnlineProductionReport
-                report = OnlineProductionReport.objects.filter(die_no=die_no).first()
-                order_no = report.production_id if report else 'N/A'
-
-                # Get press name from CompanyPress
-                press_obj = CompanyPress.objects.filter(sensor=sensor_name).first()
-                press_name = press_obj.name if press_obj else sensor_name
+
+                if raw.die_id in die_names:
+                    die_name = die_names[raw.die_id] or die_no
+                elif die_no:
+                    die_name = die_no
 
                 order_details.append({
-                    'order_no': order_no,
+                    'order_no': order_numbers.get(die_no, 'N/A'),
                     'die_name': die_name,
                     'date': raw.datetime.strftime('%Y-%m-%d') if raw.datetime else 'N/A',
                     'time': raw.datetime.strftime('%H:%M:%S') if raw.datetime else 'N/A',
-                    'press': press_name,  # Show press name instead of sensor
+                    'press': press_obj.name,  # Show press name instead of sensor
                     'sensor': sensor_name,  # Keep sensor for reference
                     'length': float(raw.length) if raw.length else 0,
                 })
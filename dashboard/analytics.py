@@ -0,0 +1,327 @@
+"""
+OEE and recovery analytics.
+
+`summary(start_date, end_date)` loads the production reports of a window with
+one values_list query and the sensor minutes with another (1-minute
+reading_bucket rows, so Raw_data is not rescanned). It turns both into NumPy
+column arrays once, then aggregates every metric per press, die, section,
+shift and day with np.unique / np.bincount, with no query or Python loop per
+group.
+
+Definitions (per group, from summed columns):
+
+* availability = run minutes (report start → end) / planned minutes. A
+  report's planned minutes are its shift's length, shared among the reports
+  of the same press, shift and day.
+* performance  = pieces / (ideal rate × run minutes). The ideal rate of a die
+  is its best pieces-per-minute over the scheduler's rate_history_days up to
+  the window's end (or the window, if longer), among report runs of at least
+  MIN_BENCHMARK_MINUTES. Dies with fewer than MIN_BENCHMARK_RUNS such runs
+  have no ideal rate and are left out of performance (null when no report of
+  a group has one).
+* quality      = recovery = total output / input weight. Reports record no
+  rejects, so the weight yield stands in for good / total.
+* oee          = availability × performance × quality
+* billet_yield = output weight per billet
+* utilisation  = minutes with sensor readings / planned minutes (press, shift
+  and day groupings only; readings carry no die or section)
+
+`cached_summary` keeps results in the default cache: briefly for windows
+that include today, longer for past windows. The key carries a fingerprint
+of the window's reports, so edits show up at once.
+
+numpy is required here (pip install numpy).
+"""
+import hashlib
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from master.models import CompanyPress, CompanyShift
+from master.shifts import shift_index
+from planning.scheduler import scheduling_settings
+from production.models import OnlineProductionReport
+from raw_data.models import ReadingBucket
+
+GROUPINGS = ('press', 'die', 'section', 'shift', 'day')
+DEFAULT_SHIFT_MINUTES = 480       # planned time of a report without a readable shift
+MIN_BENCHMARK_MINUTES = 30        # shorter runs do not set a die's ideal rate
+MIN_BENCHMARK_RUNS = 3            # a die needs this many runs before it has an ideal rate
+REPORT_FIELDS = (
+    'press_id', 'shift_id', 'die_no', 'section_no', 'date_of_production', 'date',
+    'start_time', 'end_time', 'planned_qty', 'no_of_pieces', 'no_of_billet', 'input_qty', 'total_output',
+)
+
+
+def _require_numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("OEE analytics require numpy (pip install numpy)")
+    return np
+
+
+def _window(start_date, end_date):
+    return OnlineProductionReport.objects.filter(
+        Q(date_of_production__gte=start_date, date_of_production__lte=end_date)
+        | Q(date_of_production__isnull=True, date__gte=start_date, date__lte=end_date)
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Column loading
+# ─────────────────────────────────────────────────────────────────────────────
+def _minutes(value):
+    return value.hour * 60 + value.minute if value is not None else -1
+
+
+def _benchmark_start(start_date, end_date):
+    return min(start_date, end_date - timedelta(days=scheduling_settings()['rate_history_days']))
+
+
+def load_reports(np, start_date, end_date):
+    """Report columns of the window as arrays (one query)"""
+    rows = list(_window(start_date, end_date).order_by().values_list(*REPORT_FIELDS))
+    columns = list(zip(*rows)) if rows else [()] * len(REPORT_FIELDS)
+    (press, shift, die, section, production_day, day, start, end,
+     planned_qty, pieces, billets, input_qty, output) = columns
+
+    def numbers(values, dtype=float):
+        return np.array([v or 0 for v in values], dtype=dtype)
+
+    start_min = np.array([_minutes(v) for v in start], dtype=np.int64)
+    end_min = np.array([_minutes(v) for v in end], dtype=np.int64)
+    run = np.where((start_min >= 0) & (end_min >= 0), (end_min - start_min) % 1440, 0).astype(float)
+
+    return {
+        'press': numbers(press, np.int64),
+        'shift': numbers(shift, np.int64),
+        'die': np.array([v or '' for v in die], dtype=object),
+        'section': np.array([v or '' for v in section], dtype=object),
+        'day': np.array([(p or d).isoformat() for p, d in zip(production_day, day)], dtype=object),
+        'run': run,
+        'planned_qty': numbers(planned_qty),
+        'pieces': numbers(pieces),
+        'billets': numbers(billets),
+        'input': numbers(input_qty),
+        'output': numbers(output),
+    }
+
+
+def load_sensor_minutes(np, start_date, end_date):
+    """
+    (press, shift, day) of every minute a press had readings in the window,
+    from the 1-minute chart buckets (one query)
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz) - timedelta(days=1)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=2), time.min), tz)
+    rows = (
+        ReadingBucket.objects.filter(resolution='1m', press__isnull=False, count__gt=0,
+                                     bucket_start__gte=start, bucket_start__lt=end)
+        .order_by().values_list('press_id', 'bucket_start').distinct()
+    )
+    press, local_minute, local_day = [], [], []
+    for press_id, bucket in rows:
+        local = timezone.localtime(bucket, tz)
+        press.append(press_id)
+        local_minute.append(local.hour * 60 + local.minute)
+        local_day.append(local.date().toordinal())
+    press = np.array(press, dtype=np.int64)
+    minute = np.array(local_minute, dtype=np.int64)
+    day = np.array(local_day, dtype=np.int64)
+
+    # Shift and production day, press company by press company
+    shift = np.zeros(len(press), dtype=np.int64)
+    companies = dict(CompanyPress.objects.filter(id__in=np.unique(press).tolist()).values_list('id', 'company_id'))
+    for press_id, company_id in companies.items():
+        on_press = press == press_id
+        for shift_id, interval in shift_index.shifts_for_company(company_id):
+            if interval.overnight:
+                inside = on_press & (shift == 0) & ((minute >= interval.start) | (minute < interval.end))
+                day[inside & (minute < interval.end)] -= 1
+            else:
+                inside = on_press & (shift == 0) & (minute >= interval.start) & (minute < interval.end)
+            shift[inside] = shift_id
+
+    first, last = start_date.toordinal(), end_date.toordinal()
+    keep = (day >= first) & (day <= last)
+    return {
+        'press': press[keep],
+        'shift': shift[keep],
+        'day': np.array([datetime.fromordinal(d).date().isoformat() for d in day[keep]], dtype=object),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Vectorized aggregation
+# ─────────────────────────────────────────────────────────────────────────────
+def _planned_minutes(np, reports):
+    """Each report's share of the planned time of its (press, shift, day) cell"""
+    n = len(reports['press'])
+    if not n:
+        return np.zeros(0)
+    lengths = {}
+    for shift_id in np.unique(reports['shift']).tolist():
+        interval = shift_index.shift_interval(shift_id) if shift_id else None
+        lengths[shift_id] = interval.duration_minutes if interval else DEFAULT_SHIFT_MINUTES
+    duration = np.array([lengths[s] for s in reports['shift'].tolist()], dtype=float)
+
+    cells = np.char.add(
+        np.char.add(reports['press'].astype(str), '|'),
+        np.char.add(np.char.add(reports['shift'].astype(str), '|'), reports['day'].astype(str)),
+    )
+    _, cell, cell_sizes = np.unique(cells, return_inverse=True, return_counts=True)
+    return duration / cell_sizes[cell]
+
+
+def load_benchmarks(start_date, end_date):
+    """die_no -> best pieces per minute over the rate history, for dies with enough runs (one query)"""
+    runs = defaultdict(list)
+    reports = _window(_benchmark_start(start_date, end_date), end_date).filter(
+        no_of_pieces__gt=0, start_time__isnull=False, end_time__isnull=False,
+    ).order_by().values_list('die_no', 'start_time', 'end_time', 'no_of_pieces')
+    for die_no, start_time, end_time, pieces in reports:
+        run = (_minutes(end_time) - _minutes(start_time)) % 1440
+        if run >= MIN_BENCHMARK_MINUTES:
+            runs[(die_no or '').strip()].append(pieces / run)
+    return {die_no: max(rates) for die_no, rates in runs.items() if len(rates) >= MIN_BENCHMARK_RUNS}
+
+
+def _ideal_minutes(np, reports, benchmarks):
+    """Run minutes each report would need at its die's best demonstrated rate (0 without a benchmark)"""
+    pieces = reports['pieces']
+    best_rate = np.array([benchmarks.get(die.strip(), 0.0) for die in reports['die'].tolist()], dtype=float)
+    return np.divide(pieces, best_rate, out=np.zeros_like(pieces), where=best_rate > 0)
+
+
+def _ratio(np, numerator, denominator, cap=None):
+    values = np.divide(numerator, denominator, out=np.full(len(numerator), np.nan), where=denominator > 0)
+    return np.minimum(values, cap) if cap is not None else values
+
+
+def _aggregate(np, keys, columns, sensor_keys=None):
+    """Sum `columns` per distinct key; returns (keys, sums, active sensor minutes or None)"""
+    unique, index = np.unique(keys.astype(str), return_inverse=True)
+    sums = {name: np.bincount(index, weights=values, minlength=len(unique)) for name, values in columns.items()}
+    sums['reports'] = np.bincount(index, minlength=len(unique)).astype(float)
+    active = None
+    if sensor_keys is not None:
+        position = {key: i for i, key in enumerate(unique.tolist())}
+        hits = np.array([position.get(key, -1) for key in sensor_keys.astype(str).tolist()], dtype=np.int64)
+        active = np.bincount(hits[hits >= 0], minlength=len(unique)).astype(float)
+    return unique, sums, active
+
+
+def _rows(np, keys, sums, active, labels):
+    run, planned = sums['run'], sums['planned']
+    availability = _ratio(np, run, planned, cap=1.0)
+    # pieces / (ideal rate × run) = ideal minutes / run minutes, over reports whose die has a benchmark
+    performance = _ratio(np, sums['ideal'], sums['benchmarked_run'], cap=1.0)
+    quality = _ratio(np, sums['output'], sums['input'], cap=1.0)
+    oee = availability * performance * quality
+    billet_yield = _ratio(np, sums['output'], sums['billets'])
+    utilisation = _ratio(np, active, planned, cap=1.0) if active is not None else None
+
+    def num(value, digits=4):
+        return None if np.isnan(value) else round(float(value), digits)
+
+    rows = []
+    for i, key in enumerate(keys.tolist()):
+        rows.append({
+            'key': key,
+            'label': labels.get(key, key),
+            'reports': int(sums['reports'][i]),
+            'run_minutes': round(float(run[i]), 1),
+            'planned_minutes': round(float(planned[i]), 1),
+            'pieces': int(sums['pieces'][i]),
+            'planned_qty': int(sums['planned_qty'][i]),
+            'input_qty': round(float(sums['input'][i]), 2),
+            'total_output': round(float(sums['output'][i]), 2),
+            'billets': int(sums['billets'][i]),
+            'availability': num(availability[i]),
+            'performance': num(performance[i]),
+            'quality': num(quality[i]),
+            'oee': num(oee[i]),
+            'recovery_percent': None if np.isnan(quality[i]) else round(float(sums['output'][i] / sums['input'][i]) * 100, 2),
+            'billet_yield': num(billet_yield[i], 3),
+            'active_minutes': int(active[i]) if active is not None else None,
+            'utilisation': num(utilisation[i]) if utilisation is not None else None,
+        })
+    return rows
+
+
+def summary(start_date, end_date, groupings=GROUPINGS):
+    """OEE / recovery rows per grouping plus an overall row for the window"""
+    np = _require_numpy()
+    reports = load_reports(np, start_date, end_date)
+    sensor = load_sensor_minutes(np, start_date, end_date)
+
+    ideal = _ideal_minutes(np, reports, load_benchmarks(start_date, end_date))
+    columns = {
+        'run': reports['run'],
+        'planned': _planned_minutes(np, reports),
+        'pieces': reports['pieces'],
+        'planned_qty': reports['planned_qty'],
+        'billets': reports['billets'],
+        'input': reports['input'],
+        'output': reports['output'],
+        'ideal': ideal,
+        'benchmarked_run': np.where(ideal > 0, reports['run'], 0.0),
+    }
+
+    press_ids = np.unique(reports['press']).tolist()
+    shift_ids = np.unique(reports['shift']).tolist()
+    labels = {
+        'press': {str(k): v for k, v in CompanyPress.objects.filter(id__in=press_ids).values_list('id', 'name')},
+        'shift': {str(k): v for k, v in CompanyShift.objects.filter(id__in=shift_ids).values_list('id', 'name')},
+    }
+    labels['press']['0'] = labels['shift']['0'] = 'N/A'
+
+    keys_for = {
+        'press': (reports['press'], sensor['press']),
+        'die': (reports['die'], None),
+        'section': (reports['section'], None),
+        'shift': (reports['shift'], sensor['shift']),
+        'day': (reports['day'], sensor['day']),
+    }
+
+    result = {'from': start_date.isoformat(), 'to': end_date.isoformat(), 'groups': {}}
+    for grouping in groupings:
+        keys, sensor_keys = keys_for[grouping]
+        unique, sums, active = _aggregate(np, keys, columns, sensor_keys)
+        result['groups'][grouping] = _rows(np, unique, sums, active, labels.get(grouping, {}))
+
+    overall_keys = np.array(['all'] * len(reports['press']), dtype=object)
+    unique, sums, _ = _aggregate(np, overall_keys, columns)
+    active = np.array([float(len(sensor['press']))]) if len(unique) else None
+    overall = _rows(np, unique, sums, active, {'all': 'All presses'})
+    result['overall'] = overall[0] if overall else None
+    return result
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Caching
+# ─────────────────────────────────────────────────────────────────────────────
+def _fingerprint(start_date, end_date):
+    # The benchmarks look further back than the window
+    totals = _window(_benchmark_start(start_date, end_date), end_date).aggregate(
+        rows=Count('id'), changed=Max('updated_at'),
+    )
+    return f"{totals['rows']}:{totals['changed']}"
+
+
+def cached_summary(start_date, end_date, groupings=GROUPINGS):
+    groupings = tuple(g for g in GROUPINGS if g in groupings)
+    raw_key = f"{start_date}:{end_date}:{','.join(groupings)}:{_fingerprint(start_date, end_date)}"
+    key = 'dashboard-analytics:' + hashlib.md5(raw_key.encode()).hexdigest()
+    result = cache.get(key)
+    if result is None:
+        result = summary(start_date, end_date, groupings)
+        live = end_date >= timezone.localdate()
+        cache.set(key, result, settings.ANALYTICS_CACHE_SECONDS if live else settings.ANALYTICS_CACHE_SECONDS_PAST)
+    return result
@@ -1,3 +1,45 @@
+import io
+from datetime import time, timedelta
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from production.models import OnlineProductionReport
+from . import analytics
+
+
+class PerformanceBenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+        cls.today = timezone.localdate()
+        template = OnlineProductionReport.objects.order_by('id').first()
+        cls.die_no = template.die_no
+        OnlineProductionReport.objects.exclude(id=template.id).filter(die_no=cls.die_no).delete()
+
+        def run(n, day, start, end, pieces):
+            report = OnlineProductionReport.objects.get(id=template.id)
+            report.pk = None
+            report.production_id = f"TEST{n:06d}"
+            report.date = report.date_of_production = day
+            report.start_time, report.end_time, report.no_of_pieces = start, end, pieces
+            report.save()
+
+        # 120 pieces an hour at best, 50 days ago; 60 and 90 an hour in the window
+        run(1, cls.today - timedelta(days=50), time(6), time(7), 120)
+        run(2, cls.today, time(6), time(7), 60)
+        run(3, cls.today, time(8), time(9), 90)
+        OnlineProductionReport.objects.filter(id=template.id).delete()
+
+    def die_row(self, start_date):
+        rows = analytics.summary(start_date, self.today, ('die',))['groups']['die']
+        return next(row for row in rows if row['key'] == self.die_no)
+
+    def test_die_is_benchmarked_against_its_rate_history(self):
+        # (60 + 90) pieces in 120 minutes at 2 pieces a minute
+        self.assertAlmostEqual(self.die_row(self.today)['performance'], 150 / 240, places=3)
 
-# Create your tests here.
+    def test_die_without_enough_runs_has_no_performance(self):
+        OnlineProductionReport.objects.filter(production_id='TEST000001').delete()
+        self.assertIsNone(self.die_row(self.today)['performance'])
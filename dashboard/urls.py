@@ -4,6 +4,8 @@ from .views import (
     DashboardRecoveryTableAPI, 
     DashboardProductionTableAPI, 
     DashboardOrderTableAPI,
+    DashboardBundleAPI,
+    DashboardAnalyticsAPI,
     # ... your other dashboard views
 )
 
@@ -12,9 +14,11 @@ urlpatterns = [
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
     
     # API endpoints
+    path('api/dashboard-bundle/', DashboardBundleAPI.as_view(), name='dashboard_bundle_api'),
     path('api/dashboard-recovery-table/', DashboardRecoveryTableAPI.as_view(), name='dashboard_recovery_table_api'),
         path('api/dashboard-order-table/', DashboardOrderTableAPI.as_view(), name='dashboard-order-table-api'),
     path('api/dashboard-production-table/', DashboardProductionTableAPI.as_view(), name='dashboard_production_table_api'),
+    path('api/dashboard-analytics/', DashboardAnalyticsAPI.as_view(), name='dashboard_analytics_api'),
     
     # ... your other dashboard URLs
 ]
\ No newline at end of file
@@ -1,181 +1,226 @@
+import asyncio
+import csv
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
 from django.shortcuts import render
 from django.views import View
-from django.http import JsonResponse
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Sum, Count
+from django.db import connections
+from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta, datetime
 
 from production.models import OnlineProductionReport
+from order_management.lineage import totals_for
 from order_management.models import Requisition
+from . import analytics
+
+
+# ==================== DATE WINDOW & QUERIES ====================
+
+def get_date_range(filter_type, selected_date=None):
+    """Return (start_date, end_date) for a dashboard filter or an explicit YYYY-MM-DD date"""
+    today = timezone.now().date()
+
+    if selected_date:
+        try:
+            date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
+            return date_obj, date_obj
+        except ValueError:
+            return today, today
+
+    if filter_type == 'weekly':
+        return today - timedelta(days=7), today
+    if filter_type == 'monthly':
+        return today - timedelta(days=30), today
+    return today, today
+
+
+def get_recovery_stats(start_date, end_date):
+    """Calculate recovery statistics for the date window"""
+    totals = OnlineProductionReport.objects.filter(
+        date_of_production__gte=start_date,
+        date_of_production__lte=end_date
+    ).aggregate(
+        total_input=Sum('input_qty'),
+        total_output=Sum('total_output'),
+        press_count=Count('press', distinct=True),
+    )
+
+    total_input = totals['total_input'] or 0
+    total_output = totals['total_output'] or 0
+
+    if total_input > 0:
+        recovery_percent = round((total_output / total_input) * 100)
+    else:
+        recovery_percent = 0
+
+    return {
+        'recovery_percent': recovery_percent,
+        'press_count': totals['press_count'],
+        'total_input': round(total_input),
+        'total_output': round(total_output)
+    }
+
+
+def get_order_stats(start_date, end_date):
+    """Calculate order statistics from OnlineProductionReport based on date_of_production"""
+    # This is ONLY for the Order Summary Card (CARD 3)
+    return OnlineProductionReport.objects.filter(
+        date_of_production__gte=start_date,
+        date_of_production__lte=end_date
+    ).aggregate(
+        total_orders=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+    )
+
+
+def get_recovery_table(start_date, end_date):
+    """Latest 10 reports of the window for the recovery table"""
+    reports = OnlineProductionReport.objects.filter(
+        date_of_production__gte=start_date,
+        date_of_production__lte=end_date
+    ).select_related('press').order_by('-date_of_production')[:10]
+
+    return [
+        {
+            'die_no': report.die_no,
+            'no_of_cavity': report.no_of_cavity,
+            'press': report.press.name if report.press else '',
+            'input_qty': float(report.input_qty) if report.input_qty else 0,
+            'total_output': float(report.total_output) if report.total_output else 0
+        }
+        for report in reports
+    ]
+
+
+def get_order_table(start_date, end_date):
+    """Latest 10 requisitions of the window for the order table, with their progress"""
+    requisitions = list(Requisition.objects.filter(
+        date__gte=start_date,
+        date__lte=end_date
+    ).order_by('-created_at')[:10])
+    progress = totals_for(req.id for req in requisitions)
+
+    orders = []
+    for req in requisitions:
+        row = progress.get(req.id)
+        orders.append({
+            'production_id': req.requisition_id,  # Using requisition_id (ORD00001 format)
+            'status': req.status,  # created, in_planning, in_production, completed, rejected
+            'ordered_qty': row.ordered_qty if row else 0,
+            'planned_qty': row.planned_qty if row else 0,
+            'produced_pieces': row.produced_pieces if row else 0,
+            'produced_length': float(row.produced_length) if row else 0,
+            'recovery': row.recovery if row else None,
+            'completion': row.completion if row else None,
+        })
+    return orders
+
+
+def get_production_table(start_date, end_date):
+    """Latest 10 reports of the window for the production table"""
+    reports = OnlineProductionReport.objects.filter(
+        date_of_production__gte=start_date,
+        date_of_production__lte=end_date
+    ).select_related('press', 'operator').order_by('-date_of_production')[:10]
+
+    return [
+        {
+            'die_no': report.die_no,
+            'cut_length': report.cut_length,
+            'operator': report.operator.get_full_name() if report.operator else '',
+            'status': report.status
+        }
+        for report in reports
+    ]
+
+
+def _query_in_worker(func):
+    """Run a query function in its own thread and close that thread's DB connection afterwards"""
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def gather_queries(*calls):
+    """
+    Run independent (func, *args) query calls concurrently, each on its own
+    connection, so the total latency is that of the slowest query.
+    """
+    return await asyncio.gather(*(_query_in_worker(func)(*args) for func, *args in calls))
 
 
 # ==================== DASHBOARD VIEWS ====================
 
 class DashboardView(View):
     """Render the production dashboard with real data"""
-    
-    def get(self, request):
+
+    async def get(self, request):
         filter_type = request.GET.get('filter', 'today')
         selected_date = request.GET.get('date', None)
-        recovery_stats = self.get_recovery_stats(filter_type, selected_date)
-        order_stats = self.get_order_stats(filter_type, selected_date)
-        
+        start_date, end_date = get_date_range(filter_type, selected_date)
+
+        recovery_stats, order_stats = await gather_queries(
+            (get_recovery_stats, start_date, end_date),
+            (get_order_stats, start_date, end_date),
+        )
+
         context = {
             'recovery_stats': recovery_stats,
             'order_stats': order_stats,
             'filter_type': filter_type,
             'selected_date': selected_date
         }
-        
-        return render(request, 'Dashboard/dashboard.html', context)
-    
-    def get_recovery_stats(self, filter_type, selected_date=None):
-        """Calculate recovery statistics based on filter type or selected date"""
-        
-        if selected_date:
-            try:
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-                start_date = date_obj
-                end_date = date_obj
-            except ValueError:
-                today = timezone.now().date()
-                start_date = today
-                end_date = today
-        else:
-            today = timezone.now().date()
-            
-            if filter_type == 'today':
-                start_date = today
-                end_date = today
-            elif filter_type == 'weekly':
-                start_date = today - timedelta(days=7)
-                end_date = today
-            elif filter_type == 'monthly':
-                start_date = today - timedelta(days=30)
-                end_date = today
-            else:
-                start_date = today
-                end_date = today
-        
-        reports = OnlineProductionReport.objects.filter(
-            date_of_production__gte=start_date,
-            date_of_production__lte=end_date
-        ).select_related('press')
-        
-        total_input = reports.aggregate(total=Sum('input_qty'))['total'] or 0
-        total_output = reports.aggregate(total=Sum('total_output'))['total'] or 0
-        unique_presses = reports.values('press').distinct().count()
-        
-        if total_input > 0:
-            recovery_percent = round((total_output / total_input) * 100)
-        else:
-            recovery_percent = 0
-        
-        return {
-            'recovery_percent': recovery_percent,
-            'press_count': unique_presses,
-            'total_input': round(total_input),
-            'total_output': round(total_output)
-        }
-    
-    def get_order_stats(self, filter_type, selected_date=None):
-        """Calculate order statistics from OnlineProductionReport based on date_of_production"""
-        
-        if selected_date:
-            try:
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-                start_date = date_obj
-                end_date = date_obj
-            except ValueError:
-                today = timezone.now().date()
-                start_date = today
-                end_date = today
-        else:
-            today = timezone.now().date()
-            
-            if filter_type == 'today':
-                start_date = today
-                end_date = today
-            elif filter_type == 'weekly':
-                start_date = today - timedelta(days=7)
-                end_date = today
-            elif filter_type == 'monthly':
-                start_date = today - timedelta(days=30)
-                end_date = today
-            else:
-                start_date = today
-                end_date = today
-        
-        # Fetch from OnlineProductionReport model based on date_of_production
-        # This is ONLY for the Order Summary Card (CARD 3)
-        reports = OnlineProductionReport.objects.filter(
-            date_of_production__gte=start_date,
-            date_of_production__lte=end_date
+
+        return await sync_to_async(render)(request, 'Dashboard/dashboard.html', context)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class DashboardBundleAPI(View):
+    """API returning every dashboard card and table in one round trip"""
+
+    async def get(self, request):
+        start_date, end_date = get_date_range(
+            request.GET.get('filter', 'today'), request.GET.get('date', None)
+        )
+
+        recovery_stats, order_stats, recovery_table, order_table, production_table = await gather_queries(
+            (get_recovery_stats, start_date, end_date),
+            (get_order_stats, start_date, end_date),
+            (get_recovery_table, start_date, end_date),
+            (get_order_table, start_date, end_date),
+            (get_production_table, start_date, end_date),
         )
-        
-        total_orders = reports.count()
-        completed = reports.filter(status='completed').count()
-        in_progress = reports.filter(status='in_progress').count()
-        cancelled = reports.filter(status='cancelled').count()
-        
-        return {
-            'total_orders': total_orders,
-            'completed': completed,
-            'in_progress': in_progress,
-            'cancelled': cancelled
-        }
+
+        return JsonResponse({
+            'success': True,
+            'recovery_stats': recovery_stats,
+            'order_stats': order_stats,
+            'recovery_reports': recovery_table,
+            'orders': order_table,
+            'production_reports': production_table,
+        })
 
 
 @method_decorator(csrf_exempt, name="dispatch")
 class DashboardRecoveryTableAPI(View):
     """API to fetch recovery table data for dashboard"""
-    
-    def get(self, request):
-        filter_type = request.GET.get('filter', 'today')
-        selected_date = request.GET.get('date', None)
-        
-        if selected_date:
-            try:
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-                start_date = date_obj
-                end_date = date_obj
-            except ValueError:
-                today = timezone.now().date()
-                start_date = today
-                end_date = today
-        else:
-            today = timezone.now().date()
-            
-            if filter_type == 'today':
-                start_date = today
-                end_date = today
-            elif filter_type == 'weekly':
-                start_date = today - timedelta(days=7)
-                end_date = today
-            elif filter_type == 'monthly':
-                start_date = today - timedelta(days=30)
-                end_date = today
-            else:
-                start_date = today
-                end_date = today
-        
-        reports = OnlineProductionReport.objects.filter(
-            date_of_production__gte=start_date,
-            date_of_production__lte=end_date
-        ).select_related('press').order_by('-date_of_production')[:10]
-        
-        reports_list = []
-        for report in reports:
-            reports_list.append({
-                'die_no': report.die_no,
-                'no_of_cavity': report.no_of_cavity,
-                'press': report.press.name if report.press else '',
-                'input_qty': float(report.input_qty) if report.input_qty else 0,
-                'total_output': float(report.total_output) if report.total_output else 0
-            })
-        
+
+    async def get(self, request):
+        start_date, end_date = get_date_range(
+            request.GET.get('filter', 'today'), request.GET.get('date', None)
+        )
+        reports_list, = await gather_queries((get_recovery_table, start_date, end_date))
+
         return JsonResponse({
             'success': True,
             'reports': reports_list
@@ -185,49 +230,13 @@ class DashboardRecoveryTableAPI(View):
 @method_decorator(csrf_exempt, name="dispatch")
 class DashboardOrderTableAPI(View):
     """API to fetch order table data from Requisition for dashboard"""
-    
-    def get(self, request):
-        filter_type = request.GET.get('filter', 'today')
-        selected_date = request.GET.get('date', None)
-        
-        if selected_date:
-            try:
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-                start_date = date_obj
-                end_date = date_obj
-            except ValueError:
-                today = timezone.now().date()
-                start_date = today
-                end_date = today
-        else:
-            today = timezone.now().date()
-            
-            if filter_type == 'today':
-                start_date = today
-                end_date = today
-            elif filter_type == 'weekly':
-                start_date = today - timedelta(days=7)
-                end_date = today
-            elif filter_type == 'monthly':
-                start_date = today - timedelta(days=30)
-                end_date = today
-            else:
-                start_date = today
-                end_date = today
-        
-        # Fetch from Requisition model (unchanged - for Order Table only)
-        requisitions = Requisition.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('-created_at')[:10]
-        
-        orders_list = []
-        for req in requisitions:
-            orders_list.append({
-                'production_id': req.requisition_id,  # Using requisition_id (ORD00001 format)
-                'status': req.status  # created, in_planning, in_production, completed, rejected
-            })
-        
+
+    async def get(self, request):
+        start_date, end_date = get_date_range(
+            request.GET.get('filter', 'today'), request.GET.get('date', None)
+        )
+        orders_list, = await gather_queries((get_order_table, start_date, end_date))
+
         return JsonResponse({
             'success': True,
             'orders': orders_list
@@ -237,51 +246,65 @@ class DashboardOrderTableAPI(View):
 @method_decorator(csrf_exempt, name="dispatch")
 class DashboardProductionTableAPI(View):
     """API to fetch production table data for dashboard"""
-    
-    def get(self, request):
-        filter_type = request.GET.get('filter', 'today')
-        selected_date = request.GET.get('date', None)
-        
-        if selected_date:
-            try:
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d').date()
-                start_date = date_obj
-                end_date = date_obj
-            except ValueError:
-                today = timezone.now().date()
-                start_date = today
-                end_date = today
-        else:
-            today = timezone.now().date()
-            
-            if filter_type == 'today':
-                start_date = today
-                end_date = today
-            elif filter_type == 'weekly':
-                start_date = today - timedelta(days=7)
-                end_date = today
-            elif filter_type == 'monthly':
-                start_date = today - timedelta(days=30)
-                end_date = today
-            else:
-                start_date = today
-                end_date = today
-        
-        reports = OnlineProductionReport.objects.filter(
-            date_of_production__gte=start_date,
-            date_of_production__lte=end_date
-        ).select_related('press', 'operator').order_by('-date_of_production')[:10]
-        
-        reports_list = []
-        for report in reports:
-            reports_list.append({
-                'die_no': report.die_no,
-                'cut_length': report.cut_length,
-                'operator': report.operator.get_full_name() if report.operator else '',
-                'status': report.status
-            })
-        
+
+    async def get(self, request):
+        start_date, end_date = get_date_range(
+            request.GET.get('filter', 'today'), request.GET.get('date', None)
+        )
+        reports_list, = await gather_queries((get_production_table, start_date, end_date))
+
         return JsonResponse({
             'success': True,
             'reports': reports_list
-        })
\ No newline at end of file
+        })
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class DashboardAnalyticsAPI(View):
+    """
+    OEE, recovery, billet yield and utilisation per press / die / section / shift / day.
+    ?filter= / ?date= as the other dashboard APIs, or ?from=YYYY-MM-DD&to=YYYY-MM-DD;
+    ?group=press,die limits the groupings; ?export=csv&group=<one> downloads one grouping.
+    """
+
+    async def get(self, request):
+        start_date, end_date = get_date_range(
+            request.GET.get('filter', 'today'), request.GET.get('date', None)
+        )
+        try:
+            if request.GET.get('from'):
+                start_date = datetime.strptime(request.GET['from'], '%Y-%m-%d').date()
+                end_date = datetime.strptime(request.GET.get('to') or request.GET['from'], '%Y-%m-%d').date()
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'from / to must be YYYY-MM-DD'}, status=400)
+        if end_date < start_date:
+            return JsonResponse({'success': False, 'message': 'to must not be before from'}, status=400)
+
+        groupings = [g for g in request.GET.get('group', '').split(',') if g] or list(analytics.GROUPINGS)
+        unknown = [g for g in groupings if g not in analytics.GROUPINGS]
+        if unknown:
+            return JsonResponse({'success': False, 'message': f"Unknown group(s): {', '.join(unknown)}"}, status=400)
+        export = request.GET.get('export')
+        if export and (export != 'csv' or len(groupings) != 1):
+            return JsonResponse({'success': False, 'message': 'export=csv needs exactly one group'}, status=400)
+
+        try:
+            result, = await gather_queries((analytics.cached_summary, start_date, end_date, tuple(groupings)))
+        except ImportError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=503)
+
+        if export:
+            return self.csv_response(result, groupings[0])
+        return JsonResponse({'success': True, **result})
+
+    def csv_response(self, result, grouping):
+        rows = result['groups'][grouping]
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = (
+            f'attachment; filename="oee_{grouping}_{result["from"]}_{result["to"]}.csv"'
+        )
+        fields = ['key', 'label'] + [name for name in (rows[0] if rows else {}) if name not in ('key', 'label')]
+        writer = csv.DictWriter(response, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        return response
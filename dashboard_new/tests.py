@@ -1,3 +1,29 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from production.models import OnlineProductionReport
+from raw_data.archive import archive_before
+
+
+class PressProductionDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+        cls.report = OnlineProductionReport.objects.filter(date=timezone.localdate()).order_by('id').first()
+
+    def lengths(self):
+        response = self.client.get(reverse('press_production_data', args=[self.report.press_id]))
+        return {row['die_no']: row['current_production'] for row in response.json()['production_data']}
+
+    def test_archived_readings_still_count(self):
+        before = self.lengths()
+        self.assertTrue(before[self.report.die_no])
+        with tempfile.TemporaryDirectory() as archive_dir, override_settings(RAW_ARCHIVE_DIR=archive_dir):
+            self.assertTrue(archive_before(timezone.now() + timedelta(days=1)))
+            self.assertEqual(self.lengths(), before)
@@ -1,12 +1,15 @@
 from django.shortcuts import render
 from django.views import View
-from django.http import JsonResponse
-from django.db.models import Sum
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
+from django.db.models import Count, Sum
 from django.utils import timezone
 
 from master.models import CompanyPress
 from production.models import OnlineProductionReport
+from raw_data.anomaly import alert_as_dict, open_alerts
+from raw_data.archive import archived_lengths
 from raw_data.models import Raw_data
+from raw_data.lookups import master_lookup
 
 
 # ─────────────────────────────────────────────────────────────
@@ -22,6 +25,12 @@ class DashboardNewView(View):
             # ✅ Get all presses
             presses = CompanyPress.objects.select_related('company').all()
 
+            # ✅ Unacknowledged out-of-band pushes of today, per press, in one grouped query
+            alerts_by_press = dict(
+                open_alerts().filter(reading_time__date=today)
+                .values_list('press').annotate(n=Count('id')).order_by()
+            )
+
             press_data = []
 
             for press in presses:
@@ -43,6 +52,7 @@ class DashboardNewView(View):
                     'company_name': press.company.name if press.company else 'N/A',
                     'production_count': production_count,
                     'completed_orders': completed_orders,
+                    'open_alerts': alerts_by_press.get(press.id, 0),
                 })
 
             # JSON response (AJAX)
@@ -90,13 +100,38 @@ class PressProductionDataView(View):
                 date=today
             ).order_by('-created_at')
 
+            # ✅ Raw_data totals for all dies of these reports in one grouped query on the die FK
+            die_ids = {
+                report.die_no: master_lookup.die_id(report.die_no)
+                for report in production_reports
+            }
+            length_by_die = dict(
+                Raw_data.objects.filter(die_id__in=[i for i in die_ids.values() if i])
+                .values_list('die')
+                .annotate(total=Sum('length'))
+                .order_by()
+            )
+            # ✅ Rows without a die FK (die number not in master, or not backfilled yet) still match by string
+            length_by_number = dict(
+                Raw_data.objects.filter(die__isnull=True, die_number__in=[n for n in die_ids if n])
+                .values_list('die_number')
+                .annotate(total=Sum('length'))
+                .order_by()
+            )
+            # ✅ Plus the readings moved to the archive
+            archived_by_die, archived_by_number = archived_lengths(
+                {i for i in die_ids.values() if i}, {n for n in die_ids if n},
+            )
+
             production_data = []
 
             for report in production_reports:
-                # ✅ CORRECT Raw_data mapping
-                actual_length = Raw_data.objects.filter(
-                    die_number=report.die_no
-                ).aggregate(total=Sum('length'))['total'] or 0
+                actual_length = (
+                    (length_by_die.get(die_ids[report.die_no]) or 0)
+                    + (length_by_number.get(report.die_no) or 0)
+                    + archived_by_die.get(die_ids[report.die_no], 0)
+                    + archived_by_number.get(report.die_no, 0)
+                )
 
                 # ✅ Safe cut_length parsing
                 try:
@@ -122,6 +157,8 @@ class PressProductionDataView(View):
                     'status_display': report.get_status_display(),
                 })
 
+            alerts = open_alerts().filter(press=press, reading_time__date=today).order_by('-reading_time')[:20]
+
             return JsonResponse({
                 'success': True,
                 'press': {
@@ -130,7 +167,8 @@ class PressProductionDataView(View):
                     'company_name': press.company.name if press.company else 'N/A'
                 },
                 'production_data': production_data,
-                'total_records': len(production_data)
+                'total_records': len(production_data),
+                'alerts': [alert_as_dict(alert) for alert in alerts],
             })
 
         except CompanyPress.DoesNotExist:
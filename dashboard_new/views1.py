@@ -1,6 +1,6 @@
 from django.shortcuts import render
 from django.views import View
-from django.http import JsonResponse
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
 from master.models import CompanyPress
 from planning.models import ProductionPlan
 from django.db.models import Sum
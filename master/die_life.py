@@ -0,0 +1,145 @@
+"""
+Die life tracking: per-die usage counters maintained incrementally at ingest
+(raw_data.ingest calls `record_push` for every reading) and the service
+thresholds used by the die health API.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Q, Value, When
+from django.utils import timezone
+
+from .models import DieUsage
+
+DEFAULT_SERVICE_THRESHOLDS = {
+    'pushes': 5000,       # pushes between services
+    'length': 150000,     # length (ft.in) between services
+    'warning_ratio': 0.8, # "due soon" once this share of a threshold is used
+}
+
+
+def service_thresholds():
+    thresholds = dict(DEFAULT_SERVICE_THRESHOLDS)
+    thresholds.update(getattr(settings, 'DIE_SERVICE_THRESHOLDS', {}))
+    return thresholds
+
+
+def record_push(die_id, length, t_factor, reading_time, count=1):
+    """Add `count` pushes (with their summed length / t-factor) to a die's counters"""
+    length = Decimal(str(length))
+    t_factor = Decimal(str(t_factor))
+    counters = dict(
+        pushes=F('pushes') + count,
+        total_length=F('total_length') + length,
+        cumulative_t_factor=F('cumulative_t_factor') + t_factor,
+        pushes_since_service=F('pushes_since_service') + count,
+        length_since_service=F('length_since_service') + length,
+        last_used_at=Case(
+            When(Q(last_used_at__isnull=True) | Q(last_used_at__lt=reading_time), then=Value(reading_time)),
+            default=F('last_used_at'),
+        ),
+    )
+    if DieUsage.objects.filter(die_id=die_id).update(**counters):
+        return
+    try:
+        with transaction.atomic():
+            DieUsage.objects.create(
+                die_id=die_id,
+                pushes=count,
+                total_length=length,
+                cumulative_t_factor=t_factor,
+                pushes_since_service=count,
+                length_since_service=length,
+                last_used_at=reading_time,
+            )
+    except IntegrityError:
+        # Another worker created the row first
+        DieUsage.objects.filter(die_id=die_id).update(**counters)
+
+
+def mark_serviced(die_id):
+    """Reset the since-service counters after maintenance"""
+    usage, _ = DieUsage.objects.get_or_create(die_id=die_id)
+    usage.pushes_since_service = 0
+    usage.length_since_service = 0
+    usage.last_serviced_at = timezone.now()
+    usage.save(update_fields=['pushes_since_service', 'length_since_service', 'last_serviced_at'])
+    return usage
+
+
+def _usage(die):
+    try:
+        return die.usage
+    except DieUsage.DoesNotExist:
+        return DieUsage(die=die)
+
+
+def _health(usage, thresholds):
+    """(health, share of the nearest service threshold used)"""
+    push_ratio = usage.pushes_since_service / thresholds['pushes'] if thresholds['pushes'] else 0
+    length_ratio = float(usage.length_since_service) / thresholds['length'] if thresholds['length'] else 0
+    worst = max(push_ratio, length_ratio)
+
+    if worst >= 1:
+        return 'service_overdue', worst
+    if worst >= thresholds['warning_ratio']:
+        return 'service_due_soon', worst
+    return 'ok', worst
+
+
+def usage_summary(die):
+    """Usage counters and health status for a Die (use select_related('usage'))"""
+    usage = _usage(die)
+    health, worst = _health(usage, service_thresholds())
+
+    return {
+        'pushes': usage.pushes,
+        'total_length': str(usage.total_length),
+        'cumulative_t_factor': str(usage.cumulative_t_factor),
+        'avg_t_factor': (
+            str(round(usage.cumulative_t_factor / usage.pushes, 3)) if usage.pushes else None
+        ),
+        'last_used_at': usage.last_used_at.strftime("%Y-%m-%d %H:%M:%S") if usage.last_used_at else None,
+        'pushes_since_service': usage.pushes_since_service,
+        'length_since_service': str(usage.length_since_service),
+        'last_serviced_at': usage.last_serviced_at.strftime("%Y-%m-%d %H:%M:%S") if usage.last_serviced_at else None,
+        'service_used_percent': round(worst * 100, 1),
+        'health': health,
+    }
+
+
+def health_summary(die):
+    """Health status only: unlike the counters it changes at a service or a threshold, not every push"""
+    usage = _usage(die)
+    return {
+        'health': _health(usage, service_thresholds())[0],
+        'last_serviced_at': usage.last_serviced_at.strftime("%Y-%m-%d %H:%M:%S") if usage.last_serviced_at else None,
+    }
+
+
+def _reached(thresholds, ratio):
+    """Q for usage rows at or past `ratio` of a service threshold"""
+    query = Q(pk__in=[])
+    if thresholds['pushes']:
+        query |= Q(pushes_since_service__gte=thresholds['pushes'] * ratio)
+    if thresholds['length']:
+        query |= Q(length_since_service__gte=Decimal(str(thresholds['length'] * ratio)))
+    return query
+
+
+def health_validator(request=None):
+    """
+    Fingerprint of what health_summary depends on, for the ETag of APIs that
+    embed it: services, thresholds and how many dies are in each health band
+    (the counters are updated with F() and send no signals)
+    """
+    thresholds = service_thresholds()
+    totals = DieUsage.objects.aggregate(
+        rows=Count('die'),
+        serviced=Max('last_serviced_at'),
+        due=Count('die', filter=_reached(thresholds, thresholds['warning_ratio'])),
+        overdue=Count('die', filter=_reached(thresholds, 1)),
+    )
+    limits = f"{thresholds['pushes']}/{thresholds['length']}/{thresholds['warning_ratio']}"
+    return f"{totals['rows']}:{totals['serviced']}:{totals['due']}:{totals['overdue']}:{limits}"
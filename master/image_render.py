@@ -0,0 +1,29 @@
+"""
+Resizing of uploaded images in a worker process (master.images).
+
+Kept free of Django imports so spawned pool workers start without setting
+Django up.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+
+def make_derivatives(content, variants, image_format):
+    """
+    variant -> (bytes, width, height) for each (variant, (max width, max height), quality).
+    The aspect ratio is kept, images are never enlarged and EXIF rotation is applied.
+    """
+    with Image.open(io.BytesIO(content)) as source:
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ('RGBA', 'LA') or (source.mode == 'P' and 'transparency' in source.info)
+        source = source.convert('RGBA' if has_alpha and image_format != 'JPEG' else 'RGB')
+
+        derivatives = {}
+        for variant, size, quality in variants:
+            image = source.copy()
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format, quality=quality, optimize=True)
+            derivatives[variant] = (buffer.getvalue(), image.width, image.height)
+        return derivatives
@@ -0,0 +1,210 @@
+"""
+Resized derivatives of Die, Section and Profile images.
+
+Uploads are kept at full resolution, so list pages and APIs that only show
+a thumbnail used to make clients download every original. When a die,
+section or profile is saved with a new image, `generate` hands the file to
+a process pool (IMAGE_RENDER_WORKERS) after the commit. The worker renders
+every variant of IMAGE_DERIVATIVES (bounding box, quality) in
+IMAGE_DERIVATIVE_FORMAT, and an ImageDerivative row per variant records the
+stored file.
+
+Derivative names are derivatives/<variant>/<hash of the source bytes and
+the variant settings>.<ext>: the same content always gets the same name, so
+it can be served with a far-future cache lifetime, and a new upload or new
+settings get new names.
+
+`urls_for` maps many images to their derivative URLs with one query; APIs
+fall back to the original until the derivatives exist.
+`generate_image_derivatives` backfills existing media.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from Aluminium_Extrusions.pools import get_pool, reset_pool
+from .image_render import make_derivatives
+from .models import Die, Section, Profile, ImageDerivative
+from .versioning import bump_versions
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = {
+    Die: 'image',
+    Section: 'section_image',
+    Profile: 'shape_image',
+}
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def variants():
+    """(variant, (max width, max height), quality) of every configured derivative"""
+    return [
+        (variant, tuple(spec['size']), spec['quality'])
+        for variant, spec in settings.IMAGE_DERIVATIVES.items()
+    ]
+
+
+def derivative_name(content, variant, size, quality):
+    image_format = settings.IMAGE_DERIVATIVE_FORMAT
+    digest = hashlib.sha256(content)
+    digest.update(f"{variant}:{size[0]}x{size[1]}:{quality}:{image_format}".encode())
+    return f"derivatives/{variant}/{digest.hexdigest()[:24]}.{EXTENSIONS[image_format]}"
+
+
+def _pool():
+    return get_pool('images', settings.IMAGE_RENDER_WORKERS)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Generating
+# ─────────────────────────────────────────────────────────────────────────────
+def _read(source):
+    try:
+        with default_storage.open(source, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        logger.warning("Image %s cannot be read: %s", source, e)
+        return None
+
+
+def store(source, content, rendered):
+    """Save rendered variants of a source image and point its ImageDerivative rows at them"""
+    replaced, changed = [], False
+    for variant, size, quality in variants():
+        if variant not in rendered:
+            continue
+        data, width, height = rendered[variant]
+        name = derivative_name(content, variant, size, quality)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(data))
+        derivative, created = ImageDerivative.objects.get_or_create(
+            source=source, variant=variant,
+            defaults={'file': name, 'width': width, 'height': height, 'size': len(data)},
+        )
+        if not created and derivative.file != name:
+            replaced.append(derivative.file)
+            derivative.file, derivative.width, derivative.height, derivative.size = name, width, height, len(data)
+            derivative.save(update_fields=['file', 'width', 'height', 'size'])
+        changed = changed or created or bool(replaced)
+    _delete_unused(replaced)
+    if changed:
+        # The list APIs answer 304 until their models' versions move
+        bump_versions(*IMAGE_FIELDS)
+    return sorted(rendered)
+
+
+def _stored(source, content, caller, future):
+    """Done-callback of a background render"""
+    try:
+        store(source, content, future.result())
+    except BrokenProcessPool:
+        reset_pool('images')
+        logger.exception("Image derivatives of %s failed", source)
+    except Exception:
+        logger.exception("Image derivatives of %s failed", source)
+    finally:
+        # Usually run on the pool's management thread, which has a connection of its own
+        if threading.get_ident() != caller:
+            connection.close()
+
+
+def generate(source, wait=True):
+    """
+    Render the derivatives of one stored image in the pool. With wait=False
+    (uploads) they are stored when the worker is done and None is returned;
+    otherwise returns the variants made.
+    """
+    content = _read(source)
+    if content is None:
+        return []
+    try:
+        future = _pool().submit(make_derivatives, content, variants(), settings.IMAGE_DERIVATIVE_FORMAT)
+        if not wait:
+            future.add_done_callback(partial(_stored, source, content, threading.get_ident()))
+            return None
+        return store(source, content, future.result())
+    except BrokenProcessPool:
+        reset_pool('images')
+        raise
+
+
+def generate_many(sources, window=None):
+    """Render many images, keeping the pool busy but only `window` originals in memory. Yields (source, error)"""
+    window = window or settings.IMAGE_RENDER_WORKERS * 4
+    pending = []
+
+    def finish(source, content, future):
+        try:
+            store(source, content, future.result())
+            return source, None
+        except BrokenProcessPool:
+            reset_pool('images')
+            raise
+        except Exception as e:
+            return source, e
+
+    for source in sources:
+        content = _read(source)
+        if content is None:
+            yield source, 'unreadable'
+            continue
+        pending.append((source, content, _pool().submit(
+            make_derivatives, content, variants(), settings.IMAGE_DERIVATIVE_FORMAT,
+        )))
+        if len(pending) >= window:
+            yield finish(*pending.pop(0))
+    for item in pending:
+        yield finish(*item)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Removing
+# ─────────────────────────────────────────────────────────────────────────────
+def _delete_unused(names):
+    """Delete derivative files no ImageDerivative row refers to any more (identical images share files)"""
+    used = set(ImageDerivative.objects.filter(file__in=names).values_list('file', flat=True))
+    for name in set(names) - used:
+        default_storage.delete(name)
+
+
+def remove(source):
+    """Drop the derivatives of an image that was replaced or deleted"""
+    names = list(ImageDerivative.objects.filter(source=source).values_list('file', flat=True))
+    ImageDerivative.objects.filter(source=source).delete()
+    _delete_unused(names)
+
+
+def referenced_sources():
+    """Storage names of every Die, Section and Profile image"""
+    sources = set()
+    for model, field in IMAGE_FIELDS.items():
+        sources.update(model.objects.exclude(**{field: ''}).exclude(**{field: None}).values_list(field, flat=True))
+    return sources
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────────────────────────────────────
+def urls_for(sources):
+    """source name -> {variant: URL} for the images given (one query)"""
+    urls = {}
+    rows = ImageDerivative.objects.filter(source__in={source for source in sources if source})
+    for source, variant, name in rows.values_list('source', 'variant', 'file'):
+        urls.setdefault(source, {})[variant] = default_storage.url(name)
+    return urls
+
+
+def variant_urls(image, derivatives):
+    """{variant: URL} of an ImageField value, the original's URL until its derivatives exist"""
+    if not image:
+        return {variant: None for variant in settings.IMAGE_DERIVATIVES}
+    made = derivatives.get(image.name, {})
+    return {variant: made.get(variant) or image.url for variant in settings.IMAGE_DERIVATIVES}
@@ -0,0 +1,183 @@
+import io
+import json
+import platform
+import statistics
+import time
+from contextlib import ExitStack
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from master.models import CompanyPress, Die
+from raw_data.models import Raw_data
+from production.models import OnlineProductionReport
+from .generate_plant_data import SCALES
+
+
+def _endpoints(press, die_no):
+    """(name, method, url, body) of the endpoints we track; body is built per call for POSTs"""
+    today = timezone.localdate().strftime('%Y-%m-%d')
+
+    def lora_message():
+        now = timezone.localtime()
+        return {'message': f"{press.sensor},{now:%d/%m/%y %H:%M:%S}, 1.120,{die_no}, 11.366, 37 Feet3 Inch"}
+
+    return [
+        ('dashboard_new', 'get', reverse('dashboard_new') + '?format=json', None),
+        ('press_production_data', 'get', reverse('press_production_data', args=[press.id]), None),
+        ('sensor_details', 'get', reverse('sensor_details') + f'?sensor_name={press.sensor}', None),
+        ('daily_production_report', 'get', reverse('daily_production_report') + f'?format=json&date={today}', None),
+        ('lora_receive_post', 'post', reverse('lora_receive'), lora_message),
+    ]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic plants of several sizes in a throwaway test database and time the "
+        "key dashboard / report / ingest endpoints (latency and query count). Writes a JSON report "
+        "and flags regressions against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='small,medium',
+                            help=f"Comma separated, any of {', '.join(SCALES)}")
+        parser.add_argument('--endpoints', help="Comma separated subset of endpoint names")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', default='bench_report.json')
+        parser.add_argument('--baseline', help="Earlier report to compare against")
+        parser.add_argument('--save-baseline', help="Also write this run's report to this path")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed slowdown of the median before it counts as a regression")
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help="Ignore slowdowns smaller than this (timer noise)")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        scales = [scale.strip() for scale in options['scales'].split(',') if scale.strip()]
+        unknown = [scale for scale in scales if scale not in SCALES]
+        if unknown:
+            raise CommandError(f"Unknown scale(s): {', '.join(unknown)}")
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connections['default'].vendor,
+            'repeat': options['repeat'],
+            'scales': {},
+        }
+
+        # Never touch the real database: everything runs in the test databases
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            for scale in scales:
+                call_command('flush', interactive=False, verbosity=0)
+                self.stdout.write(f"Generating '{scale}' plant...")
+                call_command('generate_plant_data', scale=scale, stdout=io.StringIO())
+                report['scales'][scale] = self.run_scale(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Report written to {options['output']}")
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = self.compare(report, baseline, options['tolerance'], options['min_delta_ms'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+
+    def run_scale(self, options):
+        press = CompanyPress.objects.filter(sensor__startswith='SIM-').order_by('id').first()
+        die_no = Die.objects.filter(press=press).values_list('die_no', flat=True).first()
+        wanted = options['endpoints'].split(',') if options['endpoints'] else None
+
+        result = {
+            'rows': {
+                'raw_data': Raw_data.objects.count(),
+                'online_production_report': OnlineProductionReport.objects.count(),
+                'dies': Die.objects.count(),
+            },
+            'endpoints': {},
+        }
+        client = Client()
+        for name, method, url, body in _endpoints(press, die_no):
+            if wanted and name not in wanted:
+                continue
+            timings, queries, status, size = [], 0, None, 0
+            # One warm-up call (lookup caches, template loading), then the measured calls
+            for attempt in range(options['repeat'] + 1):
+                with ExitStack() as stack:
+                    captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                    started = time.perf_counter()
+                    if method == 'post':
+                        response = client.post(url, body(), content_type='application/json')
+                    else:
+                        response = client.get(url)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if attempt:
+                    timings.append(elapsed)
+                    queries = sum(len(context) for context in captured)
+                    status, size = response.status_code, len(response.content)
+
+            result['endpoints'][name] = {
+                'status': status,
+                'median_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(_percentile(timings, 0.95), 2),
+                'min_ms': round(min(timings), 2),
+                'queries': queries,
+                'bytes': size,
+            }
+            self.stdout.write(
+                f"  {name:<26} {status}  median {result['endpoints'][name]['median_ms']:>9.2f} ms  "
+                f"p95 {result['endpoints'][name]['p95_ms']:>9.2f} ms  {queries:>5} queries"
+            )
+        return result
+
+    def compare(self, report, baseline, tolerance, min_delta_ms):
+        regressions = []
+        for scale, current in report['scales'].items():
+            base_scale = baseline.get('scales', {}).get(scale)
+            if not base_scale:
+                continue
+            for name, now in current['endpoints'].items():
+                before = base_scale['endpoints'].get(name)
+                if not before:
+                    continue
+                slower = (
+                    now['median_ms'] > before['median_ms'] * (1 + tolerance)
+                    and now['median_ms'] - before['median_ms'] > min_delta_ms
+                )
+                more_queries = now['queries'] > before['queries']
+                if slower or more_queries:
+                    regressions.append((scale, name))
+                    self.stdout.write(self.style.ERROR(
+                        f"REGRESSION {scale}/{name}: median {before['median_ms']} -> {now['median_ms']} ms, "
+                        f"queries {before['queries']} -> {now['queries']}"
+                    ))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+        return regressions
+
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from master import images
+from master.models import ImageDerivative
+
+
+class Command(BaseCommand):
+    help = (
+        "Render thumbnails and previews (settings.IMAGE_DERIVATIVES) of every Die, Section and "
+        "Profile image that does not have them yet, in the image process pool. "
+        "Uploads get theirs automatically; this backfills existing media."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Render every image again (e.g. after changing IMAGE_DERIVATIVES)")
+        parser.add_argument('--prune', action='store_true',
+                            help="Also drop derivatives of images no die, section or profile uses any more")
+
+    def handle(self, *args, **options):
+        sources = images.referenced_sources()
+        todo = sorted(sources)
+        if not options['force']:
+            wanted = len(images.variants())
+            done = {}
+            for source in ImageDerivative.objects.filter(source__in=sources).values_list('source', flat=True):
+                done[source] = done.get(source, 0) + 1
+            todo = [source for source in todo if done.get(source, 0) < wanted]
+
+        self.stdout.write(f"{len(todo)} of {len(sources)} images to render")
+        rendered = failed = 0
+        for source, error in images.generate_many(todo):
+            if error:
+                failed += 1
+                self.stderr.write(f"  {source}: {error}")
+            else:
+                rendered += 1
+
+        if options['prune']:
+            orphans = set(ImageDerivative.objects.exclude(source__in=sources).values_list('source', flat=True))
+            for source in orphans:
+                images.remove(source)
+            self.stdout.write(f"Pruned derivatives of {len(orphans)} unused images")
+
+        self.stdout.write(self.style.SUCCESS(f"Image derivatives: {rendered} rendered, {failed} failed"))
@@ -0,0 +1,334 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from master.models import Company, CompanyPress, CompanyShift, Customer, Die, Section
+from master.versioning import bump_versions
+from order_management import workflow
+from order_management.models import Requisition
+from planning.models import DieRequisition, ProductionPlan
+from production.models import OnlineProductionReport
+from raw_data.models import Raw_data, ProductionData
+
+# Everything generated is tagged with this prefix so --purge can find it again
+PREFIX = 'SIM'
+
+# Named plant sizes; any value can still be overridden on the command line
+SCALES = {
+    'small': {'companies': 1, 'presses': 2, 'dies': 20, 'days': 7, 'pushes_per_hour': 20},
+    'medium': {'companies': 2, 'presses': 4, 'dies': 120, 'days': 30, 'pushes_per_hour': 30},
+    'large': {'companies': 3, 'presses': 6, 'dies': 400, 'days': 180, 'pushes_per_hour': 40},
+}
+
+SHIFTS = [
+    ('Morning', '6:00 AM - 2:00 PM', 6),
+    ('Evening', '2:00 PM - 10:00 PM', 14),
+    ('Night', '10:00 PM - 6:00 AM', 22),
+]
+CUT_LENGTHS = [('12ft', 12), ('16ft', 16), ('18ft', 18)]
+
+
+def _length(feet):
+    """38.47 ft -> Decimal('38.6'): feet + inch / 10, the way parse_length stores Raw_data.length"""
+    whole = int(feet)
+    inch = min(int(round((feet - whole) * 12)), 11)
+    return Decimal(whole) + Decimal(inch) / 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic plant (companies, presses, shifts, dies, requisitions, plans, "
+        "production reports) and realistic Raw_data readings for load and benchmark runs. "
+        "Generated rows are prefixed with 'SIM' and can be removed with --purge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--companies', type=int)
+        parser.add_argument('--presses', type=int, help="Presses per company")
+        parser.add_argument('--dies', type=int)
+        parser.add_argument('--days', type=int, help="Days of history, ending today")
+        parser.add_argument('--pushes-per-hour', type=int, help="Mean pushes per press per running hour")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not rebuild die usage, shift rollups and chart buckets afterwards")
+        parser.add_argument('--purge', action='store_true', help="Delete previously generated data and exit")
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            self.purge()
+            return
+
+        config = dict(SCALES[options['scale']])
+        for key in config:
+            if options.get(key) is not None:
+                config[key] = options[key]
+        if min(config.values()) < 1:
+            raise CommandError("All sizes must be at least 1")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if Company.objects.filter(name__startswith=f"{PREFIX} ").exists():
+            raise CommandError("Generated data already exists; run with --purge first")
+
+        with transaction.atomic():
+            presses, shifts = self.create_plant(config)
+            dies = self.create_dies(config, presses)
+            plans = self.create_orders(config, dies, presses, shifts)
+            reports = self.create_reports(config, plans, shifts)
+        # bulk_create sends no signals, so the list API ETags and status counters have to be moved on by hand
+        bump_versions()
+        workflow.recount()
+        readings = self.create_readings(config, presses, dies)
+
+        if not options['skip_derived']:
+            for command in ('rebuild_die_usage', 'rebuild_shift_rollups', 'rebuild_reading_buckets',
+                            'rebuild_order_progress'):
+                call_command(command, stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(presses)} presses, {len(dies)} dies, {len(plans)} plans, "
+            f"{reports} reports and {readings} readings"
+        ))
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Master data
+    # ─────────────────────────────────────────────────────────────────────────
+    def create_plant(self, config):
+        presses, shifts = [], {}
+        for c in range(1, config['companies'] + 1):
+            company = Company.objects.create(
+                name=f"{PREFIX} Extrusions {c}", address=f"Plot {c}, Industrial Area", contact_no="0000000000"
+            )
+            shifts[company.id] = [
+                CompanyShift.objects.create(company=company, name=name, timing=timing)
+                for name, timing, _ in SHIFTS
+            ]
+            for p in range(1, config['presses'] + 1):
+                presses.append(CompanyPress.objects.create(
+                    company=company, name=f"Press {c}-{p}", sensor=f"{PREFIX}-{c:02d}{p:02d}"
+                ))
+        return presses, shifts
+
+    def create_dies(self, config, presses):
+        rng = self.rng
+        Die.objects.bulk_create([
+            Die(
+                die_id=f"{PREFIX}{n:06d}",
+                die_no=f"{PREFIX}-D{n:05d}",
+                die_name=f"Die {n}",
+                press=rng.choice(presses),
+                no_of_cavity=rng.choice(['One', 'Two', 'Three', 'Four']),
+                req_weight=Decimal(rng.randint(80, 400)) / 100,
+                die_material=rng.choice(['SS', 'CI', 'GI']),
+                type='Dieplate',
+            )
+            for n in range(1, config['dies'] + 1)
+        ], batch_size=self.batch_size)
+        return list(Die.objects.filter(die_no__startswith=f"{PREFIX}-D").order_by('id'))
+
+    def create_orders(self, config, dies, presses, shifts):
+        """One customer requisition, die requisition and production plan per die"""
+        rng = self.rng
+        today = timezone.localdate()
+        Customer.objects.bulk_create([
+            Customer(customer_id=f"{PREFIX}{n:04d}", name=f"{PREFIX} Customer {n}", customer_type='Manufacturer')
+            for n in range(1, max(2, len(dies) // 10) + 1)
+        ])
+        Section.objects.bulk_create([
+            Section(section_id=f"{PREFIX}{n:05d}", section_no=f"{PREFIX}-S{n:04d}", section_name=f"Section {n}")
+            for n in range(1, max(2, len(dies) // 4) + 1)
+        ])
+        customers = list(Customer.objects.filter(customer_id__startswith=PREFIX))
+        sections = list(Section.objects.filter(section_id__startswith=PREFIX))
+
+        requisitions = []
+        for n, die in enumerate(dies, 1):
+            requisitions.append(Requisition(
+                requisition_id=f"{PREFIX}{n:05d}",
+                requisition_no=f"{PREFIX}-R{n:05d}",
+                date=today - timedelta(days=rng.randint(0, config['days'])),
+                customer=rng.choice(customers),
+                contact_no="0000000000",
+                address="-",
+                status=rng.choice(['created', 'in_planning', 'in_production', 'in_production', 'completed']),
+            ))
+        Requisition.objects.bulk_create(requisitions, batch_size=self.batch_size)
+        requisitions = list(Requisition.objects.filter(requisition_id__startswith=PREFIX).order_by('id'))
+
+        die_requisitions = []
+        for n, (die, requisition) in enumerate(zip(dies, requisitions), 1):
+            section = rng.choice(sections)
+            die_requisitions.append(DieRequisition(
+                die_requisition_id=f"{PREFIX}{n:05d}",
+                date=requisition.date,
+                customer_requisition_no=requisition,
+                section_no=section,
+                section_name=section.section_name,
+                wt_range="1.0 - 2.0",
+                die_no=die,
+                die_name=die.die_name,
+                present_wt=die.req_weight,
+                no_of_cavity=die.no_of_cavity,
+                cut_length=rng.choice(CUT_LENGTHS)[0],
+            ))
+        DieRequisition.objects.bulk_create(die_requisitions, batch_size=self.batch_size)
+        die_requisitions = list(
+            DieRequisition.objects.filter(die_requisition_id__startswith=PREFIX)
+            .select_related('die_no', 'section_no', 'customer_requisition_no__customer').order_by('id')
+        )
+
+        plans = []
+        for n, die_requisition in enumerate(die_requisitions, 1):
+            press = die_requisition.die_no.press or rng.choice(presses)
+            plans.append(ProductionPlan(
+                production_plan_id=f"{PREFIX}{n:05d}",
+                date=die_requisition.date,
+                cust_requisition_id=die_requisition.customer_requisition_no,
+                customer_name=die_requisition.customer_requisition_no.customer.name,
+                die_requisition=die_requisition,
+                die_no=die_requisition.die_no.die_no,
+                section_no=die_requisition.section_no.section_no,
+                section_name=die_requisition.section_name,
+                wt_per_piece=Decimal(rng.randint(150, 900)) / 100,
+                no_of_cavity=die_requisition.no_of_cavity,
+                cut_length=die_requisition.cut_length,
+                press=press,
+                date_of_production=die_requisition.date + timedelta(days=rng.randint(0, 3)),
+                shift=rng.choice(shifts[press.company_id]),
+                planned_qty=rng.randint(200, 2000),
+                billet_size="7 inch",
+                no_of_billet=rng.randint(10, 120),
+            ))
+        ProductionPlan.objects.bulk_create(plans, batch_size=self.batch_size)
+        return list(ProductionPlan.objects.filter(production_plan_id__startswith=PREFIX).select_related('die_requisition', 'press', 'shift'))
+
+    def create_reports(self, config, plans, shifts):
+        """A report per plan, recovery normally distributed around 88%"""
+        rng = self.rng
+        today = timezone.localdate()
+        reports = []
+        for n, plan in enumerate(plans, 1):
+            day = min(plan.date_of_production, today)
+            start_hour = next(hour for name, _, hour in SHIFTS if name == plan.shift.name)
+            input_qty = Decimal(plan.no_of_billet * rng.randint(40, 70))
+            wt_per_piece = plan.wt_per_piece
+            pieces = int(float(input_qty) * min(rng.gauss(0.88, 0.04), 0.99) / float(wt_per_piece))
+            reports.append(OnlineProductionReport(
+                production_id=f"{PREFIX}{n:06d}",
+                date=day,
+                date_of_production=day,
+                die_requisition=plan.die_requisition,
+                die_no=plan.die_no,
+                section_no=plan.section_no,
+                section_name=plan.section_name,
+                no_of_cavity=plan.no_of_cavity,
+                cut_length=plan.cut_length,
+                press=plan.press,
+                shift=plan.shift,
+                planned_qty=plan.planned_qty,
+                start_time=time(start_hour, rng.randint(0, 59)),
+                end_time=time((start_hour + rng.randint(2, 7)) % 24, rng.randint(0, 59)),
+                billet_size=plan.billet_size,
+                no_of_billet=plan.no_of_billet,
+                input_qty=input_qty,
+                wt_per_piece_output=wt_per_piece,
+                no_of_pieces=pieces,
+                total_output=wt_per_piece * pieces,
+                status='completed' if day < today else rng.choice(['in_progress', 'completed']),
+            ))
+        # bulk_create skips save()/signals; shift rollups are rebuilt afterwards
+        OnlineProductionReport.objects.bulk_create(reports, batch_size=self.batch_size)
+        return len(reports)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Sensor readings
+    # ─────────────────────────────────────────────────────────────────────────
+    def create_readings(self, config, presses, dies):
+        """
+        Per press: runs of one die lasting a few hours, pushes arriving as a
+        Poisson process, with a quieter night shift and short breakdowns.
+        t-factor and length are normally distributed around per-die means.
+        """
+        rng = self.rng
+        tz = timezone.get_current_timezone()
+        end = timezone.now()
+        start = timezone.make_aware(
+            datetime.combine(timezone.localdate() - timedelta(days=config['days'] - 1), time.min), tz
+        )
+        die_profile = {
+            die.id: (rng.uniform(0.95, 1.30), rng.choice(CUT_LENGTHS)[1] * rng.uniform(2.0, 3.2))
+            for die in dies
+        }
+        dies_by_press = {}
+        for die in dies:
+            dies_by_press.setdefault(die.press_id, []).append(die)
+
+        total = 0
+        for press in presses:
+            own_dies = dies_by_press.get(press.id) or dies
+            raw_rows, prod_rows = [], []
+            moment = start
+            while moment < end:
+                die = rng.choice(own_dies)
+                t_mean, length_mean = die_profile[die.id]
+                run_end = moment + timedelta(hours=rng.uniform(1, 6))
+                while moment < min(run_end, end):
+                    local_hour = timezone.localtime(moment).hour
+                    rate = config['pushes_per_hour'] * (0.6 if local_hour >= 22 or local_hour < 6 else 1.0)
+                    moment += timedelta(seconds=rng.expovariate(rate / 3600))
+                    if rng.random() < 0.002:  # breakdown / die trial
+                        moment += timedelta(minutes=rng.uniform(10, 90))
+                    if moment >= end:
+                        break
+                    t_factor = Decimal(f"{max(0.5, rng.gauss(t_mean, 0.03)):.3f}")
+                    length = _length(max(1.0, rng.gauss(length_mean, 0.8)))
+                    reading_time = moment.replace(microsecond=0)
+                    raw_rows.append(Raw_data(
+                        sensor_name=press.sensor, datetime=reading_time, t_factor=t_factor,
+                        die_number=die.die_no, length=length, die_id=die.id, press_id=press.id,
+                    ))
+                    prod_rows.append(ProductionData(
+                        sensor_name=press.sensor, datetime=reading_time, t_factor=t_factor,
+                        die_name=f"Die {die.die_no}", length=length,
+                    ))
+                    if len(raw_rows) >= self.batch_size:
+                        total += self._flush(raw_rows, prod_rows)
+                        raw_rows, prod_rows = [], []
+                # Die change
+                moment += timedelta(minutes=rng.uniform(15, 45))
+            total += self._flush(raw_rows, prod_rows)
+            self.stdout.write(f"  {press.name}: readings up to {total}")
+        return total
+
+    def _flush(self, raw_rows, prod_rows):
+        with transaction.atomic():
+            Raw_data.objects.bulk_create(raw_rows, batch_size=self.batch_size)
+            ProductionData.objects.bulk_create(prod_rows, batch_size=self.batch_size)
+        return len(raw_rows)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Cleanup
+    # ─────────────────────────────────────────────────────────────────────────
+    def purge(self):
+        sensor_filter = {'sensor_name__startswith': f"{PREFIX}-"}
+        with transaction.atomic():
+            counts = {
+                'readings': Raw_data.objects.filter(**sensor_filter).delete()[0],
+                'production data': ProductionData.objects.filter(**sensor_filter).delete()[0],
+                'reports': OnlineProductionReport.objects.filter(production_id__startswith=PREFIX).delete()[0],
+                'requisitions': Requisition.objects.filter(requisition_id__startswith=PREFIX).delete()[0],
+                'dies': Die.objects.filter(die_no__startswith=f"{PREFIX}-D").delete()[0],
+                'sections': Section.objects.filter(section_id__startswith=PREFIX).delete()[0],
+                'customers': Customer.objects.filter(customer_id__startswith=PREFIX).delete()[0],
+                'companies': Company.objects.filter(name__startswith=f"{PREFIX} ").delete()[0],
+            }
+        self.stdout.write(self.style.SUCCESS(
+            "Purged " + ", ".join(f"{count} {name}" for name, count in counts.items())
+        ))
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from master.models import DieUsage
+from raw_data.archive import archived_readings
+from raw_data.models import Raw_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild die usage counters from raw_machine_data in one grouped query, plus the "
+        "archived readings. "
+        "Only needed once (or after a backfill); ingest keeps the counters up to date."
+    )
+
+    def handle(self, *args, **options):
+        totals = {
+            row['die']: row
+            for row in Raw_data.objects.filter(die__isnull=False)
+            .values('die')
+            .annotate(
+                pushes=Count('id'),
+                total_length=Sum('length'),
+                cumulative_t_factor=Sum('t_factor'),
+                last_used_at=Max('datetime'),
+            )
+            .order_by()
+        }
+        for reading in archived_readings():
+            if reading.die_id is None:
+                continue
+            row = totals.setdefault(reading.die_id, {
+                'die': reading.die_id, 'pushes': 0, 'total_length': 0, 'cumulative_t_factor': 0, 'last_used_at': None,
+            })
+            row['pushes'] += 1
+            row['total_length'] = (row['total_length'] or 0) + reading.length
+            row['cumulative_t_factor'] = (row['cumulative_t_factor'] or 0) + reading.t_factor
+            if row['last_used_at'] is None or reading.datetime > row['last_used_at']:
+                row['last_used_at'] = reading.datetime
+
+        with transaction.atomic():
+            existing = {u.die_id: u for u in DieUsage.objects.select_for_update()}
+            to_create, to_update = [], []
+            for row in totals.values():
+                usage = existing.get(row['die']) or DieUsage(die_id=row['die'])
+                # Readings since the last service count towards the service counters
+                if usage.last_serviced_at is None:
+                    usage.pushes_since_service = row['pushes']
+                    usage.length_since_service = row['total_length'] or 0
+                usage.pushes = row['pushes']
+                usage.total_length = row['total_length'] or 0
+                usage.cumulative_t_factor = row['cumulative_t_factor'] or 0
+                usage.last_used_at = row['last_used_at']
+                (to_update if usage.die_id in existing else to_create).append(usage)
+
+            DieUsage.objects.bulk_create(to_create)
+            DieUsage.objects.bulk_update(to_update, [
+                'pushes', 'total_length', 'cumulative_t_factor', 'last_used_at',
+                'pushes_since_service', 'length_since_service',
+            ])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Die usage rebuilt: {len(to_create)} created, {len(to_update)} updated"
+        ))
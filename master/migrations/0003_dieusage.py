@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0002_rename_capacity_companypress_sensor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DieUsage',
+            fields=[
+                ('die', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='usage', serialize=False, to='master.die', verbose_name='Die')),
+                ('pushes', models.PositiveBigIntegerField(default=0, verbose_name='Pushes')),
+                ('total_length', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total Length (ft.in)')),
+                ('cumulative_t_factor', models.DecimalField(decimal_places=3, default=0, max_digits=16, verbose_name='Cumulative T-Factor')),
+                ('last_used_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Used At')),
+                ('pushes_since_service', models.PositiveBigIntegerField(default=0, verbose_name='Pushes Since Service')),
+                ('length_since_service', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Length Since Service')),
+                ('last_serviced_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Serviced At')),
+            ],
+            options={
+                'verbose_name': 'Die Usage',
+                'verbose_name_plural': 'Die Usage',
+                'db_table': 'die_usage',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0003_dieusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=100, unique=True, verbose_name='Resource')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Version')),
+                ('changed_at', models.DateTimeField(auto_now=True, verbose_name='Changed At')),
+            ],
+            options={
+                'db_table': 'resource_version',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Source Image')),
+                ('variant', models.CharField(choices=[('thumb', 'Thumbnail'), ('preview', 'Preview')], max_length=20, verbose_name='Variant')),
+                ('file', models.CharField(max_length=255, verbose_name='File')),
+                ('width', models.PositiveIntegerField(default=0, verbose_name='Width')),
+                ('height', models.PositiveIntegerField(default=0, verbose_name='Height')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Size (bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'image_derivative',
+                'constraints': [models.UniqueConstraint(fields=('source', 'variant'), name='uniq_image_derivative')],
+            },
+        ),
+    ]
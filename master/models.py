@@ -134,6 +134,97 @@ class Die(models.Model):
     def __str__(self):
         return f"{self.die_id} - {self.die_no}"
 
+#─────────────────────────────────────────────────────────────────────────────
+# Model for Die usage / wear counters (maintained at ingest, see master.die_life)
+#─────────────────────────────────────────────────────────────────────────────
+class DieUsage(models.Model):
+    """Running usage counters for a die, incremented for every sensor reading"""
+
+    die = models.OneToOneField(
+        Die,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='usage',
+        verbose_name="Die"
+    )
+    pushes = models.PositiveBigIntegerField(default=0, verbose_name="Pushes")
+    total_length = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name="Total Length (ft.in)"
+    )
+    cumulative_t_factor = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=0,
+        verbose_name="Cumulative T-Factor"
+    )
+    last_used_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Used At")
+
+    # Counters since the die was last serviced (reset from the die health API)
+    pushes_since_service = models.PositiveBigIntegerField(default=0, verbose_name="Pushes Since Service")
+    length_since_service = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name="Length Since Service"
+    )
+    last_serviced_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Serviced At")
+
+    class Meta:
+        db_table = 'die_usage'
+        verbose_name = "Die Usage"
+        verbose_name_plural = "Die Usage"
+
+    def __str__(self):
+        return f"{self.die_id} - {self.pushes} pushes"
+
+#─────────────────────────────────────────────────────────────────────────────
+# Model for per-table change counters (ETags of the list APIs, see master.versioning)
+#─────────────────────────────────────────────────────────────────────────────
+class ResourceVersion(models.Model):
+    """Bumped on every save/delete of a tracked model"""
+
+    resource = models.CharField(max_length=100, unique=True, verbose_name="Resource")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Version")
+    changed_at = models.DateTimeField(auto_now=True, verbose_name="Changed At")
+
+    class Meta:
+        db_table = 'resource_version'
+
+    def __str__(self):
+        return f"{self.resource} v{self.version}"
+
+#─────────────────────────────────────────────────────────────────────────────
+# Model for resized copies of uploaded images (see master.images)
+#─────────────────────────────────────────────────────────────────────────────
+class ImageDerivative(models.Model):
+    """A thumbnail or preview of a Die, Section or Profile image"""
+
+    VARIANT_CHOICES = [
+        ('thumb', 'Thumbnail'),
+        ('preview', 'Preview'),
+    ]
+
+    # Storage names; the derivative's name carries a hash of its content
+    source = models.CharField(max_length=255, verbose_name="Source Image")
+    variant = models.CharField(max_length=20, choices=VARIANT_CHOICES, verbose_name="Variant")
+    file = models.CharField(max_length=255, verbose_name="File")
+    width = models.PositiveIntegerField(default=0, verbose_name="Width")
+    height = models.PositiveIntegerField(default=0, verbose_name="Height")
+    size = models.PositiveIntegerField(default=0, verbose_name="Size (bytes)")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'image_derivative'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'variant'], name='uniq_image_derivative'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.variant})"
+
 #─────────────────────────────────────────────────────────────────────────────
 # Model for Press functionality
 #─────────────────────────────────────────────────────────────────────────────
@@ -0,0 +1,146 @@
+"""
+Structured shift timings.
+
+CompanyShift.timing is free text such as "9:00 AM - 5:00 PM" or "22:00 - 06:00".
+`parse_shift_timing` turns it into a ShiftInterval (minutes after midnight,
+overnight shifts wrap), and `shift_index` keeps the parsed intervals per
+company so a reading time can be mapped to (shift, production day) without
+touching the database.
+"""
+import re
+import threading
+import time
+from datetime import timedelta
+
+from .models import CompanyShift, CompanyPress
+
+INDEX_TTL = 300  # seconds; signals drop the index at once in this process, other workers reload after this
+
+TIMING_RE = re.compile(
+    r'^\s*(?P<h1>\d{1,2})(?:[:.](?P<m1>\d{2}))?\s*(?P<ap1>[ap]\.?m\.?)?'
+    r'\s*(?:-|–|—|to)\s*'
+    r'(?P<h2>\d{1,2})(?:[:.](?P<m2>\d{2}))?\s*(?P<ap2>[ap]\.?m\.?)?\s*$',
+    re.IGNORECASE,
+)
+
+
+def _to_minutes(hour, minute, ampm):
+    hour = int(hour)
+    minute = int(minute or 0)
+    if ampm:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid 12-hour time {hour}:{minute:02d} {ampm}")
+        hour = hour % 12 + (12 if ampm[0].lower() == 'p' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Invalid time {hour}:{minute:02d}")
+    return hour * 60 + minute
+
+
+class ShiftInterval:
+    """A daily shift window in minutes after midnight; end <= start means it runs past midnight"""
+
+    __slots__ = ('start', 'end')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    @property
+    def overnight(self):
+        return self.end <= self.start
+
+    @property
+    def duration_minutes(self):
+        return (self.end - self.start) % 1440 or 1440
+
+    def contains(self, minute):
+        if self.overnight:
+            return minute >= self.start or minute < self.end
+        return self.start <= minute < self.end
+
+    def production_day(self, local_dt):
+        """The calendar day the shift started on (the early-morning part of a night shift belongs to the day before)"""
+        minute = local_dt.hour * 60 + local_dt.minute
+        if self.overnight and minute < self.end:
+            return local_dt.date() - timedelta(days=1)
+        return local_dt.date()
+
+    def __repr__(self):
+        return f"ShiftInterval({self.start // 60:02d}:{self.start % 60:02d}-{self.end // 60:02d}:{self.end % 60:02d})"
+
+
+def parse_shift_timing(timing):
+    """'9:00 AM - 5:00 PM' -> ShiftInterval(540, 1020). Raises ValueError for unreadable timings"""
+    match = TIMING_RE.match(timing or '')
+    if not match:
+        raise ValueError(f"Unreadable shift timing '{timing}'")
+    g = match.group
+    # A time without AM/PM is read as 24-hour
+    return ShiftInterval(
+        _to_minutes(g('h1'), g('m1'), g('ap1')),
+        _to_minutes(g('h2'), g('m2'), g('ap2')),
+    )
+
+
+class ShiftIndex:
+    """Per-company shift intervals plus press -> company, loaded lazily and dropped on master-data changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shifts = None
+        self._press_company = None
+        self._loaded_at = 0.0
+
+    def _load(self):
+        shifts = {}
+        for shift_id, company_id, timing in CompanyShift.objects.order_by('id').values_list('id', 'company_id', 'timing'):
+            try:
+                interval = parse_shift_timing(timing)
+            except ValueError:
+                continue
+            shifts.setdefault(company_id, []).append((shift_id, interval))
+        self._shifts = shifts
+        self._press_company = dict(CompanyPress.objects.values_list('id', 'company_id'))
+        self._loaded_at = time.monotonic()
+
+    def _tables(self):
+        with self._lock:
+            if self._shifts is None or time.monotonic() - self._loaded_at > INDEX_TTL:
+                self._load()
+            return self._shifts, self._press_company
+
+    def shifts_for_company(self, company_id):
+        return self._tables()[0].get(company_id, [])
+
+    def shift_interval(self, shift_id):
+        for shifts in self._tables()[0].values():
+            for candidate_id, interval in shifts:
+                if candidate_id == shift_id:
+                    return interval
+        return None
+
+    def resolve(self, press_id, local_dt):
+        """(shift_id, production_day) for a local time on a press; shift_id is None outside every shift"""
+        shifts, press_company = self._tables()
+        minute = local_dt.hour * 60 + local_dt.minute
+        for shift_id, interval in shifts.get(press_company.get(press_id), []):
+            if interval.contains(minute):
+                return shift_id, interval.production_day(local_dt)
+        return None, local_dt.date()
+
+    def resolve_time(self, press_id, time_of_day):
+        """Shift id for a time of day on a press, e.g. a production report's start time"""
+        shifts, press_company = self._tables()
+        minute = time_of_day.hour * 60 + time_of_day.minute
+        for shift_id, interval in shifts.get(press_company.get(press_id), []):
+            if interval.contains(minute):
+                return shift_id
+        return None
+
+    def invalidate(self, *args, **kwargs):
+        with self._lock:
+            self._shifts = None
+            self._press_company = None
+
+
+shift_index = ShiftIndex()
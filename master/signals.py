@@ -0,0 +1,53 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+
+from . import images
+from .models import CompanyShift, CompanyPress
+from .shifts import shift_index
+from .versioning import model_changed, tracked_models
+
+
+for model in (CompanyShift, CompanyPress):
+    post_save.connect(shift_index.invalidate, sender=model, dispatch_uid=f"master_shift_index_{model.__name__}_save")
+    post_delete.connect(shift_index.invalidate, sender=model, dispatch_uid=f"master_shift_index_{model.__name__}_delete")
+
+for model in tracked_models():
+    post_save.connect(model_changed, sender=model, dispatch_uid=f"master_version_{model._meta.label}_save")
+    post_delete.connect(model_changed, sender=model, dispatch_uid=f"master_version_{model._meta.label}_delete")
+
+
+# Image derivatives (master.images): rendered after the commit that stores a new image
+def remember_image(sender, instance, **kwargs):
+    field = images.IMAGE_FIELDS[sender]
+    if field in instance.get_deferred_fields():
+        instance._image_source = False  # not loaded: saving this instance cannot change the image
+    else:
+        instance._image_source = getattr(instance, field).name if instance.pk else None
+
+
+def image_saved(sender, instance, **kwargs):
+    old = getattr(instance, '_image_source', None)
+    if old is False:
+        return
+    new = getattr(instance, images.IMAGE_FIELDS[sender]).name
+    if old == new:
+        return
+    if old:
+        transaction.on_commit(partial(images.remove, old))
+    if new:
+        transaction.on_commit(partial(images.generate, new, wait=False))
+    instance._image_source = new
+
+
+def image_deleted(sender, instance, **kwargs):
+    source = getattr(instance, images.IMAGE_FIELDS[sender]).name
+    if source:
+        transaction.on_commit(partial(images.remove, source))
+
+
+for model in images.IMAGE_FIELDS:
+    post_init.connect(remember_image, sender=model, dispatch_uid=f"master_image_{model.__name__}_init")
+    post_save.connect(image_saved, sender=model, dispatch_uid=f"master_image_{model.__name__}_save")
+    post_delete.connect(image_deleted, sender=model, dispatch_uid=f"master_image_{model.__name__}_delete")
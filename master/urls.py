@@ -10,6 +10,7 @@ urlpatterns = [
     # API endpoints
     path('api/dies/', DieAPI.as_view(), name='die_api_create'),
     path('api/dies/<int:die_id>/', DieDetailAPI.as_view(), name='die_detail_api'),  
+    path('api/dies/health/', DieHealthAPI.as_view(), name='die_health_api'),
     # List view
     path('dies/', DieListView.as_view(), name='die_list'),
 
@@ -0,0 +1,129 @@
+"""
+Conditional GET for the master-data and planning list APIs.
+
+Every save/delete of a tracked model bumps its ResourceVersion row (see
+master.signals). `conditional_get` wraps a View.get: it builds an ETag from
+the versions of the models the response is made of, plus the request path
+and query string, and answers If-None-Match / If-Modified-Since with 304
+before the view touches the row data.
+
+bulk_create / queryset.update() send no signals; code that uses them on a
+tracked model should call `bump_versions` afterwards.
+"""
+import hashlib
+from functools import wraps
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import ResourceVersion
+
+TRACKED_MODELS = [
+    'master.Die',
+    'master.Press',
+    'master.Alloy',
+    'master.Lot',
+    'master.Profile',
+    'master.Customer',
+    'master.Company',
+    'master.CompanyShift',
+    'master.CompanyPress',
+    'master.Supplier',
+    'master.Staff',
+    'master.Section',
+    'order_management.Requisition',
+    'order_management.RequisitionOrder',
+    'planning.DieRequisition',
+    'planning.ProductionPlan',
+]
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label
+
+
+def bump_versions(*models):
+    """Mark the given models (all tracked models if none given) as changed"""
+    for label in [_label(model) for model in models] or TRACKED_MODELS:
+        updated = ResourceVersion.objects.filter(resource=label).update(
+            version=F('version') + 1, changed_at=timezone.now()
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                ResourceVersion.objects.create(resource=label, version=1)
+        except IntegrityError:
+            ResourceVersion.objects.filter(resource=label).update(
+                version=F('version') + 1, changed_at=timezone.now()
+            )
+
+
+def current_versions(*models):
+    """Version counters of the given models, e.g. to tell whether a per-process cache is stale"""
+    labels = [_label(model) for model in models]
+    versions = dict(ResourceVersion.objects.filter(resource__in=labels).values_list('resource', 'version'))
+    return tuple(versions.get(label, 0) for label in labels)
+
+
+def model_changed(sender, **kwargs):
+    """post_save / post_delete receiver"""
+    bump_versions(sender)
+
+
+def tracked_models():
+    return [apps.get_model(label) for label in TRACKED_MODELS]
+
+
+def validators(request, models, extra=None):
+    """(etag, last_modified) for a request whose response is built from `models`"""
+    labels = sorted(_label(model) for model in models)
+    rows = dict(
+        (resource, (version, changed_at))
+        for resource, version, changed_at in ResourceVersion.objects.filter(resource__in=labels).values_list(
+            'resource', 'version', 'changed_at'
+        )
+    )
+    parts = [request.get_full_path()]
+    parts += [f"{label}:{rows.get(label, (0, None))[0]}" for label in labels]
+    if extra is not None:
+        parts.append(str(extra(request)))
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+    # A custom validator can change without any version bump, so then only the ETag is reliable
+    changed = [changed_at for _, changed_at in rows.values() if changed_at]
+    last_modified = max(changed).timestamp() if changed and extra is None else None
+    return etag, last_modified
+
+
+def conditional_get(*models, extra=None, unless_params=('action',)):
+    """
+    Decorator for View.get. `models` are the models (or 'app.Model' labels) the
+    response depends on; `extra(request)` may return one more cheap validator
+    for data that changes without signals. Requests carrying any of
+    `unless_params` (e.g. ?action=get_next_id) are passed through untouched.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or any(param in request.GET for param in unless_params):
+                return view_method(self, request, *args, **kwargs)
+
+            etag, last_modified = validators(request, models, extra)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+            # Let browsers and the gateway keep the body but revalidate every time
+            patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
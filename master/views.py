@@ -1,13 +1,14 @@
 # import necessary modules and decorators
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from Aluminium_Extrusions.pagination import KeysetPaginator
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
 from django.views import View
+from django.db.models import Count
 from django.utils.dateparse import parse_date
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.forms.models import model_to_dict
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -15,6 +16,10 @@ import base64
 
 from .models import *
 from .forms import *
+from .die_life import health_summary, health_validator, usage_summary, mark_serviced, service_thresholds
+from .versioning import conditional_get
+from . import images
+from raw_data import anomaly
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -79,6 +84,7 @@ class DieListView(View):
 class DieAPI(View):
     """API endpoints for CRUD on Die model."""
 
+    @conditional_get(Die, CompanyPress, Supplier, extra=health_validator)
     def get(self, request):
         """Get all dies as JSON or get next Die ID"""
         # Check if requesting next Die ID
@@ -90,7 +96,8 @@ class DieAPI(View):
             })
         
         # Otherwise return all dies
-        dies = Die.objects.all().select_related('press', 'supplier').order_by('-created_at')
+        dies = list(Die.objects.all().select_related('press', 'supplier', 'usage').order_by('-created_at'))
+        derivatives = images.urls_for(d.image.name for d in dies)
         formatted = [
             {
                 "id": d.id,
@@ -112,8 +119,10 @@ class DieAPI(View):
                 "hardness": d.hardness,
                 "type": d.type,
                 "image_url": d.image.url if d.image else None,
+                **{f"image_{variant}_url": url for variant, url in images.variant_urls(d.image, derivatives).items()},
                 "remark": d.remark,
                 "created_at": d.created_at.strftime("%Y-%m-%d"),
+                "usage": health_summary(d),
             }
             for d in dies
         ]
@@ -191,7 +200,7 @@ class DieDetailAPI(View):
     def get(self, request, die_id):
         """Get die details as JSON"""
         try:
-            die = get_object_or_404(Die, id=die_id)
+            die = get_object_or_404(Die.objects.select_related('press', 'supplier', 'usage'), id=die_id)
             
             return JsonResponse({
                 'success': True,
@@ -215,8 +224,18 @@ class DieDetailAPI(View):
                     'hardness': die.hardness,
                     'type': die.type,
                     'image_url': die.image.url if die.image else None,
+                    **{
+                        f'image_{variant}_url': url
+                        for variant, url in images.variant_urls(die.image, images.urls_for([die.image.name])).items()
+                    },
                     'remark': die.remark,
                     'created_at': die.created_at.strftime("%Y-%m-%d"),
+                    'usage': usage_summary(die),
+                    'reading_stats': anomaly.stats_summary(die.id),
+                    'alerts': [
+                        anomaly.alert_as_dict(alert)
+                        for alert in die.reading_alerts.order_by('-reading_time')[:10]
+                    ],
                 }
             })
         except Exception as e:
@@ -306,6 +325,53 @@ class DieDetailAPI(View):
                 'message': str(e)
             })
 
+@method_decorator(csrf_exempt, name="dispatch")
+class DieHealthAPI(View):
+    """API for die usage counters and service status (no scan of raw readings)"""
+
+    def get(self, request):
+        """Get usage and health of all dies, optionally filtered by ?health="""
+        dies = Die.objects.all().select_related('press', 'usage').order_by('die_no')
+        health_filter = request.GET.get('health')
+        alerts_by_die = dict(
+            anomaly.open_alerts().values_list('die').annotate(n=Count('id')).order_by()
+        )
+
+        formatted = []
+        for d in dies:
+            usage = usage_summary(d)
+            if health_filter and usage['health'] != health_filter:
+                continue
+            formatted.append({
+                "id": d.id,
+                "die_id": d.die_id,
+                "die_no": d.die_no,
+                "die_name": d.die_name,
+                "press": d.press.name if d.press else "N/A",
+                **usage,
+                "open_alerts": alerts_by_die.get(d.id, 0),
+            })
+
+        return JsonResponse({
+            "success": True,
+            "thresholds": service_thresholds(),
+            "dies": formatted,
+        })
+
+    def post(self, request):
+        """Mark a die as serviced: {"die_id": <id>}"""
+        try:
+            data = json.loads(request.body)
+            die = get_object_or_404(Die, id=data.get('die_id'))
+            mark_serviced(die.id)
+            return JsonResponse({
+                'success': True,
+                'message': f'Die "{die.die_no}" marked as serviced.'
+            })
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': str(e)})
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Views for Press functionality
 # ─────────────────────────────────────────────────────────────────────────────
@@ -335,6 +401,7 @@ class PressListView(View):
 class PressAPI(View):
     """API endpoints for CRUD on Press model."""
 
+    @conditional_get(Press)
     def get(self, request):
         """Get all presses as JSON"""
         presses = Press.objects.all().order_by("-date_added")
@@ -436,9 +503,8 @@ class AlloyListView(View):
             alloys = Alloy.objects.all().order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(alloys, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(alloys, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -459,6 +525,8 @@ class AlloyListView(View):
                     "alloys": alloys_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -524,6 +592,7 @@ class AlloyEditView(View):
 class AlloyAPI(View):
     """API for CRUD on Alloy"""
     
+    @conditional_get(Alloy)
     def get(self, request):
         """Get all alloys or get next Alloy ID"""
         # Check if requesting next Alloy ID
@@ -725,6 +794,7 @@ class LotListView(View):
 class LotAPI(View):
     """API for CRUD on Lot"""
 
+    @conditional_get(Lot, Press)
     def get(self, request):
         lots = Lot.objects.all().order_by("-created_at")
         formatted = [
@@ -847,9 +917,11 @@ class ProfileListView(View):
 class ProfileAPI(View):
     """API for CRUD on Profile"""
 
+    @conditional_get(Profile)
     def get(self, request):
         try:
-            profiles = Profile.objects.all().order_by("-created_at")
+            profiles = list(Profile.objects.all().order_by("-created_at"))
+            derivatives = images.urls_for(p.shape_image.name for p in profiles)
             formatted = [
                 {
                     "id": p.id,
@@ -863,6 +935,7 @@ class ProfileAPI(View):
                     "weight_type_key": p.weight_type,
                     "weight_value": p.weight_value,  # Remove float() conversion - keep as string
                     "shape_image": p.shape_image.url if p.shape_image else None,
+                    "shape_image_thumb": images.variant_urls(p.shape_image, derivatives)['thumb'],
                     "date_added": p.date_added.strftime("%Y-%m-%d"),
                 }
                 for p in profiles
@@ -988,9 +1061,8 @@ class CustomerListView(View):
             customers = Customer.objects.all().order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(customers, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(customers, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -1007,6 +1079,8 @@ class CustomerListView(View):
                     "customers": customers_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -1107,6 +1181,7 @@ class CustomerEditView(View):
 class CustomerAPI(View):
     """API for CRUD on Customer"""
     
+    @conditional_get(Customer)
     def get(self, request):
         """Get all customers or get next Customer ID"""
         # Check if requesting next Customer ID
@@ -1617,9 +1692,8 @@ class SupplierListView(View):
             suppliers = Supplier.objects.all().order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(suppliers, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(suppliers, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -1636,6 +1710,8 @@ class SupplierListView(View):
                     "suppliers": suppliers_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -1736,6 +1812,7 @@ class SupplierEditView(View):
 class SupplierAPI(View):
     """API for CRUD on Supplier"""
     
+    @conditional_get(Supplier)
     def get(self, request):
         """Get all suppliers or get next Supplier ID"""
         # Check if requesting next Supplier ID
@@ -1917,9 +1994,8 @@ class StaffListView(View):
             ).all().order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(staff_members, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(staff_members, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -1942,6 +2018,8 @@ class StaffListView(View):
                     "staff": staff_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -2014,6 +2092,7 @@ class StaffEditView(View):
 class StaffAPI(View):
     """API for CRUD on Staff"""
     
+    @conditional_get(Staff, CompanyPress, Company)
     def get(self, request):
         """Get all staff or get next Staff ID"""
         # Check if requesting next Staff ID
@@ -2287,9 +2366,8 @@ class SectionListView(View):
             sections = Section.objects.all().order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(sections, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(sections, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -2301,10 +2379,12 @@ class SectionListView(View):
             or request.GET.get("format") == "json"
         ):
             sections_list = []
+            derivatives = images.urls_for(s.section_image.name for s in page_obj)
             for s in page_obj:
                 section_dict = model_to_dict(s, exclude=['section_image'])
                 if s.section_image:
                     section_dict['section_image'] = s.section_image.url
+                    section_dict['section_image_thumb'] = images.variant_urls(s.section_image, derivatives)['thumb']
                 sections_list.append(section_dict)
             
             return JsonResponse(
@@ -2312,6 +2392,8 @@ class SectionListView(View):
                     "sections": sections_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -2376,6 +2458,7 @@ class SectionEditView(View):
 class SectionAPI(View):
     """API for CRUD on Section"""
     
+    @conditional_get(Section)
     def get(self, request):
         """Get all sections or get next Section ID"""
         # Check if requesting next Section ID
@@ -2387,7 +2470,8 @@ class SectionAPI(View):
             })
         
         # Otherwise return all sections
-        sections = Section.objects.all().order_by("-created_at")
+        sections = list(Section.objects.all().order_by("-created_at"))
+        derivatives = images.urls_for(s.section_image.name for s in sections)
         
         formatted = []
         for s in sections:
@@ -2398,6 +2482,7 @@ class SectionAPI(View):
                 "section_no": s.section_no,
                 "section_name": s.section_name,
                 "section_image": s.section_image.url if s.section_image else None,
+                "section_image_thumb": images.variant_urls(s.section_image, derivatives)['thumb'],
                 "shape": s.shape,
                 "type": s.type,
                 "usage": s.usage,
@@ -0,0 +1,363 @@
+"""
+Order progress lineage.
+
+A customer order is traced Requisition -> RequisitionOrder (order line) ->
+DieRequisition -> ProductionPlan -> OnlineProductionReport -> Raw_data. Below
+the requisition the links are partly free text (die_no / section_no
+CharFields on plan and report), so they are resolved here once and the
+result is kept in OrderProgress rows: one per order line plus the requisition
+total (order_line_key 0).
+
+* Document columns (ordered / planned qty, reports, pieces, input / output)
+  are recomputed per requisition from its few documents whenever one of them
+  is saved or deleted (order_management.signals).
+* Reading columns are incremented at ingest (raw_data.ingest) for the order
+  line the die is planned for on that day (`die_plans`), and recomputed for
+  the affected requisitions when a change moves that attribution.
+"""
+import bisect
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from itertools import chain
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from master.models import Die
+from master.versioning import current_versions
+from planning.models import ProductionPlan
+from production.models import OnlineProductionReport
+from raw_data import archive
+from raw_data.models import Raw_data
+from .models import OrderProgress, Requisition, RequisitionOrder
+
+PLAN_TTL = 300   # seconds before die_plans is reloaded anyway
+VERSION_CHECK_SECONDS = 1.0  # how often die_plans looks for plan changes made by other processes
+# die_plans is built from these; their ResourceVersion rows move with every save in any process
+PLAN_SOURCES = (
+    'planning.ProductionPlan', 'planning.DieRequisition', 'order_management.RequisitionOrder',
+    'master.Die', 'master.Section',
+)
+
+LINE_FIELDS = ('id', 'requisition_id', 'section_no_id', 'section_no__section_no', 'cut_length')
+PLAN_FIELDS = (
+    'id', 'date', 'date_of_production', 'cust_requisition_id', 'die_no', 'section_no', 'cut_length',
+    'die_requisition__customer_requisition_no_id', 'die_requisition__die_no_id',
+    'die_requisition__section_no_id', 'die_requisition__cut_length',
+)
+
+
+def _empty_progress():
+    return {
+        'ordered_qty': 0, 'planned_qty': 0, 'planned_billets': 0, 'report_count': 0,
+        'produced_pieces': 0, 'input_qty': Decimal(0), 'total_output': Decimal(0),
+    }
+
+
+def _empty_readings():
+    return {'reading_count': 0, 'produced_length': Decimal(0), 'last_reading_at': None}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Resolving documents to (requisition, order line)
+# ─────────────────────────────────────────────────────────────────────────────
+def _lines_by_requisition(requisition_ids=None):
+    lines = RequisitionOrder.objects.order_by('id')
+    if requisition_ids is not None:
+        lines = lines.filter(requisition_id__in=requisition_ids)
+    grouped = defaultdict(list)
+    for line in lines.values(*LINE_FIELDS, 'qty_in_no'):
+        grouped[line['requisition_id']].append(line)
+    return grouped
+
+
+def match_line(lines, section_id=None, section_no=None, cut_length=None):
+    """Order line id for a section (narrowed by cut length when several match), or 0"""
+    candidates = [
+        line for line in lines
+        if (section_id and line['section_no_id'] == section_id)
+        or (section_no and line['section_no__section_no'] == section_no.strip())
+    ]
+    if cut_length and len(candidates) > 1:
+        candidates = [line for line in candidates if line['cut_length'] == cut_length] or candidates
+    return candidates[0]['id'] if candidates else 0
+
+
+def plan_target(plan, lines_by_requisition, die_ids):
+    """(requisition_id, order_line_key, die_id) of a ProductionPlan values() row"""
+    requisition_id = plan['die_requisition__customer_requisition_no_id'] or plan['cust_requisition_id']
+    die_id = plan['die_requisition__die_no_id'] or die_ids.get((plan['die_no'] or '').strip())
+    line_key = match_line(
+        lines_by_requisition.get(requisition_id, ()),
+        section_id=plan['die_requisition__section_no_id'],
+        section_no=plan['section_no'],
+        cut_length=plan['die_requisition__cut_length'] or plan['cut_length'],
+    )
+    return requisition_id, line_key, die_id
+
+
+class DiePlanIndex:
+    """
+    die_id -> production plans of that die ordered by first production day.
+    A reading belongs to the latest plan of its die starting on or before the
+    reading's day.
+
+    Saves in this process invalidate the tables (order_management.signals);
+    saves in other processes are noticed through the ResourceVersion of the
+    source models, checked every VERSION_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans = None
+        self._dies_by_requisition = None
+        self._loaded_at = 0.0
+        self._versions = None
+        self._checked_at = 0.0
+
+    def _stale(self):
+        now = time.monotonic()
+        if now - self._loaded_at > PLAN_TTL:
+            return True
+        if now - self._checked_at < VERSION_CHECK_SECONDS:
+            return False
+        self._checked_at = now
+        return current_versions(*PLAN_SOURCES) != self._versions
+
+    def _load(self):
+        self._versions = current_versions(*PLAN_SOURCES)
+        die_ids = dict(Die.objects.values_list('die_no', 'id'))
+        lines = _lines_by_requisition()
+        plans, dies_by_requisition = defaultdict(list), defaultdict(set)
+        for plan in ProductionPlan.objects.values(*PLAN_FIELDS).order_by():
+            requisition_id, line_key, die_id = plan_target(plan, lines, die_ids)
+            start = plan['date_of_production'] or plan['date']
+            if requisition_id is None or die_id is None or start is None:
+                continue
+            plans[die_id].append((start, plan['id'], requisition_id, line_key))
+            dies_by_requisition[requisition_id].add(die_id)
+        for entries in plans.values():
+            entries.sort()
+        self._plans, self._dies_by_requisition = plans, dies_by_requisition
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _tables(self):
+        with self._lock:
+            if self._plans is None or self._stale():
+                self._load()
+            return self._plans, self._dies_by_requisition
+
+    def resolve(self, die_id, day):
+        """(requisition_id, order_line_key) the die works for on `day`, or None"""
+        entries = self._tables()[0].get(die_id)
+        if not entries:
+            return None
+        i = bisect.bisect_right(entries, (day, float('inf')))
+        if not i:
+            return None
+        _, _, requisition_id, line_key = entries[i - 1]
+        return requisition_id, line_key
+
+    def requisitions_for_dies(self, die_ids):
+        plans = self._tables()[0]
+        return {entry[2] for die_id in die_ids for entry in plans.get(die_id, ())}
+
+    def dies_for_requisitions(self, requisition_ids):
+        dies_by_requisition = self._tables()[1]
+        return set().union(*(dies_by_requisition.get(rid, ()) for rid in requisition_ids))
+
+    def invalidate(self, *args, **kwargs):
+        with self._lock:
+            self._plans = None
+            self._dies_by_requisition = None
+
+
+die_plans = DiePlanIndex()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing OrderProgress rows
+# ─────────────────────────────────────────────────────────────────────────────
+def _row(requisition_id, line_key):
+    return OrderProgress.objects.filter(requisition_id=requisition_id, order_line_key=line_key)
+
+
+def _upsert(requisition_id, line_key, increments=None, values=None, create_values=None):
+    """Apply F() increments and plain `values` to a progress row, creating it on first use"""
+    increments = increments or {}
+    updates = {field: F(field) + amount for field, amount in increments.items()}
+    updates.update(values or {})
+    if _row(requisition_id, line_key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            OrderProgress.objects.create(
+                requisition_id=requisition_id, order_line_id=line_key or None, order_line_key=line_key,
+                **increments, **(create_values if create_values is not None else values or {})
+            )
+    except IntegrityError:
+        # Created concurrently - or the requisition / line is gone, then this updates nothing
+        _row(requisition_id, line_key).update(**updates)
+
+
+def add_reading(die_id, reading_time, length, count=1):
+    """Count `count` readings of a die into the order line it is planned for"""
+    target = die_plans.resolve(die_id, timezone.localtime(reading_time).date())
+    if target is None:
+        return
+    requisition_id, line_key = target
+    increments = {'reading_count': count, 'produced_length': Decimal(str(length))}
+    latest = Greatest(Coalesce('last_reading_at', Value(reading_time)), Value(reading_time))
+    for key in {0, line_key}:
+        _upsert(requisition_id, key, increments, {'last_reading_at': latest}, {'last_reading_at': reading_time})
+
+
+def refresh_requisition(requisition_id):
+    """Recompute the document columns of a requisition and its order lines"""
+    if requisition_id is None or not Requisition.objects.filter(id=requisition_id).exists():
+        return
+    lines = _lines_by_requisition([requisition_id])
+    die_ids = dict(Die.objects.values_list('die_no', 'id'))
+    progress = {0: _empty_progress()}
+    for line in lines[requisition_id]:
+        progress[line['id']] = _empty_progress()
+
+    def add(line_key, **amounts):
+        for key in {0, line_key}:
+            for field, amount in amounts.items():
+                progress[key][field] += amount or 0
+
+    for line in lines[requisition_id]:
+        add(line['id'], ordered_qty=line['qty_in_no'])
+
+    plans = ProductionPlan.objects.filter(
+        Q(cust_requisition_id=requisition_id) | Q(die_requisition__customer_requisition_no_id=requisition_id)
+    ).values(*PLAN_FIELDS, 'planned_qty', 'no_of_billet')
+    for plan in plans:
+        plan_requisition_id, line_key, _ = plan_target(plan, lines, die_ids)
+        if plan_requisition_id == requisition_id:
+            add(line_key, planned_qty=plan['planned_qty'], planned_billets=plan['no_of_billet'])
+
+    reports = OnlineProductionReport.objects.filter(
+        die_requisition__customer_requisition_no_id=requisition_id
+    ).values(
+        'die_requisition__section_no_id', 'die_requisition__cut_length', 'section_no', 'cut_length',
+        'no_of_pieces', 'input_qty', 'total_output',
+    )
+    for report in reports:
+        line_key = match_line(
+            lines[requisition_id],
+            section_id=report['die_requisition__section_no_id'],
+            section_no=report['section_no'],
+            cut_length=report['die_requisition__cut_length'] or report['cut_length'],
+        )
+        add(line_key, report_count=1, produced_pieces=report['no_of_pieces'],
+            input_qty=report['input_qty'], total_output=report['total_output'])
+
+    for line_key, values in progress.items():
+        _upsert(requisition_id, line_key, values=values)
+    OrderProgress.objects.filter(requisition_id=requisition_id).exclude(order_line_key__in=list(progress)).delete()
+
+
+def _archived_groups(die_ids=None):
+    """Archived readings grouped like rebuild_readings' query: per die and local day"""
+    groups = {}
+    for reading in archive.archived_readings(die_ids=die_ids):
+        if reading.die_id is None:
+            continue
+        key = (reading.die_id, timezone.localdate(reading.datetime))
+        group = groups.setdefault(key, {'die_id': key[0], 'day': key[1], 'count': 0, 'length': 0, 'latest': None})
+        group['count'] += 1
+        group['length'] += reading.length
+        if group['latest'] is None or reading.datetime > group['latest']:
+            group['latest'] = reading.datetime
+    return groups.values()
+
+
+def rebuild_readings(requisition_ids=None, chunk_size=5000):
+    """
+    Recompute the reading columns from Raw_data and the reading archive, for
+    the given requisitions (every requisition when None), over all dies
+    planned for them.
+    """
+    readings = Raw_data.objects.filter(die__isnull=False)
+    die_ids = None
+    if requisition_ids is not None:
+        requisition_ids = set(requisition_ids)
+        if not requisition_ids:
+            return
+        die_ids = die_plans.dies_for_requisitions(requisition_ids)
+        readings = readings.filter(die_id__in=die_ids)
+
+    totals = defaultdict(_empty_readings)
+    groups = (
+        readings.annotate(day=TruncDate('datetime'))
+        .values('die_id', 'day')
+        .annotate(count=Count('id'), length=Sum('length'), latest=Max('datetime'))
+        .order_by()
+    )
+    for group in chain(groups.iterator(chunk_size=chunk_size), _archived_groups(die_ids)):
+        target = die_plans.resolve(group['die_id'], group['day'])
+        if target is None or (requisition_ids is not None and target[0] not in requisition_ids):
+            continue
+        requisition_id, line_key = target
+        for key in {0, line_key}:
+            row = totals[(requisition_id, key)]
+            row['reading_count'] += group['count']
+            row['produced_length'] += group['length'] or 0
+            if row['last_reading_at'] is None or group['latest'] > row['last_reading_at']:
+                row['last_reading_at'] = group['latest']
+
+    rows = OrderProgress.objects.all()
+    if requisition_ids is not None:
+        rows = rows.filter(requisition_id__in=requisition_ids)
+    with transaction.atomic():
+        rows.update(**_empty_readings())
+        for (requisition_id, line_key), values in totals.items():
+            _upsert(requisition_id, line_key, values=values)
+
+
+def refresh(requisition_ids=(), die_ids=(), readings=True):
+    """
+    Bring the progress of the given requisitions, and of every requisition
+    planned on the given dies, up to date after a document change.
+    """
+    die_plans.invalidate()
+    requisition_ids = {rid for rid in requisition_ids if rid} | die_plans.requisitions_for_dies(
+        {die_id for die_id in die_ids if die_id}
+    )
+    for requisition_id in requisition_ids:
+        refresh_requisition(requisition_id)
+    if readings:
+        rebuild_readings(requisition_ids)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────────────────────────────────────
+def as_dict(progress):
+    return {
+        'order_line': progress.order_line_id,
+        'ordered_qty': progress.ordered_qty,
+        'planned_qty': progress.planned_qty,
+        'planned_billets': progress.planned_billets,
+        'reports': progress.report_count,
+        'produced_pieces': progress.produced_pieces,
+        'input_qty': float(progress.input_qty),
+        'total_output': float(progress.total_output),
+        'recovery': progress.recovery,
+        'completion': progress.completion,
+        'readings': progress.reading_count,
+        'produced_length': float(progress.produced_length),
+        'last_reading_at': progress.last_reading_at,
+    }
+
+
+def totals_for(requisition_ids):
+    """requisition_id -> requisition total OrderProgress, in one indexed query"""
+    rows = OrderProgress.objects.filter(requisition_id__in=list(requisition_ids), order_line_key=0)
+    return {row.requisition_id: row for row in rows}
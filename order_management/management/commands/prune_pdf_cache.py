@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from order_management.printing import prune_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove cached requisition / work order PDFs not printed for --older-than-days (see "
+        "order_management.printing). Run periodically, e.g. daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=settings.PDF_CACHE_MAX_AGE_DAYS)
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0:
+            raise CommandError("--older-than-days must not be negative")
+        removed = prune_cache(options['older_than_days'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached PDFs from {settings.PDF_CACHE_DIR}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from order_management import lineage
+from order_management.models import Requisition
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild order_progress from requisitions, plans, production reports and "
+        "raw_machine_data. Run after bulk imports or backfilling readings; document "
+        "saves and ingest keep the progress up to date otherwise."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        lineage.die_plans.invalidate()
+        requisition_ids = list(Requisition.objects.values_list('id', flat=True))
+        for requisition_id in requisition_ids:
+            lineage.refresh_requisition(requisition_id)
+        lineage.rebuild_readings(chunk_size=options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Order progress rebuilt for {len(requisition_ids)} requisitions"))
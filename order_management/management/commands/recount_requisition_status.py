@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from order_management import workflow
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute requisition_status_count from the requisition table. Only needed after "
+        "bulk imports or raw SQL; requisition saves keep the counters up to date otherwise."
+    )
+
+    def handle(self, *args, **options):
+        counts = workflow.recount()
+        summary = ', '.join(f"{status} {n}" for status, n in sorted(counts.items())) or 'no requisitions'
+        self.stdout.write(self.style.SUCCESS(f"Requisition status counts: {summary}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+        ('order_management', '0004_requisition_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requisition',
+            index=models.Index(fields=['created_at', 'id'], name='requisition_created_id_idx'),
+        ),
+    ]
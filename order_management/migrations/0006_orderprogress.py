@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order_management', '0005_list_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_line_key', models.PositiveBigIntegerField(default=0, verbose_name='Order Line Key')),
+                ('ordered_qty', models.PositiveIntegerField(default=0, verbose_name='Ordered QTY')),
+                ('planned_qty', models.PositiveIntegerField(default=0, verbose_name='Planned QTY')),
+                ('planned_billets', models.PositiveIntegerField(default=0, verbose_name='Planned Billets')),
+                ('report_count', models.PositiveIntegerField(default=0, verbose_name='Reports')),
+                ('produced_pieces', models.PositiveIntegerField(default=0, verbose_name='Produced Pieces')),
+                ('input_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Input')),
+                ('total_output', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total Output')),
+                ('reading_count', models.PositiveIntegerField(default=0, verbose_name='Readings')),
+                ('produced_length', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Produced Length')),
+                ('last_reading_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Reading')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order_line', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='order_management.requisitionorder', verbose_name='Order Line')),
+                ('requisition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='order_management.requisition', verbose_name='Requisition')),
+            ],
+            options={
+                'verbose_name': 'Order Progress',
+                'verbose_name_plural': 'Order Progress',
+                'db_table': 'order_progress',
+                'ordering': ['requisition', 'order_line_key'],
+                'constraints': [models.UniqueConstraint(fields=('requisition', 'order_line_key'), name='uniq_order_progress_line')],
+            },
+        ),
+    ]
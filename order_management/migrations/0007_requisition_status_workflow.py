@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_statuses(apps, schema_editor):
+    Requisition = apps.get_model('order_management', 'Requisition')
+    RequisitionStatusCount = apps.get_model('order_management', 'RequisitionStatusCount')
+    RequisitionStatusCount.objects.bulk_create([
+        RequisitionStatusCount(status=status, count=n)
+        for status, n in Requisition.objects.order_by().values_list('status').annotate(n=Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+        ('order_management', '0006_orderprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequisitionStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('created', 'Created'), ('in_planning', 'In Planning'), ('in_production', 'In Production'), ('completed', 'Completed'), ('rejected', 'Rejected')], max_length=20, unique=True, verbose_name='Status')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+            ],
+            options={
+                'verbose_name': 'Requisition Status Count',
+                'verbose_name_plural': 'Requisition Status Counts',
+                'db_table': 'requisition_status_count',
+            },
+        ),
+        migrations.CreateModel(
+            name='RequisitionStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('created', 'Created'), ('in_planning', 'In Planning'), ('in_production', 'In Production'), ('completed', 'Completed'), ('rejected', 'Rejected')], max_length=20, verbose_name='From Status')),
+                ('to_status', models.CharField(choices=[('created', 'Created'), ('in_planning', 'In Planning'), ('in_production', 'In Production'), ('completed', 'Completed'), ('rejected', 'Rejected')], max_length=20, verbose_name='To Status')),
+                ('source', models.CharField(choices=[('manual', 'Manual'), ('die_requisition', 'Die Requisition'), ('production_plan', 'Production Plan'), ('production_report', 'Production Report')], default='manual', max_length=20, verbose_name='Source')),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Requisition Status History',
+                'verbose_name_plural': 'Requisition Status History',
+                'db_table': 'requisition_status_history',
+                'ordering': ['requisition', 'changed_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='requisition',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='requisition_status_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='requisitionstatushistory',
+            name='requisition',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='order_management.requisition', verbose_name='Requisition'),
+        ),
+        migrations.RunPython(count_statuses, migrations.RunPython.noop),
+    ]
@@ -81,7 +81,9 @@ class Requisition(models.Model):
     def save(self, *args, **kwargs):
         if not self.requisition_id:
             self.requisition_id = Requisition.generate_requisition_id()
-        super().save(*args, **kwargs)
+        # Atomic so the status counters / history written by order_management.signals commit with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.requisition_id} - {self.requisition_no}"
@@ -89,9 +91,80 @@ class Requisition(models.Model):
     class Meta:
         db_table = 'requisition'
         ordering = ['-created_at']
+        # Keyset pagination of the list views seeks on (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='requisition_created_id_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='requisition_status_created_idx'),
+        ]
         verbose_name = "Customer Requisition"
         verbose_name_plural = "Customer Requisitions"
 
+
+
+#─────────────────────────────────────────────────────────────────────────────
+# Models for Requisition status counters and history (see order_management.workflow)
+#─────────────────────────────────────────────────────────────────────────────
+class RequisitionStatusCount(models.Model):
+    """Number of requisitions per status, kept in step with every status change"""
+    status = models.CharField(
+        max_length=20,
+        choices=Requisition.STATUS_CHOICES,
+        unique=True,
+        verbose_name="Status"
+    )
+    count = models.IntegerField(default=0, verbose_name="Count")
+
+    class Meta:
+        db_table = 'requisition_status_count'
+        verbose_name = "Requisition Status Count"
+        verbose_name_plural = "Requisition Status Counts"
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class RequisitionStatusHistory(models.Model):
+    SOURCE_CHOICES = [
+        ('manual', 'Manual'),
+        ('die_requisition', 'Die Requisition'),
+        ('production_plan', 'Production Plan'),
+        ('production_report', 'Production Report'),
+    ]
+
+    requisition = models.ForeignKey(
+        Requisition,
+        on_delete=models.CASCADE,
+        related_name='status_history',
+        verbose_name="Requisition"
+    )
+    from_status = models.CharField(
+        max_length=20,
+        choices=Requisition.STATUS_CHOICES,
+        blank=True,
+        verbose_name="From Status"
+    )
+    to_status = models.CharField(
+        max_length=20,
+        choices=Requisition.STATUS_CHOICES,
+        verbose_name="To Status"
+    )
+    source = models.CharField(
+        max_length=20,
+        choices=SOURCE_CHOICES,
+        default='manual',
+        verbose_name="Source"
+    )
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'requisition_status_history'
+        ordering = ['requisition', 'changed_at', 'id']
+        verbose_name = "Requisition Status History"
+        verbose_name_plural = "Requisition Status History"
+
+    def __str__(self):
+        return f"{self.requisition_id}: {self.from_status or '-'} -> {self.to_status}"
+
     
 #─────────────────────────────────────────────────────────────────────────────
 # Model for Requisition's Order functionality
@@ -268,3 +341,65 @@ class Finance(models.Model):
 
         self.total_amount = self.amount + self.tax_amount
         super().save(*args, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Model for Order progress lineage (maintained by order_management.lineage)
+# ─────────────────────────────────────────────────────────────────────────────
+class OrderProgress(models.Model):
+    """Progress of a requisition (order_line_key 0) and of each of its order lines"""
+
+    requisition = models.ForeignKey(
+        Requisition,
+        on_delete=models.CASCADE,
+        related_name='progress',
+        verbose_name="Requisition"
+    )
+    order_line = models.ForeignKey(
+        RequisitionOrder,
+        on_delete=models.CASCADE,
+        related_name='progress',
+        verbose_name="Order Line",
+        null=True,
+        blank=True
+    )
+    # order_line_id, or 0 for the requisition total (a NULL would not be unique)
+    order_line_key = models.PositiveBigIntegerField(default=0, verbose_name="Order Line Key")
+
+    # ============ From the order / planning documents ============
+    ordered_qty = models.PositiveIntegerField(default=0, verbose_name="Ordered QTY")
+    planned_qty = models.PositiveIntegerField(default=0, verbose_name="Planned QTY")
+    planned_billets = models.PositiveIntegerField(default=0, verbose_name="Planned Billets")
+    report_count = models.PositiveIntegerField(default=0, verbose_name="Reports")
+    produced_pieces = models.PositiveIntegerField(default=0, verbose_name="Produced Pieces")
+    input_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Input")
+    total_output = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total Output")
+
+    # ============ From Raw_data readings of the planned dies ============
+    reading_count = models.PositiveIntegerField(default=0, verbose_name="Readings")
+    produced_length = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Produced Length")
+    last_reading_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Reading")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'order_progress'
+        ordering = ['requisition', 'order_line_key']
+        constraints = [
+            models.UniqueConstraint(fields=['requisition', 'order_line_key'], name='uniq_order_progress_line'),
+        ]
+        verbose_name = "Order Progress"
+        verbose_name_plural = "Order Progress"
+
+    @property
+    def recovery(self):
+        if self.input_qty:
+            return round(float(self.total_output) / float(self.input_qty) * 100, 2)
+        return None
+
+    @property
+    def completion(self):
+        """Produced pieces as a percentage of the ordered quantity"""
+        if self.ordered_qty:
+            return round(self.produced_pieces / self.ordered_qty * 100, 2)
+        return None
@@ -0,0 +1,27 @@
+"""
+HTML -> PDF in a worker process (order_management.printing).
+
+Kept free of Django imports so spawned pool workers start without setting
+Django up. Static assets (/static/... in the templates) are read from the
+given directories instead of over HTTP.
+"""
+import os
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+
+def render_pdf(html, static_url, static_dirs):
+    """PDF bytes of an HTML document"""
+    from weasyprint import HTML, default_url_fetcher
+
+    def fetch(url, *args, **kwargs):
+        path = unquote(urlparse(url).path)
+        if path.startswith(static_url):
+            relative = path[len(static_url):]
+            for directory in static_dirs:
+                candidate = os.path.join(directory, relative)
+                if os.path.isfile(candidate):
+                    return default_url_fetcher(Path(candidate).as_uri(), *args, **kwargs)
+        return default_url_fetcher(url, *args, **kwargs)
+
+    return HTML(string=html, base_url='file:///', url_fetcher=fetch).write_pdf()
@@ -0,0 +1,193 @@
+"""
+Server-side PDF printing of requisitions and work orders.
+
+Each document (a requisition with its order lines, or a work order) is
+rendered to HTML with its print template, hashed, and converted to PDF only
+once: the file is kept under PDF_CACHE_DIR as <sha256 of the HTML>.pdf. An
+edit to the document, its lines or its customer changes the HTML and so the
+hash, so a stale PDF is never served. Files are never removed while
+printing, as another request may be streaming them; each use touches the
+file, and `prune_pdf_cache` removes those unused for PDF_CACHE_MAX_AGE_DAYS.
+
+Documents without a cached PDF are converted in a process pool of
+PDF_RENDER_WORKERS, side by side. A bulk print is then stitched into one PDF
+in a spooled temporary file, which the view streams back.
+
+weasyprint (rendering) and pypdf (stitching) are optional and only needed
+here (pip install weasyprint pypdf).
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from Aluminium_Extrusions.pools import get_pool, reset_pool
+from .models import Requisition, WorkOrder
+from .pdf_render import render_pdf
+
+REQUISITION_TEMPLATE = "Order_Management/Print_Requisition/print_requisition.html"
+WORK_ORDER_TEMPLATE = "Order_Management/Print_Work_Order/print_work_order.html"
+SPOOL_MAX_BYTES = 8 * 1024 * 1024  # larger stitched PDFs spill to disk while streaming
+
+
+def _require_pdf():
+    try:
+        import weasyprint  # noqa: F401
+        import pypdf
+    except (ImportError, OSError) as e:
+        # weasyprint raises OSError when its system libraries (Pango) are missing
+        raise ImportError(f"PDF printing requires weasyprint and pypdf (pip install weasyprint pypdf): {e}")
+    return pypdf
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Documents
+# ─────────────────────────────────────────────────────────────────────────────
+def requisition_print_rows(requisitions):
+    """One row per order line, as the bulk requisition print lays them out"""
+    rows = []
+    for req in requisitions:
+        for order in req.orders.all():
+            rows.append({
+                'requisition_no': req.requisition_no,
+                'customer': req.customer.name if hasattr(req.customer, 'name') else str(req.customer),
+                'section_no': order.section_no.section_no if hasattr(order.section_no, 'section_no') else str(order.section_no),
+                'wt_range': order.wt_range,
+                'cut_length': order.cut_length,
+                'qty': order.qty_in_no,
+                'address': req.address if hasattr(req, 'address') else '',
+                'dispatch_date': req.dispatch_date if hasattr(req, 'dispatch_date') else None,
+                'expiry_date': req.expiry_date if hasattr(req, 'expiry_date') else None,
+                'delivery_address': req.delivery_address if hasattr(req, 'delivery_address') else '',
+            })
+    return rows
+
+
+def requisition_documents(ids):
+    """(kind, pk, html) of each requisition, in id order"""
+    requisitions = Requisition.objects.filter(id__in=ids).select_related('customer').prefetch_related(
+        'orders__section_no'
+    ).order_by('id')
+    return [
+        ('requisition', req.id, render_to_string(REQUISITION_TEMPLATE, {
+            'requisitions': requisition_print_rows([req]),
+            'requisition': None,
+            'is_bulk': True,
+        }))
+        for req in requisitions
+    ]
+
+
+def work_order_documents(ids):
+    """(kind, pk, html) of each work order, in id order"""
+    return [
+        ('work_order', work_order.id, render_to_string(WORK_ORDER_TEMPLATE, {
+            'workorders': [work_order],
+            'workorder': work_order,
+        }))
+        for work_order in WorkOrder.objects.filter(id__in=ids).select_related('customer').order_by('id')
+    ]
+
+
+DOCUMENTS = {
+    'requisition': requisition_documents,
+    'work_order': work_order_documents,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rendering and stitching
+# ─────────────────────────────────────────────────────────────────────────────
+def _static_dirs():
+    dirs = [str(directory) for directory in getattr(settings, 'STATICFILES_DIRS', [])]
+    if getattr(settings, 'STATIC_ROOT', None):
+        dirs.append(str(settings.STATIC_ROOT))
+    return dirs
+
+
+def _write(path, content):
+    # Via a temporary name, so a concurrent print never reads half a file
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def pdf_paths(documents):
+    """Cached PDF file of each document, converting the missing ones in the worker pool"""
+    directory = settings.PDF_CACHE_DIR
+    os.makedirs(directory, exist_ok=True)
+    paths, missing = [], {}
+    for kind, pk, html in documents:
+        digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        path = os.path.join(directory, f'{digest}.pdf')
+        try:
+            os.utime(path)  # in use: keep it from prune_cache
+        except FileNotFoundError:
+            missing[path] = html
+        paths.append(path)
+
+    if missing:
+        static_url, static_dirs = settings.STATIC_URL, _static_dirs()
+        try:
+            pool = get_pool('pdf', settings.PDF_RENDER_WORKERS)
+            futures = {
+                path: pool.submit(render_pdf, html, static_url, static_dirs)
+                for path, html in missing.items()
+            }
+            for path, future in futures.items():
+                _write(path, future.result())
+        except BrokenProcessPool:
+            reset_pool('pdf')
+            raise
+    return paths
+
+
+def prune_cache(max_age_days=None, directory=None):
+    """Remove cached PDFs (and leftover temporary files) unused for max_age_days. Returns how many"""
+    directory = directory or settings.PDF_CACHE_DIR
+    max_age_days = settings.PDF_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(('.pdf', '.tmp')):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def stitch(paths):
+    """One PDF of the given files, as an open file positioned at the start"""
+    pypdf = _require_pdf()
+    if len(paths) == 1:
+        return open(paths[0], 'rb')
+    writer = pypdf.PdfWriter()
+    for path in paths:
+        writer.append(path)
+    stream = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    writer.write(stream)
+    stream.seek(0)
+    return stream
+
+
+def print_pdf(kind, ids):
+    """Open PDF file of the documents of `kind` with these ids, or None if none exist"""
+    _require_pdf()
+    documents = DOCUMENTS[kind](ids)
+    if not documents:
+        return None
+    return stitch(pdf_paths(documents))
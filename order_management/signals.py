@@ -0,0 +1,125 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_save, pre_delete
+
+from master.models import Die
+from planning.models import DieRequisition, ProductionPlan
+from production.models import OnlineProductionReport
+from . import lineage, workflow
+from .models import Requisition, RequisitionOrder
+
+# Fields that decide which requisition / order line / die a document counts for
+LINK_FIELDS = {
+    RequisitionOrder: ('requisition_id', 'section_no_id', 'cut_length'),
+    DieRequisition: ('customer_requisition_no_id', 'section_no_id', 'die_no_id', 'cut_length'),
+    ProductionPlan: (
+        'cust_requisition_id_id', 'die_requisition_id', 'die_no', 'section_no', 'cut_length',
+        'date', 'date_of_production',
+    ),
+    OnlineProductionReport: ('die_requisition_id', 'section_no', 'cut_length'),
+}
+
+# Status transition source recorded for documents that advance a requisition
+STATUS_SOURCES = {
+    DieRequisition: 'die_requisition',
+    ProductionPlan: 'production_plan',
+    OnlineProductionReport: 'production_report',
+}
+
+
+def _link(instance):
+    return {field: getattr(instance, field) for field in LINK_FIELDS[type(instance)]}
+
+
+def _targets(model, link):
+    """(requisition ids, die ids) a document with these link fields counts for"""
+    if not link:
+        return set(), set()
+    if model is RequisitionOrder:
+        return {link['requisition_id']}, set()
+    if model is DieRequisition:
+        return {link['customer_requisition_no_id']}, {link['die_no_id']}
+
+    requisitions, dies = set(), set()
+    if link['die_requisition_id']:
+        die_requisition = DieRequisition.objects.filter(id=link['die_requisition_id']).values(
+            'customer_requisition_no_id', 'die_no_id'
+        ).first()
+        if die_requisition:
+            requisitions.add(die_requisition['customer_requisition_no_id'])
+            dies.add(die_requisition['die_no_id'])
+    if model is ProductionPlan:
+        requisitions.add(link['cust_requisition_id_id'])
+        if link['die_no']:
+            dies.update(Die.objects.filter(die_no=link['die_no'].strip()).values_list('id', flat=True))
+    return requisitions, dies
+
+
+def remember_link(sender, instance, **kwargs):
+    """Keep the links a document was loaded with, so an edit that moves it refreshes both sides"""
+    if not instance.pk or instance.get_deferred_fields().intersection(LINK_FIELDS[sender]):
+        instance._lineage_link = None
+        return
+    instance._lineage_link = _link(instance)
+
+
+def document_saved(sender, instance, **kwargs):
+    old_link, new_link = getattr(instance, '_lineage_link', None), _link(instance)
+    old_requisitions, old_dies = _targets(sender, old_link)
+    new_requisitions, new_dies = _targets(sender, new_link)
+    transaction.on_commit(partial(
+        lineage.refresh,
+        old_requisitions | new_requisitions,
+        old_dies | new_dies,
+        # Reports carry no die assignment; other edits only move readings when a link changed
+        readings=sender is not OnlineProductionReport and old_link != new_link,
+    ))
+    if sender in STATUS_SOURCES:
+        # Registered after the lineage refresh, so completion sees the updated piece counts
+        transaction.on_commit(partial(workflow.advance_all, new_requisitions, STATUS_SOURCES[sender]))
+    instance._lineage_link = new_link
+
+
+def document_deleted(sender, instance, **kwargs):
+    requisitions, dies = _targets(sender, _link(instance))
+    # After commit: a cascading delete of the requisition itself must not recreate its rows
+    transaction.on_commit(partial(lineage.refresh, requisitions, dies, readings=sender is not OnlineProductionReport))
+
+
+def requisition_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(lineage.refresh_requisition, instance.pk))
+
+
+def lock_old_status(sender, instance, raw=False, **kwargs):
+    """Read (and lock) the status the row has before this save / delete - instances can be stale"""
+    instance._old_status = None
+    if instance.pk and not raw:
+        instance._old_status = (
+            Requisition.objects.select_for_update().filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+def requisition_status_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Runs inside Requisition.save's transaction"""
+    if raw or (update_fields is not None and 'status' not in update_fields):
+        return
+    workflow.record_change(instance, getattr(instance, '_old_status', None), getattr(instance, '_status_source', 'manual'))
+    instance._status_source = 'manual'
+
+
+def requisition_deleted(sender, instance, **kwargs):
+    workflow.adjust_count(getattr(instance, '_old_status', None) or instance.status, -1)
+
+
+for model in LINK_FIELDS:
+    name = model.__name__
+    post_init.connect(remember_link, sender=model, dispatch_uid=f"order_lineage_{name}_init")
+    post_save.connect(document_saved, sender=model, dispatch_uid=f"order_lineage_{name}_save")
+    post_delete.connect(document_deleted, sender=model, dispatch_uid=f"order_lineage_{name}_delete")
+post_save.connect(requisition_saved, sender=Requisition, dispatch_uid="order_lineage_requisition_save")
+pre_save.connect(lock_old_status, sender=Requisition, dispatch_uid="order_status_requisition_pre_save")
+post_save.connect(requisition_status_saved, sender=Requisition, dispatch_uid="order_status_requisition_save")
+pre_delete.connect(lock_old_status, sender=Requisition, dispatch_uid="order_status_requisition_pre_delete")
+post_delete.connect(requisition_deleted, sender=Requisition, dispatch_uid="order_status_requisition_delete")
@@ -1,3 +1,240 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import tempfile
+import time as time_module
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from master.versioning import bump_versions
+from planning.models import DieRequisition, ProductionPlan
+from production.models import OnlineProductionReport
+from raw_data.ingest import store_reading
+from raw_data.lookups import master_lookup
+from . import lineage, printing, workflow
+from .models import OrderProgress, Requisition, RequisitionStatusHistory
+
+
+def _at(day, hour=10):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+class LineageAttributionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+
+    def setUp(self):
+        master_lookup.invalidate()
+        lineage.die_plans.invalidate()
+        today = timezone.localdate()
+        self.plan = (
+            ProductionPlan.objects.filter(date_of_production__lte=today)
+            .select_related('die_requisition', 'press').order_by('id').first()
+        )
+        self.die = self.plan.die_requisition.die_no
+        self.start = self.plan.date_of_production
+
+    def progress(self, requisition_id):
+        return OrderProgress.objects.filter(requisition_id=requisition_id).values_list(
+            'order_line_key', 'reading_count', 'produced_length', 'last_reading_at',
+        ).order_by('order_line_key')
+
+    def another_plan(self, start):
+        """A second plan of the same die, for another requisition, starting on `start`"""
+        requisition = Requisition.objects.exclude(id=self.plan.cust_requisition_id_id).order_by('id').first()
+        plan = ProductionPlan.objects.get(id=self.plan.id)
+        plan.pk = None
+        plan.production_plan_id = 'TEST00001'
+        plan.cust_requisition_id = requisition
+        plan.die_requisition = None
+        plan.date_of_production = start
+        plan.save()
+        return plan, requisition
+
+    def test_reading_counts_for_the_plan_of_its_day(self):
+        requisition_id = self.plan.cust_requisition_id_id
+        self.assertEqual(lineage.die_plans.resolve(self.die.id, self.start)[0], requisition_id)
+        self.assertIsNone(lineage.die_plans.resolve(self.die.id, self.start - timedelta(days=1)))
+
+        before = dict((key, count) for key, count, _, _ in self.progress(requisition_id))
+        store_reading(self.plan.press.sensor, _at(self.start), 1.12, self.die.die_no, 37.3)
+        after = dict((key, count) for key, count, _, _ in self.progress(requisition_id))
+        self.assertEqual(after[0], before.get(0, 0) + 1)
+
+    def test_ingest_matches_a_rebuild(self):
+        for day in (self.start - timedelta(days=1), self.start):
+            store_reading(self.plan.press.sensor, _at(day), 1.12, self.die.die_no, 37.3)
+        incremental = list(OrderProgress.objects.values_list(
+            'requisition_id', 'order_line_key', 'reading_count', 'produced_length', 'last_reading_at',
+        ).order_by('requisition_id', 'order_line_key'))
+
+        call_command('rebuild_order_progress', stdout=io.StringIO())
+        rebuilt = list(OrderProgress.objects.values_list(
+            'requisition_id', 'order_line_key', 'reading_count', 'produced_length', 'last_reading_at',
+        ).order_by('requisition_id', 'order_line_key'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_later_plan_takes_the_readings_over(self):
+        later = self.start + timedelta(days=2)
+        _, requisition = self.another_plan(later)
+
+        self.assertEqual(lineage.die_plans.resolve(self.die.id, later - timedelta(days=1))[0],
+                         self.plan.cust_requisition_id_id)
+        self.assertEqual(lineage.die_plans.resolve(self.die.id, later)[0], requisition.id)
+
+    def test_plan_changed_by_another_process_is_picked_up(self):
+        requisition = Requisition.objects.exclude(id=self.plan.cust_requisition_id_id).order_by('id').first()
+        self.assertEqual(lineage.die_plans.resolve(self.die.id, self.start)[0], self.plan.cust_requisition_id_id)
+
+        with mock.patch.object(lineage, 'VERSION_CHECK_SECONDS', 0):
+            # update() sends no signals: this process' tables are not invalidated
+            ProductionPlan.objects.filter(id=self.plan.id).update(cust_requisition_id=requisition, die_requisition=None)
+            self.assertEqual(lineage.die_plans.resolve(self.die.id, self.start)[0], self.plan.cust_requisition_id_id)
+
+            # ... but the other process' save bumped the plan version
+            bump_versions(ProductionPlan)
+            self.assertEqual(lineage.die_plans.resolve(self.die.id, self.start)[0], requisition.id)
+
+
+def _copy(instance, **changes):
+    """Save a copy of a generated document with other links (post_save signals fire as for a form)"""
+    instance = type(instance).objects.get(pk=instance.pk)
+    instance.pk = None
+    for field, value in changes.items():
+        setattr(instance, field, value)
+    instance.save()
+    return instance
+
+
+class RequisitionStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+
+    def setUp(self):
+        self.plan = ProductionPlan.objects.select_related('die_requisition').order_by('id').first()
+        self.report = OnlineProductionReport.objects.order_by('id').first()
+        # A requisition without order lines or documents yet
+        with self.captureOnCommitCallbacks(execute=True):
+            self.requisition = _copy(
+                Requisition.objects.order_by('id').first(),
+                requisition_id='TEST00001', requisition_no='TEST-R1', status='created',
+            )
+
+    def raise_document(self, document, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            return _copy(document, **changes)
+
+    def die_requisition(self):
+        return self.raise_document(
+            self.plan.die_requisition, die_requisition_id='TEST00001', customer_requisition_no=self.requisition,
+        )
+
+    def status(self):
+        return Requisition.objects.values_list('status', flat=True).get(id=self.requisition.id)
+
+    def history(self):
+        return list(RequisitionStatusHistory.objects.filter(requisition=self.requisition).order_by('id').values_list(
+            'from_status', 'to_status', 'source',
+        ))
+
+    def assertCountsMatchTable(self):
+        counts = workflow.status_counts()
+        self.assertEqual({status: n for status, n in counts.items() if n}, workflow.recount())
+
+    def test_documents_move_the_requisition_forward(self):
+        self.raise_document(self.plan, production_plan_id='TEST00001', cust_requisition_id=self.requisition,
+                            die_requisition=None)
+        self.assertEqual(self.status(), 'in_planning')
+
+        die_requisition = self.die_requisition()
+        self.raise_document(self.report, production_id='TEST000001', die_requisition=die_requisition,
+                            status='in_progress')
+        self.assertEqual(self.status(), 'in_production')
+
+        self.raise_document(self.report, production_id='TEST000002', die_requisition=die_requisition,
+                            status='completed')
+        # One report is still in progress
+        self.assertEqual(self.status(), 'in_production')
+
+        self.assertEqual(self.history(), [
+            ('', 'created', 'manual'),
+            ('created', 'in_planning', 'production_plan'),
+            ('in_planning', 'in_production', 'production_report'),
+        ])
+        self.assertCountsMatchTable()
+
+    def test_all_reports_completed_completes_the_requisition(self):
+        die_requisition = self.die_requisition()
+        self.raise_document(self.report, production_id='TEST000001', die_requisition=die_requisition,
+                            status='completed')
+        self.assertEqual(self.status(), 'completed')
+        self.assertEqual(self.history()[-1], ('in_planning', 'completed', 'production_report'))
+
+        # Completed is terminal for automatic transitions
+        self.raise_document(self.report, production_id='TEST000002', die_requisition=die_requisition,
+                            status='in_progress')
+        self.assertEqual(self.status(), 'completed')
+        self.assertCountsMatchTable()
+
+    def test_transitions_never_move_back(self):
+        self.requisition.status = 'in_production'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.requisition.save()
+        self.die_requisition()
+        self.assertEqual(self.status(), 'in_production')
+        self.assertEqual(workflow.advance(self.requisition.id, 'die_requisition'), None)
+
+    def test_manual_change_from_a_stale_instance_is_counted_once(self):
+        stale = Requisition.objects.get(id=self.requisition.id)
+        self.die_requisition()
+        self.assertEqual(self.status(), 'in_planning')
+
+        stale.status = 'rejected'
+        stale.save()
+        self.assertEqual(self.history()[-1], ('in_planning', 'rejected', 'manual'))
+        self.assertCountsMatchTable()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.requisition.delete()
+        self.assertCountsMatchTable()
+
+
+class PdfCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(PDF_CACHE_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def cached(self, html, age_days):
+        path = os.path.join(self.directory, f"{hashlib.sha256(html.encode()).hexdigest()}.pdf")
+        with open(path, 'wb') as f:
+            f.write(b'%PDF')
+        old = time_module.time() - age_days * 86400
+        os.utime(path, (old, old))
+        return path
+
+    def test_printing_never_removes_a_superseded_file(self):
+        superseded = self.cached('<p>v1</p>', 0)
+        current = self.cached('<p>v2</p>', 0)
+        # Another request may still be streaming v1 after the work order is edited
+        printing.pdf_paths([('work_order', 1, '<p>v1</p>')])
+        self.assertEqual(printing.pdf_paths([('work_order', 1, '<p>v2</p>')]), [current])
+        self.assertTrue(os.path.exists(superseded))
+
+    def test_prune_removes_only_files_unused_for_the_max_age(self):
+        unused = self.cached('<p>old</p>', 40)
+        printed = self.cached('<p>printed</p>', 40)
+        recent = self.cached('<p>new</p>', 1)
+        printing.pdf_paths([('work_order', 1, '<p>printed</p>')])
+
+        self.assertEqual(printing.prune_cache(30), 1)
+        self.assertEqual([os.path.exists(path) for path in (unused, printed, recent)], [False, True, True])
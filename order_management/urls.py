@@ -16,6 +16,7 @@ urlpatterns = [
     # API Endpoints
     path("api/requisitions/",RequisitionAPI.as_view(),name="requisition_api"),
     path("api/requisitions/<int:pk>/",RequisitionDetailAPI.as_view(),name="requisition_detail_api"),
+    path("api/requisitions/<int:pk>/progress/",RequisitionProgressAPI.as_view(),name="requisition_progress_api"),
     # Delete View
     path("requisitions/delete/<int:pk>/",RequisitionDeleteView.as_view(),name="requisition_delete"),
     # Print View (single)
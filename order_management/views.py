@@ -1,18 +1,24 @@
 # import necessary modules and decorators
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, QueryDict
+from django.http import QueryDict
+from Aluminium_Extrusions.pagination import KeysetPaginator
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
 from django.views import View
 from django.utils.dateparse import parse_date
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
+import logging
+from django.http import FileResponse
 from django.utils.timezone import now
-from django.core.paginator import Paginator
 from django.forms.models import model_to_dict
 
 from .models import *
 from .forms import *
+from .lineage import as_dict as progress_as_dict
+from . import printing, workflow
 
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 # ─────────────────────────────────────────────────────────────────────────────
@@ -34,24 +40,17 @@ class RequisitionListView(View):
                 'customer', 'sales_manager'
             ).all().order_by("-created_at")
         
-        # ---------------- Calculate Status Counts ----------------
-        from django.db.models import Count
-        
-        # Get all requisitions for counting (not paginated)
-        all_requisitions = Requisition.objects.all()
-        
-        status_counts = {
-            'created': all_requisitions.filter(status='created').count(),
-            'in_planning': all_requisitions.filter(status='in_planning').count(),
-            'in_production': all_requisitions.filter(status='in_production').count(),
-            'completed': all_requisitions.filter(status='completed').count(),
-            'rejected': all_requisitions.filter(status='rejected').count(),
-        }
+        # ---------------- Status Filter ----------------
+        status_filter = request.GET.get("status", "")
+        if status_filter:
+            requisitions = requisitions.filter(status=status_filter)
+
+        # ---------------- Status Counts (maintained by order_management.workflow) ----------------
+        status_counts = workflow.status_counts()
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(requisitions, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(requisitions, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -84,9 +83,12 @@ class RequisitionListView(View):
                     "status_counts": status_counts,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
+                    "status": status_filter,
                 }
             )
         
@@ -96,13 +98,13 @@ class RequisitionListView(View):
             "Order_Management/Customer_Requisition_List/customer_requisition_list.html",
             {
                 "page_obj": page_obj,
-                "page_range": page_range,
                 "current_page": page_obj.number,
                 "start_page": start_page,
                 "end_page": end_page,
                 "total_pages": paginator.num_pages,
                 "global_search": search_query,
                 "status_counts": status_counts,  # Add status counts
+                "status": status_filter,
             },
         )
 
@@ -562,6 +564,33 @@ class RequisitionDetailAPI(View):
             return JsonResponse({"success": False, "error": str(e)})
 
 
+@method_decorator(csrf_exempt, name="dispatch")
+class RequisitionProgressAPI(View):
+    """Order progress of a requisition and its order lines (see order_management.lineage)"""
+
+    def get(self, request, pk):
+        requisition = get_object_or_404(Requisition, id=pk)
+        rows = OrderProgress.objects.filter(requisition=requisition).select_related('order_line__section_no')
+
+        progress, lines = None, []
+        for row in rows:
+            if not row.order_line_key:
+                progress = progress_as_dict(row)
+                continue
+            line = progress_as_dict(row)
+            line["section_no"] = row.order_line.section_no.section_no
+            line["cut_length"] = row.order_line.cut_length
+            lines.append(line)
+
+        return JsonResponse({
+            "success": True,
+            "requisition_id": requisition.requisition_id,
+            "status": requisition.status,
+            "progress": progress,
+            "lines": lines,
+        })
+
+
 class RequisitionDeleteView(View):
     """Delete requisition view"""
     
@@ -698,13 +727,11 @@ class WorkOrderListView(View):
             workorders = WorkOrder.objects.all().order_by("-id")
 
         # ---------------- Pagination ----------------
-        paginator = Paginator(workorders, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(workorders, 10, ordering=("-id",))  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
 
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
-        page_range = range(start_page, end_page + 1)
 
         # ---------------- JSON Response for API/Postman ----------------
         if (
@@ -719,6 +746,8 @@ class WorkOrderListView(View):
                     "workorders": workorders_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -731,7 +760,6 @@ class WorkOrderListView(View):
             "Order_Management/Work_Order_List/work_order_list.html",
             {
                 "page_obj": page_obj,
-                "page_range": page_range,
                 "current_page": page_obj.number,
                 "start_page": start_page,
                 "end_page": end_page,
@@ -909,12 +937,37 @@ class WorkOrderDeleteView(View):
 # ─────────────────────────────────────────────────────────────────────────────
 # Views for requisiion print functionality
 # ─────────────────────────────────────────────────────────────────────────────
+def pdf_print_response(request, kind, ids_param, pk, filename):
+    """
+    Streamed PDF of the requested documents, an error page, or None when the
+    PDF libraries are missing (the caller then falls back to the HTML page)
+    """
+    try:
+        ids = [int(id.strip()) for id in ids_param.split(",") if id.strip()] if ids_param else [pk]
+    except ValueError:
+        return render(request, "error.html", {"error": "Invalid IDs"})
+    try:
+        stream = printing.print_pdf(kind, [id for id in ids if id])
+    except ImportError as e:
+        logger.warning("Falling back to HTML printing: %s", e)
+        return None
+    if stream is None:
+        return render(request, "error.html", {"error": "No valid documents found"})
+    return FileResponse(stream, content_type="application/pdf", filename=filename)
+
+
 class PrintRequisitionView(View):
     def get(self, request, pk=None):
         try:
             # Check if it's a bulk print request
             ids_param = request.GET.get("ids", "")
 
+            # ?format=pdf: one PDF rendered on the server (order_management.printing)
+            if request.GET.get("format") == "pdf":
+                response = pdf_print_response(request, "requisition", ids_param, pk, "requisitions.pdf")
+                if response is not None:
+                    return response
+
             if ids_param:
                 # Bulk printing - flatten requisitions with their orders
                 try:
@@ -933,21 +986,7 @@ class PrintRequisitionView(View):
                         )
 
                     # Flatten the data for printing
-                    print_data = []
-                    for req in requisitions_qs:
-                        for order in req.orders.all():
-                            print_data.append({
-                                'requisition_no': req.requisition_no,
-                                'customer': req.customer.name if hasattr(req.customer, 'name') else str(req.customer),
-                                'section_no': order.section_no.section_no if hasattr(order.section_no, 'section_no') else str(order.section_no),
-                                'wt_range': order.wt_range,
-                                'cut_length': order.cut_length,
-                                'qty': order.qty_in_no,
-                                'address': req.address if hasattr(req, 'address') else '',
-                                'dispatch_date': req.dispatch_date if hasattr(req, 'dispatch_date') else None,
-                                'expiry_date': req.expiry_date if hasattr(req, 'expiry_date') else None,
-                                'delivery_address': req.delivery_address if hasattr(req, 'delivery_address') else '',
-                            })
+                    print_data = printing.requisition_print_rows(requisitions_qs)
 
                     context = {
                         "requisitions": print_data,
@@ -1000,6 +1039,12 @@ class PrintWorkOrderView(View):
             # Check if it's a bulk print request
             ids_param = request.GET.get("ids", "")
 
+            # ?format=pdf: one PDF rendered on the server (order_management.printing)
+            if request.GET.get("format") == "pdf":
+                response = pdf_print_response(request, "work_order", ids_param, pk, "work_orders.pdf")
+                if response is not None:
+                    return response
+
             if ids_param:
                 # Bulk printing
                 try:
@@ -0,0 +1,117 @@
+"""
+Requisition status workflow.
+
+created -> in_planning -> in_production -> completed is advanced by the
+documents raised against a requisition (order_management.signals):
+
+* a DieRequisition or ProductionPlan                          -> in_planning
+* an OnlineProductionReport                                    -> in_production
+* every report completed and the ordered pieces produced       -> completed
+
+Automatic transitions only move forward and never leave completed or
+rejected; the requisition form can still set any status by hand.
+
+Every status change, automatic or manual, adjusts RequisitionStatusCount and
+appends a RequisitionStatusHistory row inside the transaction that saves the
+requisition, so status tiles read one small table instead of counting.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from planning.models import DieRequisition, ProductionPlan
+from production.models import OnlineProductionReport
+from .lineage import totals_for
+from .models import Requisition, RequisitionStatusCount, RequisitionStatusHistory
+
+FLOW = ['created', 'in_planning', 'in_production', 'completed']
+TERMINAL = {'completed', 'rejected'}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Counters and history
+# ─────────────────────────────────────────────────────────────────────────────
+def status_counts():
+    """status -> number of requisitions, for every status"""
+    counts = {status: 0 for status, _ in Requisition.STATUS_CHOICES}
+    counts.update(RequisitionStatusCount.objects.values_list('status', 'count'))
+    return counts
+
+
+def adjust_count(status, delta):
+    if not status:
+        return
+    counter = RequisitionStatusCount.objects.filter(status=status)
+    if counter.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            RequisitionStatusCount.objects.create(status=status, count=delta)
+    except IntegrityError:
+        counter.update(count=F('count') + delta)
+
+
+def record_change(requisition, old_status, source='manual'):
+    """Counters and history for a saved requisition whose status was `old_status` (None when new)"""
+    if old_status == requisition.status:
+        return
+    adjust_count(old_status, -1)
+    adjust_count(requisition.status, 1)
+    RequisitionStatusHistory.objects.create(
+        requisition=requisition,
+        from_status=old_status or '',
+        to_status=requisition.status,
+        source=source,
+    )
+
+
+def recount():
+    """Recompute the counters from the requisition table (after bulk_create / raw SQL)"""
+    counts = dict(Requisition.objects.order_by().values_list('status').annotate(n=Count('id')))
+    with transaction.atomic():
+        RequisitionStatusCount.objects.all().delete()
+        RequisitionStatusCount.objects.bulk_create(
+            [RequisitionStatusCount(status=status, count=n) for status, n in counts.items()]
+        )
+    return counts
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Transitions
+# ─────────────────────────────────────────────────────────────────────────────
+def target_status(requisition_id):
+    """The status the documents of a requisition call for"""
+    report_states = set(
+        OnlineProductionReport.objects.filter(die_requisition__customer_requisition_no_id=requisition_id)
+        .order_by().values_list('status', flat=True).distinct()
+    )
+    if report_states:
+        progress = totals_for([requisition_id]).get(requisition_id)
+        pieces_made = progress is None or progress.produced_pieces >= progress.ordered_qty
+        return 'completed' if report_states == {'completed'} and pieces_made else 'in_production'
+    if (
+        DieRequisition.objects.filter(customer_requisition_no_id=requisition_id).exists()
+        or ProductionPlan.objects.filter(cust_requisition_id=requisition_id).exists()
+    ):
+        return 'in_planning'
+    return 'created'
+
+
+def advance(requisition_id, source):
+    """Move a requisition forward to its target status. Returns the new status, or None"""
+    with transaction.atomic():
+        requisition = Requisition.objects.select_for_update().filter(id=requisition_id).first()
+        if requisition is None or requisition.status in TERMINAL:
+            return None
+        target = target_status(requisition_id)
+        if requisition.status in FLOW and FLOW.index(target) <= FLOW.index(requisition.status):
+            return None
+        requisition.status = target
+        requisition._status_source = source
+        requisition.save(update_fields=['status'])
+        return target
+
+
+def advance_all(requisition_ids, source):
+    for requisition_id in requisition_ids:
+        if requisition_id:
+            advance(requisition_id, source)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+        ('order_management', '0005_list_keyset_index'),
+        ('planning', '0006_productionplan_billet_size_productionplan_cut_length_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dierequisition',
+            index=models.Index(fields=['created_at', 'id'], name='die_req_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionplan',
+            index=models.Index(fields=['created_at', 'id'], name='production_plan_created_id_idx'),
+        ),
+    ]
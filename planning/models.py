@@ -77,6 +77,10 @@ class DieRequisition(models.Model):
     class Meta:
         db_table = 'die_requisition'
         ordering = ['-created_at']
+        # Keyset pagination of the list views seeks on (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='die_req_created_id_idx'),
+        ]
         verbose_name = "Die Requisition"
         verbose_name_plural = "Die Requisitions"
     
@@ -228,6 +232,10 @@ class ProductionPlan(models.Model):
     class Meta:
         db_table = 'production_plan'
         ordering = ['-created_at']
+        # Keyset pagination of the list views seeks on (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='production_plan_created_id_idx'),
+        ]
         verbose_name = "Production Plan"
         verbose_name_plural = "Production Plans"
     
@@ -0,0 +1,466 @@
+"""
+Capacity-aware press scheduling.
+
+`build(start)` turns open demand into proposed ProductionPlan rows:
+
+* demand: every order line of a requisition that is not completed or
+  rejected, less what its plans already cover (OrderProgress.planned_qty),
+  to be made on the die of the requisition's DieRequisition for that section
+  (lineage.match_line). Lines without a die requisition are left unscheduled.
+* capacity: every CompanyPress runs its company's shifts each day of the
+  horizon; minutes taken by plans already on the books are subtracted.
+* dies: a die bound to a press (Die.press) only runs there. An unbound die
+  stays on the first press it is given, so it is never on two presses at once.
+* run time: pieces / the die's rate, the median pieces per run-minute of its
+  recent production reports (default_pieces_per_hour without history). A
+  die change costs die_change_minutes; a press keeps its die between jobs.
+
+Jobs are taken in dispatch date order (earliest due date). Each goes to the
+allowed press where it would finish first, and the later jobs of the same
+die due within batch_window_days follow it at once, so the die is mounted
+once instead of once per order. Work spills across shifts and yields one
+plan row per (press, day, shift). Everything is loaded with a handful of
+queries up front; the loop itself touches no database.
+
+`create_plans` writes a schedule's rows as ProductionPlan rows in one
+transaction, skipping rows identical to a plan already saved, so posting the
+same preview twice creates its plans once.
+"""
+import statistics
+from collections import defaultdict, deque
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from master.models import CompanyPress, Die
+from master.shifts import shift_index
+from master.versioning import bump_versions
+from order_management import lineage, workflow
+from order_management.models import OrderProgress, Requisition, RequisitionOrder
+from production.models import OnlineProductionReport
+from .models import DieRequisition, ProductionPlan
+
+DEFAULT_SCHEDULING_SETTINGS = {
+    'horizon_days': 14,             # days from the start date that can take work
+    'die_change_minutes': 45,       # press time lost mounting another die
+    'batch_window_days': 7,         # same-die jobs due this much later run in the same mount
+    'default_pieces_per_hour': 240, # rate of a die without production history
+    'rate_history_days': 90,        # production reports the die rates are taken from
+    'min_run_minutes': 30,          # shorter report runs do not set a rate
+}
+
+NO_DUE_DATE = date.max
+
+
+def scheduling_settings():
+    options = dict(DEFAULT_SCHEDULING_SETTINGS)
+    options.update(getattr(settings, 'PRODUCTION_SCHEDULING', {}))
+    return options
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Loading
+# ─────────────────────────────────────────────────────────────────────────────
+def load_jobs(requisition_ids=None):
+    """(jobs in due-date order, unschedulable lines) of the open order lines"""
+    requisitions = Requisition.objects.exclude(status__in=workflow.TERMINAL)
+    if requisition_ids:
+        requisitions = requisitions.filter(id__in=requisition_ids)
+    requisitions = {
+        row['id']: row
+        for row in requisitions.values('id', 'requisition_id', 'dispatch_date', 'date', 'customer__name')
+    }
+    lines = defaultdict(list)
+    for line in RequisitionOrder.objects.filter(requisition_id__in=list(requisitions)).order_by('id').values(
+        *lineage.LINE_FIELDS, 'qty_in_no'
+    ):
+        lines[line['requisition_id']].append(line)
+    planned = dict(
+        ((row[0], row[1]), row[2])
+        for row in OrderProgress.objects.filter(requisition_id__in=list(requisitions), order_line_key__gt=0)
+        .values_list('requisition_id', 'order_line_key', 'planned_qty')
+    )
+
+    die_requisitions = defaultdict(dict)
+    for die_req in DieRequisition.objects.filter(customer_requisition_no_id__in=list(requisitions)).order_by('id').values(
+        'id', 'customer_requisition_no_id', 'section_no_id', 'section_no__section_no', 'section_name', 'cut_length',
+        'present_wt', 'no_of_cavity', 'die_no_id', 'die_no__die_no', 'die_no__press_id', 'die_no__no_of_cavity',
+    ):
+        requisition_id = die_req['customer_requisition_no_id']
+        line_key = lineage.match_line(
+            lines[requisition_id], section_id=die_req['section_no_id'], cut_length=die_req['cut_length'],
+        )
+        # The first die requisition raised for a line makes it
+        die_requisitions[requisition_id].setdefault(line_key, die_req)
+
+    jobs, unscheduled = [], []
+    for requisition_id, requisition in requisitions.items():
+        for line in lines[requisition_id]:
+            qty = (line['qty_in_no'] or 0) - planned.get((requisition_id, line['id']), 0)
+            if qty <= 0:
+                continue
+            job = {
+                'requisition_id': requisition_id,
+                'requisition_no': requisition['requisition_id'],
+                'customer_name': requisition['customer__name'] or '',
+                'dispatch_date': requisition['dispatch_date'],
+                'order_line': line['id'],
+                'section_no': line['section_no__section_no'] or '',
+                'cut_length': line['cut_length'] or '',
+                'qty': qty,
+            }
+            die_req = die_requisitions[requisition_id].get(line['id'])
+            if die_req is None:
+                unscheduled.append(dict(job, reason='No die requisition for this order line'))
+                continue
+            job.update({
+                'die_requisition_id': die_req['id'],
+                'die_id': die_req['die_no_id'],
+                'die_no': die_req['die_no__die_no'],
+                'press_id': die_req['die_no__press_id'],
+                'section_name': die_req['section_name'],
+                'wt_per_piece': die_req['present_wt'],
+                'no_of_cavity': str(die_req['die_no__no_of_cavity'] or die_req['no_of_cavity'] or ''),
+                '_sort': (requisition['dispatch_date'] or NO_DUE_DATE, requisition['date'], requisition_id, line['id']),
+            })
+            jobs.append(job)
+    jobs.sort(key=lambda job: job['_sort'])
+    return jobs, unscheduled
+
+
+def load_rates(die_nos, start, options):
+    """die_no -> pieces per minute (median of its recent report runs)"""
+    runs = defaultdict(list)
+    reports = OnlineProductionReport.objects.filter(
+        die_no__in=die_nos, date__gte=start - timedelta(days=options['rate_history_days']),
+        no_of_pieces__gt=0, start_time__isnull=False, end_time__isnull=False,
+    ).order_by().values_list('die_no', 'start_time', 'end_time', 'no_of_pieces')
+    for die_no, start_time, end_time, pieces in reports:
+        run = (end_time.hour * 60 + end_time.minute - start_time.hour * 60 - start_time.minute) % 1440
+        if run >= options['min_run_minutes']:
+            runs[die_no.strip()].append(pieces / run)
+    return {die_no: statistics.median(values) for die_no, values in runs.items()}
+
+
+class PressTimeline:
+    """Free minutes of one press per (day, shift) slot, filled front to back"""
+
+    __slots__ = ('press_id', 'name', 'slots', 'cursor', 'die_id', 'capacity', 'booked', 'scheduled', 'die_changes')
+
+    def __init__(self, press_id, name, slots):
+        self.press_id = press_id
+        self.name = name
+        # [day, shift_id, begin (minutes after the horizon start), length, free]
+        self.slots = slots
+        self.cursor = 0
+        self.die_id = None
+        self.capacity = sum(slot[3] for slot in slots)
+        self.booked = 0.0
+        self.scheduled = 0.0
+        self.die_changes = 0
+
+    def book(self, day, shift_id, minutes):
+        """
+        Take minutes already planned from a slot on (the day's first shift when
+        no shift is given); a plan longer than the slot's free time runs on
+        into the following slots
+        """
+        start = next(
+            (index for index, slot in enumerate(self.slots)
+             if slot[0] == day and (shift_id is None or slot[1] == shift_id)),
+            None,
+        )
+        if start is None:
+            return
+        for slot in self.slots[start:]:
+            if minutes <= 1e-9:
+                break
+            taken = min(slot[4], minutes)
+            slot[4] -= taken
+            minutes -= taken
+            self.booked += taken
+
+    def finish(self, minutes):
+        """Horizon minute at which `minutes` more work would end, or None past the horizon"""
+        index = self.cursor
+        while index < len(self.slots):
+            slot = self.slots[index]
+            if minutes <= slot[4]:
+                return slot[2] + slot[3] - slot[4] + minutes
+            minutes -= slot[4]
+            index += 1
+        return None
+
+    def take(self, minutes):
+        """Consume minutes from the cursor on; returns [(slot, minutes)] and the minutes that did not fit"""
+        pieces = []
+        while minutes > 1e-9 and self.cursor < len(self.slots):
+            slot = self.slots[self.cursor]
+            used = min(slot[4], minutes)
+            if used > 0:
+                pieces.append((slot, used))
+                slot[4] -= used
+                minutes -= used
+            if slot[4] <= 1e-9:
+                self.cursor += 1
+        return pieces, max(minutes, 0)
+
+
+def load_presses(start, end, press_ids=None):
+    """press_id -> PressTimeline with one slot per (day, shift) of its company in [start, end)"""
+    presses = CompanyPress.objects.order_by('id')
+    if press_ids:
+        presses = presses.filter(id__in=press_ids)
+    timelines = {}
+    for press_id, name, company_id in presses.values_list('id', 'name', 'company_id'):
+        shifts = sorted(shift_index.shifts_for_company(company_id), key=lambda item: item[1].start)
+        slots = []
+        for offset in range((end - start).days):
+            for shift_id, interval in shifts:
+                length = interval.duration_minutes
+                slots.append([start + timedelta(days=offset), shift_id, offset * 1440 + interval.start, length, length])
+        if slots:
+            timelines[press_id] = PressTimeline(press_id, name, slots)
+    return timelines
+
+
+def load_booked(timelines, start, end):
+    """(press_id, day, shift_id, die_no, planned_qty) of the plans already made for the horizon"""
+    return list(ProductionPlan.objects.filter(
+        press_id__in=list(timelines), date_of_production__gte=start, date_of_production__lt=end,
+    ).order_by().values_list('press_id', 'date_of_production', 'shift_id', 'die_no', 'planned_qty'))
+
+
+def book_existing(timelines, booked, rates, options):
+    """Subtract the run time of plans already made for the horizon"""
+    for press_id, day, shift_id, die_no, planned_qty in booked:
+        minutes = (planned_qty or 0) / _rate(rates, die_no, options)
+        timelines[press_id].book(day, shift_id, minutes)
+
+
+def _rate(rates, die_no, options):
+    return rates.get((die_no or '').strip()) or options['default_pieces_per_hour'] / 60.0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduling
+# ─────────────────────────────────────────────────────────────────────────────
+def _place(job, timeline, rate, options):
+    """Run a job on a press from its cursor; returns the plan rows made and the pieces left over"""
+    if timeline.die_id != job['die_id']:
+        timeline.take(options['die_change_minutes'])
+        timeline.die_id = job['die_id']
+        timeline.die_changes += 1
+    pieces, left = timeline.take(job['qty'] / rate)
+    run = sum(minutes for _, minutes in pieces)
+    timeline.scheduled += run
+
+    rows, placed, elapsed = [], 0, 0.0
+    made = job['qty'] if left <= 0 else min(job['qty'], int(run * rate))
+    for slot, minutes in pieces:
+        elapsed += minutes
+        # Cumulative rounding so the rows add up to the pieces made
+        qty = int(round(made * elapsed / run)) - placed if run else 0
+        if qty <= 0:
+            continue
+        placed += qty
+        day, shift_id = slot[0], slot[1]
+        rows.append({
+            'date_of_production': day.isoformat(),
+            'press': timeline.press_id,
+            'press_name': timeline.name,
+            'shift': shift_id,
+            'cust_requisition_id': job['requisition_id'],
+            'requisition_no': job['requisition_no'],
+            'customer_name': job['customer_name'],
+            'die_requisition': job['die_requisition_id'],
+            'die_no': job['die_no'],
+            'section_no': job['section_no'],
+            'section_name': job['section_name'],
+            'wt_per_piece': str(job['wt_per_piece']),
+            'no_of_cavity': job['no_of_cavity'],
+            'cut_length': job['cut_length'],
+            'planned_qty': qty,
+            'minutes': round(minutes, 1),
+            'dispatch_date': job['dispatch_date'].isoformat() if job['dispatch_date'] else None,
+            'late': bool(job['dispatch_date'] and day > job['dispatch_date']),
+        })
+    return rows, job['qty'] - placed
+
+
+def schedule(jobs, timelines, rates, options):
+    """Assign jobs (in due-date order) to press timelines. Returns (rows, unscheduled)"""
+    by_die = defaultdict(deque)
+    for job in jobs:
+        by_die[job['die_id']].append(job)
+    die_home = {}
+    rows, unscheduled = [], []
+    window = timedelta(days=options['batch_window_days'])
+
+    for job in jobs:
+        queue = by_die[job['die_id']]
+        if not queue or queue[0] is not job:
+            continue  # already run in an earlier job's die mount
+
+        rate = _rate(rates, job['die_no'], options)
+        home = job['press_id'] or die_home.get(job['die_id'])
+        candidates = [timelines[home]] if home in timelines else [] if home else list(timelines.values())
+        if not candidates:
+            queue.popleft()
+            unscheduled.append(dict(job, reason='Die is bound to a press without shifts in the horizon'))
+            continue
+
+        def finish(timeline):
+            change = 0 if timeline.die_id == job['die_id'] else options['die_change_minutes']
+            end = timeline.finish(change + job['qty'] / rate)
+            return (end is None, end if end is not None else 0, timeline.press_id)
+
+        timeline = min(candidates, key=finish)
+        die_home[job['die_id']] = timeline.press_id
+
+        # This job and the same die's next jobs due within the window, in one mount
+        due = job['dispatch_date']
+        while queue and (
+            queue[0] is job
+            or (due and queue[0]['dispatch_date'] and queue[0]['dispatch_date'] - due <= window)
+        ):
+            batch_job = queue.popleft()
+            placed, left = _place(batch_job, timeline, rate, options)
+            rows.extend(placed)
+            if left > 0:
+                unscheduled.append(dict(batch_job, qty=left, reason='Press capacity exhausted within the horizon'))
+    return rows, unscheduled
+
+
+def build(start=None, horizon_days=None, requisition_ids=None, press_ids=None):
+    """Proposed plan rows for the open demand, with press load and what could not be placed"""
+    options = scheduling_settings()
+    start = start or timezone.localdate() + timedelta(days=1)
+    end = start + timedelta(days=horizon_days or options['horizon_days'])
+
+    jobs, unscheduled = load_jobs(requisition_ids)
+    timelines = load_presses(start, end, press_ids)
+    booked = load_booked(timelines, start, end)
+    # Booked plans on other dies take their own rates too
+    die_nos = {job['die_no'] for job in jobs} | {(die_no or '').strip() for _, _, _, die_no, _ in booked}
+    rates = load_rates(die_nos, start, options)
+    book_existing(timelines, booked, rates, options)
+    rows, left_over = schedule(jobs, timelines, rates, options)
+
+    rows.sort(key=lambda row: (row['date_of_production'], row['press'], row['shift']))
+    unplaced = [
+        {key: value for key, value in job.items() if not key.startswith('_')}
+        for job in unscheduled + left_over
+    ]
+    for job in unplaced:
+        if job.get('dispatch_date'):
+            job['dispatch_date'] = job['dispatch_date'].isoformat()
+        if 'wt_per_piece' in job:
+            job['wt_per_piece'] = str(job['wt_per_piece'])
+    return {
+        'start': start.isoformat(),
+        'end': (end - timedelta(days=1)).isoformat(),
+        'jobs': len(jobs),
+        'plans': rows,
+        'late': sum(1 for row in rows if row['late']),
+        'unscheduled': unplaced,
+        'presses': [
+            {
+                'press_id': timeline.press_id,
+                'press': timeline.name,
+                'capacity_minutes': timeline.capacity,
+                'booked_minutes': round(timeline.booked, 1),
+                'scheduled_minutes': round(timeline.scheduled, 1),
+                'die_changes': timeline.die_changes,
+                'load': round((timeline.capacity - sum(slot[4] for slot in timeline.slots)) / timeline.capacity, 3),
+            }
+            for timeline in timelines.values()
+        ],
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing
+# ─────────────────────────────────────────────────────────────────────────────
+def _plan_key(press_id, day, shift_id, requisition_id, die_requisition_id, die_no, planned_qty):
+    return (
+        int(press_id), date.fromisoformat(str(day)) if day else None, int(shift_id) if shift_id else None,
+        int(requisition_id) if requisition_id else None, int(die_requisition_id) if die_requisition_id else None,
+        (die_no or '').strip(), int(planned_qty) if planned_qty else None,
+    )
+
+
+def _row_key(row):
+    return _plan_key(
+        row['press'], row.get('date_of_production'), row.get('shift'), row.get('cust_requisition_id'),
+        row.get('die_requisition'), row.get('die_no'), row.get('planned_qty'),
+    )
+
+
+def saved_plan_keys(rows):
+    """Keys of the saved plans on the presses and days of `rows`"""
+    days = {row.get('date_of_production') for row in rows if row.get('date_of_production')}
+    return {
+        _plan_key(*values)
+        for values in ProductionPlan.objects.filter(
+            press_id__in={row['press'] for row in rows}, date_of_production__in=days,
+        ).values_list(
+            'press_id', 'date_of_production', 'shift_id', 'cust_requisition_id_id', 'die_requisition_id',
+            'die_no', 'planned_qty',
+        )
+    }
+
+
+def create_plans(rows, plan_date=None):
+    """
+    Save schedule rows as ProductionPlan rows in one transaction; returns the
+    plans. Rows identical to a saved plan (press, day, shift, requisition, die
+    and quantity) are skipped.
+    """
+    plan_date = plan_date or timezone.localdate()
+    with transaction.atomic():
+        # Same lock as ProductionPlan.generate_production_plan_id, held for the whole batch
+        last_plan = ProductionPlan.objects.select_for_update().order_by('-id').first()
+        try:
+            number = int(last_plan.production_plan_id.replace('PDP', '')) if last_plan else 0
+        except (ValueError, AttributeError):
+            number = 0
+        # Checked under the lock: a second post of the same rows waits for the first to commit
+        saved = saved_plan_keys(rows)
+        rows = [row for row in rows if _row_key(row) not in saved]
+        if not rows:
+            return []
+        plans = []
+        for offset, row in enumerate(rows, start=1):
+            plans.append(ProductionPlan(
+                production_plan_id=f'PDP{str(number + offset).zfill(5)}',
+                date=plan_date,
+                cust_requisition_id_id=row.get('cust_requisition_id') or None,
+                customer_name=row.get('customer_name', ''),
+                die_requisition_id=row.get('die_requisition') or None,
+                die_no=row.get('die_no', ''),
+                section_no=row.get('section_no', ''),
+                section_name=row.get('section_name', ''),
+                wt_per_piece=row.get('wt_per_piece') or 0,
+                no_of_cavity=row.get('no_of_cavity', ''),
+                cut_length=row.get('cut_length', ''),
+                press_id=row['press'],
+                date_of_production=row.get('date_of_production') or None,
+                shift_id=row.get('shift') or None,
+                planned_qty=row.get('planned_qty') or None,
+            ))
+        ProductionPlan.objects.bulk_create(plans)
+        # Not every backend returns the new ids from bulk_create
+        plans = list(ProductionPlan.objects.filter(
+            production_plan_id__in=[plan.production_plan_id for plan in plans]
+        ).order_by('id'))
+
+        # bulk_create sends no signals: do what order_management.signals and master.signals would
+        requisition_ids = {plan.cust_requisition_id_id for plan in plans}
+        die_ids = set(Die.objects.filter(die_no__in={plan.die_no for plan in plans}).values_list('id', flat=True))
+        transaction.on_commit(lambda: lineage.refresh(requisition_ids, die_ids))
+        transaction.on_commit(lambda: workflow.advance_all(requisition_ids, 'production_plan'))
+        transaction.on_commit(lambda: bump_versions(ProductionPlan))
+    return plans
@@ -1,3 +1,69 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from . import scheduler
+from .models import ProductionPlan
+
+
+class SchedulerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+
+    def setUp(self):
+        self.start = timezone.localdate() + timedelta(days=30)
+        self.options = scheduler.scheduling_settings()
+
+    def test_booked_plans_use_their_own_die_rate(self):
+        job_plan, booked_plan = ProductionPlan.objects.exclude(press=None).order_by('id')[:2]
+        rate = scheduler.load_rates({booked_plan.die_no}, self.start, self.options)[booked_plan.die_no]
+        self.assertNotAlmostEqual(rate, self.options['default_pieces_per_hour'] / 60.0)
+
+        booked_plan.date_of_production = self.start
+        booked_plan.save()
+        result = scheduler.build(
+            start=self.start, horizon_days=1,
+            requisition_ids=[job_plan.cust_requisition_id_id], press_ids=[booked_plan.press_id],
+        )
+        press, = result['presses']
+        self.assertAlmostEqual(press['booked_minutes'], round(booked_plan.planned_qty / rate, 1), places=1)
+
+    def test_booked_plan_longer_than_its_shift_runs_into_the_next(self):
+        job_plan, booked_plan = ProductionPlan.objects.exclude(press=None).order_by('id')[:2]
+        rate = scheduler.load_rates({booked_plan.die_no}, self.start, self.options)[booked_plan.die_no]
+        booked_plan.date_of_production = self.start
+        booked_plan.shift = None
+        booked_plan.planned_qty = int(rate * 60 * 30)  # 30 hours of work
+        booked_plan.save()
+
+        result = scheduler.build(
+            start=self.start, horizon_days=3,
+            requisition_ids=[job_plan.cust_requisition_id_id], press_ids=[booked_plan.press_id],
+        )
+        press, = result['presses']
+        self.assertAlmostEqual(press['booked_minutes'], round(booked_plan.planned_qty / rate, 1), places=1)
+
+    def test_posting_the_same_rows_twice_creates_them_once(self):
+        rows = [
+            {
+                'press': plan.press_id, 'date_of_production': (self.start + timedelta(days=n)).isoformat(),
+                'shift': plan.shift_id, 'cust_requisition_id': plan.cust_requisition_id_id,
+                'die_requisition': plan.die_requisition_id, 'die_no': plan.die_no,
+                'section_no': plan.section_no, 'planned_qty': plan.planned_qty,
+            }
+            for n, plan in enumerate(ProductionPlan.objects.exclude(press=None).order_by('id')[:3])
+        ]
+        before = ProductionPlan.objects.count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = scheduler.create_plans(rows)
+        with self.captureOnCommitCallbacks(execute=True):
+            again = scheduler.create_plans(rows)
 
-# Create your tests here.
+        self.assertEqual(len(created), len(rows))
+        self.assertEqual(again, [])
+        self.assertEqual(ProductionPlan.objects.count(), before + len(rows))
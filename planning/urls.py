@@ -27,6 +27,7 @@ urlpatterns = [
     # API endpoints
     path('api/production-plans/', ProductionPlanAPI.as_view(), name='production_plan_api'),
     path('api/production-plans/<int:pk>/', ProductionPlanDetailAPI.as_view(), name='production_plan_detail_api'),
+    path('api/production-schedule/', ProductionScheduleAPI.as_view(), name='production_schedule_api'),
     
     # Delete
     path('production-plan/delete/<int:pk>/', ProductionPlanDeleteView.as_view(), name='production_plan_delete'),
@@ -1,17 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views import View
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from Aluminium_Extrusions.pagination import KeysetPaginator
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
 from django.forms.models import model_to_dict
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
+from datetime import datetime
 
 
 from .models import *
 from .forms import *
 from master.models import *
 from order_management.models import *
+from master.versioning import conditional_get
+from . import scheduler
 
 
 # Create your views here.
@@ -36,9 +39,8 @@ class DieRequisitionListView(View):
             ).order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(requisitions, 10)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(requisitions, 10)
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -67,6 +69,8 @@ class DieRequisitionListView(View):
                     "requisitions": requisitions_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -147,6 +151,7 @@ class DieRequisitionEditView(View):
 class DieRequisitionAPI(View):
     """API for CRUD on Die Requisition"""
     
+    @conditional_get(DieRequisition, Requisition, Section, Die)
     def get(self, request):
         """Get all requisitions or get next Die Requisition ID"""
         # Check if requesting next Die Requisition ID
@@ -398,9 +403,8 @@ class ProductionPlanListView(View):
             ).order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(plans, 10)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(plans, 10)
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -435,6 +439,8 @@ class ProductionPlanListView(View):
                     "plans": plans_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -524,6 +530,7 @@ class ProductionPlanEditView(View):
 class ProductionPlanAPI(View):
     """API for CRUD on Production Plan"""
     
+    @conditional_get(ProductionPlan, Requisition, DieRequisition, CompanyPress, CompanyShift, Staff)
     def get(self, request):
         """Get all plans or get next Production Plan ID"""
         # Check if requesting next Production Plan ID
@@ -660,6 +667,63 @@ class ProductionPlanAPI(View):
             return JsonResponse({"success": False, "message": str(e)})
 
 
+@method_decorator(csrf_exempt, name="dispatch")
+class ProductionScheduleAPI(View):
+    """
+    Capacity-aware schedule of the open order lines (planning.scheduler).
+    GET previews it: ?start=YYYY-MM-DD (default tomorrow), ?days=N,
+    ?requisitions=1,2 and ?presses=3,4 narrow the demand and the presses.
+    POST creates the ProductionPlan rows: {"plans": [...]} saves previewed
+    (possibly edited) rows as they are, otherwise the schedule is built again
+    from the same keys as GET. Rows identical to a saved plan are skipped.
+    """
+
+    @staticmethod
+    def ids(value):
+        values = value if isinstance(value, list) else str(value).split(',')
+        return [int(v) for v in values if str(v).strip()]
+
+    def parse_options(self, values):
+        start = values.get('start')
+        return {
+            'start': datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+            'horizon_days': int(values['days']) if values.get('days') else None,
+            'requisition_ids': self.ids(values.get('requisitions') or []),
+            'press_ids': self.ids(values.get('presses') or []),
+        }
+
+    def get(self, request):
+        try:
+            options = self.parse_options(request.GET)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'start must be YYYY-MM-DD; days, requisitions and presses numbers'}, status=400)
+        return JsonResponse({'success': True, **scheduler.build(**options)})
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body or '{}')
+            rows = data.get('plans')
+            if rows is None:
+                rows = scheduler.build(**self.parse_options(data))['plans']
+        except (ValueError, TypeError):
+            return JsonResponse({'success': False, 'message': 'start must be YYYY-MM-DD; days, requisitions and presses numbers'}, status=400)
+        if not rows:
+            return JsonResponse({'success': True, 'created': 0, 'plans': []})
+        try:
+            plans = scheduler.create_plans(rows)
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': str(e)})
+        skipped = len(rows) - len(plans)
+        return JsonResponse({
+            'success': True,
+            'created': len(plans),
+            'skipped': skipped,
+            'message': f"{len(plans)} Production Plans created successfully!"
+                       + (f" {skipped} already existed." if skipped else ""),
+            'plans': [{'id': plan.id, 'production_plan_id': plan.production_plan_id} for plan in plans],
+        })
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class ProductionPlanDetailAPI(View):
     """API for get, edit & delete Production Plan"""
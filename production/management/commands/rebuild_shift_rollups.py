@@ -0,0 +1,79 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from master.shifts import shift_index
+from production.models import OnlineProductionReport, ShiftRollup
+from production.rollups import CELL_FIELDS, report_cell
+from raw_data.archive import archived_readings
+from raw_data.models import Raw_data
+
+
+def _empty_cell():
+    return {
+        'reading_count': 0, 'total_length': Decimal(0), 't_factor_sum': Decimal(0),
+        'report_count': 0, 'input_qty': Decimal(0), 'total_output': Decimal(0),
+        'no_of_pieces': 0, 'no_of_billet': 0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild shift_rollup from raw_machine_data (and archived readings) and online production reports. "
+        "Run after changing shift timings or backfilling readings; ingest and report "
+        "saves keep the rollups up to date otherwise."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        shift_index.invalidate()
+        cells = defaultdict(_empty_cell)
+
+        readings = (
+            Raw_data.objects.filter(press__isnull=False)
+            .values_list('press_id', 'datetime', 'length', 't_factor')
+            .order_by()
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        archived = (
+            (reading.press_id, reading.datetime, reading.length, reading.t_factor)
+            for reading in archived_readings() if reading.press_id is not None
+        )
+        for press_id, reading_time, length, t_factor in chain(readings, archived):
+            shift_id, production_day = shift_index.resolve(press_id, timezone.localtime(reading_time))
+            cell = cells[(press_id, shift_id, production_day)]
+            cell['reading_count'] += 1
+            cell['total_length'] += Decimal(str(length))
+            cell['t_factor_sum'] += Decimal(str(t_factor))
+
+        reports = OnlineProductionReport.objects.only(
+            *CELL_FIELDS, 'input_qty', 'total_output', 'no_of_pieces', 'no_of_billet'
+        ).order_by()
+        for report in reports.iterator(chunk_size=options['chunk_size']):
+            key = report_cell(report)
+            if key is None:
+                continue
+            cell = cells[key]
+            cell['report_count'] += 1
+            cell['input_qty'] += report.input_qty or 0
+            cell['total_output'] += report.total_output or 0
+            cell['no_of_pieces'] += report.no_of_pieces or 0
+            cell['no_of_billet'] += report.no_of_billet or 0
+
+        with transaction.atomic():
+            ShiftRollup.objects.all().delete()
+            ShiftRollup.objects.bulk_create(
+                [
+                    ShiftRollup(press_id=press_id, shift_id=shift_id, shift_key=shift_id or 0, production_day=day, **totals)
+                    for (press_id, shift_id, day), totals in cells.items()
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Shift rollups rebuilt: {len(cells)} cells"))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0003_dieusage'),
+        ('production', '0006_delete_dailyproductionreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('production_day', models.DateField(verbose_name='Production Day')),
+                ('reading_count', models.PositiveIntegerField(default=0, verbose_name='Readings')),
+                ('total_length', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total Length')),
+                ('t_factor_sum', models.DecimalField(decimal_places=3, default=0, max_digits=16, verbose_name='T-Factor Sum')),
+                ('report_count', models.PositiveIntegerField(default=0, verbose_name='Reports')),
+                ('input_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Input')),
+                ('total_output', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total Output')),
+                ('no_of_pieces', models.PositiveIntegerField(default=0, verbose_name='No of Pieces')),
+                ('no_of_billet', models.PositiveIntegerField(default=0, verbose_name='No of Billet')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('press', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_rollups', to='master.companypress', verbose_name='Press')),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shift_rollups', to='master.companyshift', verbose_name='Shift')),
+            ],
+            options={
+                'verbose_name': 'Shift Rollup',
+                'verbose_name_plural': 'Shift Rollups',
+                'db_table': 'shift_rollup',
+                'ordering': ['-production_day', 'press', 'shift'],
+                'indexes': [models.Index(fields=['production_day', 'press'], name='shift_rollup_day_press_idx')],
+                'constraints': [models.UniqueConstraint(fields=('press', 'shift', 'production_day'), name='uniq_shift_rollup_cell')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+        ('planning', '0007_list_keyset_index'),
+        ('production', '0007_shiftrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='onlineproductionreport',
+            index=models.Index(fields=['created_at', 'id'], name='online_report_created_id_idx'),
+        ),
+    ]
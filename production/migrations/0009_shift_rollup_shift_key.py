@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:51
+
+from django.db import migrations, models
+from django.db.models import F
+
+SUMMED_FIELDS = (
+    'reading_count', 'total_length', 't_factor_sum',
+    'report_count', 'input_qty', 'total_output', 'no_of_pieces', 'no_of_billet',
+)
+
+
+def fill_shift_key(apps, schema_editor):
+    """Key existing cells by shift_id and merge the duplicate shift-less cells the old constraint let through"""
+    ShiftRollup = apps.get_model('production', 'ShiftRollup')
+    ShiftRollup.objects.filter(shift__isnull=False).update(shift_key=F('shift_id'))
+    kept = {}
+    for cell in ShiftRollup.objects.filter(shift__isnull=True).order_by('id'):
+        key = (cell.press_id, cell.production_day)
+        first = kept.get(key)
+        if first is None:
+            kept[key] = cell
+            continue
+        for field in SUMMED_FIELDS:
+            setattr(first, field, getattr(first, field) + getattr(cell, field))
+        first.save(update_fields=list(SUMMED_FIELDS))
+        cell.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0005_image_derivative'),
+        ('production', '0008_list_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='shiftrollup',
+            name='uniq_shift_rollup_cell',
+        ),
+        migrations.AddField(
+            model_name='shiftrollup',
+            name='shift_key',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Shift Key'),
+        ),
+        migrations.RunPython(fill_shift_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shiftrollup',
+            constraint=models.UniqueConstraint(fields=('press', 'shift_key', 'production_day'), name='uniq_shift_rollup_cell'),
+        ),
+    ]
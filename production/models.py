@@ -185,6 +185,10 @@ class OnlineProductionReport(models.Model):
     class Meta:
         db_table = 'online_production_report'
         ordering = ['-created_at']
+        # Keyset pagination of the list views seeks on (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='online_report_created_id_idx'),
+        ]
         verbose_name = "Online Production Report"
         verbose_name_plural = "Online Production Reports"
     
@@ -221,6 +225,65 @@ class OnlineProductionReport(models.Model):
     def __str__(self):
         return f"{self.production_id} - {self.press.name if self.press else 'N/A'}"
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Model for Shift-wise production rollups (maintained by production.rollups)
+# ─────────────────────────────────────────────────────────────────────────────
+class ShiftRollup(models.Model):
+    """Sensor and report totals per (press, shift, production day) cell"""
+
+    press = models.ForeignKey(
+        'master.CompanyPress',
+        on_delete=models.CASCADE,
+        related_name='shift_rollups',
+        verbose_name="Press"
+    )
+    shift = models.ForeignKey(
+        'master.CompanyShift',
+        on_delete=models.CASCADE,
+        related_name='shift_rollups',
+        verbose_name="Shift",
+        null=True,
+        blank=True
+    )
+    # shift_id, or 0 for readings outside every shift (a NULL would not be unique)
+    shift_key = models.PositiveBigIntegerField(default=0, verbose_name="Shift Key")
+    production_day = models.DateField(verbose_name="Production Day")
+
+    # ============ From Raw_data readings ============
+    reading_count = models.PositiveIntegerField(default=0, verbose_name="Readings")
+    total_length = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total Length")
+    t_factor_sum = models.DecimalField(max_digits=16, decimal_places=3, default=0, verbose_name="T-Factor Sum")
+
+    # ============ From Online Production Reports ============
+    report_count = models.PositiveIntegerField(default=0, verbose_name="Reports")
+    input_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Input")
+    total_output = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total Output")
+    no_of_pieces = models.PositiveIntegerField(default=0, verbose_name="No of Pieces")
+    no_of_billet = models.PositiveIntegerField(default=0, verbose_name="No of Billet")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'shift_rollup'
+        ordering = ['-production_day', 'press', 'shift']
+        constraints = [
+            models.UniqueConstraint(fields=['press', 'shift_key', 'production_day'], name='uniq_shift_rollup_cell'),
+        ]
+        indexes = [
+            models.Index(fields=['production_day', 'press'], name='shift_rollup_day_press_idx'),
+        ]
+        verbose_name = "Shift Rollup"
+        verbose_name_plural = "Shift Rollups"
+
+    @property
+    def recovery(self):
+        if self.input_qty:
+            return round(float(self.total_output) / float(self.input_qty) * 100, 2)
+        return None
+
+    def __str__(self):
+        return f"{self.production_day} - {self.press_id} - {self.shift_id}"
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Model for Daily Production Report functionality
 # ─────────────────────────────────────────────────────────────────────────────
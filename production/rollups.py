@@ -0,0 +1,87 @@
+"""
+Shift-wise rollups.
+
+Every Raw_data reading (from raw_data.ingest) and every OnlineProductionReport
+save/delete (from production.signals) lands in a ShiftRollup cell keyed by
+(press, shift, production day), using the parsed CompanyShift timings in
+master.shifts.shift_index. Shift reports then read the cells directly.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from master.shifts import shift_index
+from .models import ShiftRollup, OnlineProductionReport
+
+
+# Report fields that decide which cell a report belongs to
+CELL_FIELDS = ('press_id', 'shift_id', 'date', 'date_of_production', 'start_time')
+
+
+def _cell(press_id, shift_id, production_day):
+    return ShiftRollup.objects.filter(press_id=press_id, shift_key=shift_id or 0, production_day=production_day)
+
+
+def _upsert(press_id, shift_id, production_day, increments, values=None):
+    """Apply F() increments to a cell (and plain `values`), creating it on first use"""
+    updates = {field: F(field) + amount for field, amount in increments.items()}
+    updates.update(values or {})
+    if _cell(press_id, shift_id, production_day).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            ShiftRollup.objects.create(
+                press_id=press_id, shift_id=shift_id, shift_key=shift_id or 0, production_day=production_day,
+                **increments, **(values or {})
+            )
+    except IntegrityError:
+        _cell(press_id, shift_id, production_day).update(**updates)
+
+
+def add_reading(press_id, reading_time, length, t_factor, count=1):
+    """Count `count` readings (summed length / t-factor) into the cell of `reading_time`"""
+    shift_id, production_day = shift_index.resolve(press_id, timezone.localtime(reading_time))
+    _upsert(press_id, shift_id, production_day, {
+        'reading_count': count,
+        'total_length': Decimal(str(length)),
+        't_factor_sum': Decimal(str(t_factor)),
+    })
+
+
+def report_cell(report):
+    """(press_id, shift_id, production_day) of a production report, or None if it has no press/date"""
+    # to_python: a report saved with raw strings still holds them on the instance
+    field = OnlineProductionReport._meta.get_field
+    production_day = field('date').to_python(report.date_of_production or report.date)
+    if not report.press_id or not production_day:
+        return None
+    shift_id = report.shift_id
+    start_time = field('start_time').to_python(report.start_time)
+    if shift_id is None and start_time:
+        shift_id = shift_index.resolve_time(report.press_id, start_time)
+    return report.press_id, shift_id, production_day
+
+
+def refresh_report_cell(cell):
+    """Recompute the report columns of one cell from the (few) reports of that press and day"""
+    if cell is None:
+        return
+    press_id, shift_id, production_day = cell
+    totals = {'report_count': 0, 'input_qty': Decimal(0), 'total_output': Decimal(0),
+              'no_of_pieces': 0, 'no_of_billet': 0}
+
+    reports = OnlineProductionReport.objects.filter(press_id=press_id).filter(
+        Q(date_of_production=production_day) | Q(date_of_production__isnull=True, date=production_day)
+    )
+    for report in reports.only(*CELL_FIELDS, 'input_qty', 'total_output', 'no_of_pieces', 'no_of_billet'):
+        if report_cell(report) != cell:
+            continue
+        totals['report_count'] += 1
+        totals['input_qty'] += report.input_qty or 0
+        totals['total_output'] += report.total_output or 0
+        totals['no_of_pieces'] += report.no_of_pieces or 0
+        totals['no_of_billet'] += report.no_of_billet or 0
+
+    _upsert(press_id, shift_id, production_day, {}, totals)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_init, post_save, post_delete
+
+from .models import OnlineProductionReport
+from .rollups import CELL_FIELDS, report_cell, refresh_report_cell
+
+
+def remember_rollup_cell(sender, instance, **kwargs):
+    """Keep the cell a report was loaded with, so an edit that moves it refreshes both cells"""
+    if not instance.pk or instance.get_deferred_fields().intersection(CELL_FIELDS):
+        # New report, or a partial (.only()) load that must not trigger extra queries
+        instance._rollup_cell = None
+        return
+    instance._rollup_cell = report_cell(instance)
+
+
+def report_saved(sender, instance, **kwargs):
+    new_cell = report_cell(instance)
+    old_cell = getattr(instance, '_rollup_cell', None)
+    if old_cell != new_cell:
+        refresh_report_cell(old_cell)
+    refresh_report_cell(new_cell)
+    instance._rollup_cell = new_cell
+
+
+def report_deleted(sender, instance, **kwargs):
+    refresh_report_cell(report_cell(instance))
+
+
+post_init.connect(remember_rollup_cell, sender=OnlineProductionReport, dispatch_uid="production_rollup_init")
+post_save.connect(report_saved, sender=OnlineProductionReport, dispatch_uid="production_rollup_save")
+post_delete.connect(report_deleted, sender=OnlineProductionReport, dispatch_uid="production_rollup_delete")
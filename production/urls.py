@@ -7,6 +7,7 @@ from .views import (
     OnlineProductionReportDetailAPI,
     OnlineProductionReportDeleteView,
     DailyProductionReportView,
+    ShiftProductionReportAPI,
 )
 
 urlpatterns = [
@@ -28,6 +29,7 @@ urlpatterns = [
     #_______________Daily Production Report________________
     path('online-production-report/list/', OnlineProductionReportListView.as_view(), name='online_production_report_list'),
     path('daily-production-report/', DailyProductionReportView.as_view(), name='daily_production_report'),
+    path('api/shift-production-report/', ShiftProductionReportAPI.as_view(), name='shift_production_report_api'),
 
 
     # path("total-production-report/", TotalProductionReportView.as_view(), name="total_production_report"),
@@ -1,11 +1,11 @@
 import json
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from Aluminium_Extrusions.pagination import KeysetPaginator
+from Aluminium_Extrusions.responses import FastJsonResponse as JsonResponse
 from django.views import View
-from django.core.paginator import Paginator
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from .models import OnlineProductionReport
+from .models import OnlineProductionReport, ShiftRollup
 from master.models import CompanyPress, CompanyShift, Staff
 from planning.models import ProductionPlan, DieRequisition
 from .forms import OnlineProductionReportForm
@@ -37,9 +37,8 @@ class OnlineProductionReportListView(View):
             ).order_by("-created_at")
         
         # ---------------- Pagination ----------------
-        paginator = Paginator(reports, 10)  # 10 per page
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(reports, 10)  # 10 per page
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
         
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -85,6 +84,8 @@ class OnlineProductionReportListView(View):
                     "reports": reports_list,
                     "current_page": page_obj.number,
                     "total_pages": paginator.num_pages,
+                    "next_cursor": page_obj.next_cursor,
+                    "previous_cursor": page_obj.previous_cursor,
                     "start_page": start_page,
                     "end_page": end_page,
                     "global_search": search_query,
@@ -568,9 +569,8 @@ class DailyProductionReportView(View):
         reports = reports.order_by("-created_at")
 
         # ---------------- Pagination ----------------
-        paginator = Paginator(reports, 20)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(reports, 20)
+        page_obj = paginator.get_page(request.GET.get("cursor"), request.GET.get("page"))
 
         start_page = max(page_obj.number - 2, 1)
         end_page = min(page_obj.number + 2, paginator.num_pages)
@@ -669,6 +669,8 @@ class DailyProductionReportView(View):
                 "reports": reports_list,
                 "current_page": page_obj.number,
                 "total_pages": paginator.num_pages,
+                "next_cursor": page_obj.next_cursor,
+                "previous_cursor": page_obj.previous_cursor,
                 "start_page": start_page,
                 "end_page": end_page,
                 "selected_date": selected_date,
@@ -814,4 +816,58 @@ class DailyProductionReportView(View):
 #             )
 #             created_count += 1
     
-#     return created_count
\ No newline at end of file
+#     return created_count
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API for Shift-wise Production Report (reads the precomputed ShiftRollup cells)
+# ─────────────────────────────────────────────────────────────────────────────
+class ShiftProductionReportAPI(View):
+    """
+    GET ?from=YYYY-MM-DD&to=YYYY-MM-DD[&press=<id>]
+    Totals per press, shift and production day. Defaults to today.
+    """
+
+    def get(self, request):
+        try:
+            today = datetime.now().date()
+            date_from = request.GET.get('from')
+            date_to = request.GET.get('to')
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else today
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else date_from
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Dates must be YYYY-MM-DD'}, status=400)
+
+        rollups = ShiftRollup.objects.select_related('press', 'shift').filter(
+            production_day__range=(date_from, date_to)
+        )
+        press_id = request.GET.get('press')
+        if press_id:
+            rollups = rollups.filter(press_id=press_id)
+
+        rows = []
+        for cell in rollups.order_by('production_day', 'press__name', 'shift__name'):
+            rows.append({
+                'production_day': cell.production_day.strftime('%Y-%m-%d'),
+                'press_id': cell.press_id,
+                'press': cell.press.name,
+                'shift_id': cell.shift_id,
+                'shift': cell.shift.name if cell.shift else 'Unassigned',
+                'timing': cell.shift.timing if cell.shift else '',
+                'readings': cell.reading_count,
+                'total_length': float(cell.total_length),
+                'avg_t_factor': round(float(cell.t_factor_sum) / cell.reading_count, 3) if cell.reading_count else None,
+                'reports': cell.report_count,
+                'input_qty': float(cell.input_qty),
+                'total_output': float(cell.total_output),
+                'no_of_pieces': cell.no_of_pieces,
+                'no_of_billet': cell.no_of_billet,
+                'recovery': cell.recovery,
+            })
+
+        return JsonResponse({
+            'success': True,
+            'from': date_from.strftime('%Y-%m-%d'),
+            'to': date_to.strftime('%Y-%m-%d'),
+            'rows': rows,
+        })
@@ -0,0 +1,224 @@
+"""
+Admission control for the LoRa ingest endpoint.
+
+LoraReceiveView accepts anything anyone posts, so a misbehaving gateway or
+a replay loop could keep every server thread and database connection busy
+storing readings while the dashboards wait. Before a reading is stored,
+`AdmissionController.admit` checks, in this process:
+
+- token buckets per gateway (the client address) and per sensor: a steady
+  rate plus a burst, so normal traffic and short catch-ups pass and a flood
+  is turned away;
+- a bounded number of readings being stored at once (max_in_flight), with
+  a bounded waiting room (queue_size, queue_timeout) in front of it. Ingest
+  can never hold more threads or connections than that, whatever the load.
+
+Backfill (requests marked `X-Ingest-Priority: bulk`, as replay_lora sends)
+may only use bulk_max_in_flight of the slots, so live readings are never
+stuck behind it. A reading's own timestamp is not used to tell: before
+raw_data.clock corrects it, a sensor whose clock runs behind would look like
+backfill and lose its live slots.
+
+A reading that is not admitted is deferred: the endpoint answers 429 with
+Retry-After and the gateway sends it again later. One the database fails to
+store (locked, connection lost) is deferred too, with 503. Counters of accepted,
+deferred and rejected readings are kept per process and shown by
+IngestAdmissionAPI. Limits apply per server process, like MasterDataLookup's
+tables are per process.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_ADMISSION_SETTINGS = {
+    'enabled': True,
+    'gateway_rate': 20.0,           # readings/s a gateway (client address) may send on average
+    'gateway_burst': 200,           # ... and at once, e.g. after a network outage
+    'sensor_rate': 2.0,             # readings/s per sensor; a press pushes far less often
+    'sensor_burst': 60,
+    'max_in_flight': 8,             # readings stored at once by this process
+    'bulk_max_in_flight': 2,        # of which backfill may take
+    'queue_size': 32,               # requests waiting for a slot; more are deferred at once
+    # Seconds a request waits for a slot before it is deferred; keep it well under
+    # INGEST_SEGMENT_GRACE_SECONDS, as a spooled reading is written after the wait
+    'queue_timeout': 2.0,
+    'max_buckets': 10000,           # least recently seen gateways / sensors are forgotten beyond this
+}
+
+BULK_HEADER = 'HTTP_X_INGEST_PRIORITY'
+
+
+def admission_settings():
+    options = dict(DEFAULT_ADMISSION_SETTINGS)
+    options.update(getattr(settings, 'INGEST_ADMISSION', {}))
+    return options
+
+
+class Deferred(Exception):
+    """A reading that was not admitted; the client should retry after `retry_after` seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Ingest is busy ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """`burst` tokens, refilled at `rate` per second"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate, self.burst = rate, burst
+        self.tokens, self.updated = float(burst), now
+
+    def wait(self, now):
+        """Seconds until a token is available (0 if one is)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def retry_after_seconds(wait):
+    return max(1, math.ceil(wait))
+
+
+class AdmissionController:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._buckets = OrderedDict()
+        self._in_flight = 0
+        self._waiting = 0
+        self._counters = {}
+
+    def _count(self, name, amount=1):
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record(self, name):
+        """Count an 'accepted' or 'rejected' reading"""
+        with self._lock:
+            self._count(name)
+
+    def _defer(self, reason, retry_after):
+        """Count a deferred reading (caller holds the lock) and return the Deferred to raise"""
+        self._count('deferred')
+        self._count(f"deferred_{reason.replace(' ', '_')}")
+        return Deferred(reason, retry_after)
+
+    def defer(self, reason, retry_after=1):
+        with self._lock:
+            return self._defer(reason, retry_after)
+
+    def _bucket(self, key, rate, burst, now, max_buckets):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            if len(self._buckets) > max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _take_tokens(self, gateway, sensor_name, options):
+        """Take a token from both buckets, or none if either is empty (caller holds the lock)"""
+        now = time.monotonic()
+        buckets = []
+        for kind, key in (('gateway', gateway), ('sensor', sensor_name)):
+            if key and options[f'{kind}_rate']:
+                buckets.append((kind, self._bucket(
+                    (kind, key), options[f'{kind}_rate'], options[f'{kind}_burst'], now, options['max_buckets'],
+                )))
+        for kind, bucket in buckets:
+            wait = bucket.wait(now)
+            if wait:
+                raise self._defer(f'{kind} rate', retry_after_seconds(wait))
+        for kind, bucket in buckets:
+            bucket.tokens -= 1
+        return [bucket for kind, bucket in buckets]
+
+    def _take_slot(self, bulk, options):
+        """Wait in the bounded queue for a storing slot (caller holds the lock)"""
+        limit = options['bulk_max_in_flight'] if bulk else options['max_in_flight']
+        if self._in_flight < limit:
+            self._in_flight += 1
+            return
+        if self._waiting >= options['queue_size']:
+            raise self._defer('queue full', retry_after_seconds(options['queue_timeout']))
+        self._waiting += 1
+        try:
+            admitted = self._slot_freed.wait_for(lambda: self._in_flight < limit, options['queue_timeout'])
+        finally:
+            self._waiting -= 1
+        if not admitted:
+            raise self._defer('queue timeout', retry_after_seconds(options['queue_timeout']))
+        self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            # Waiters have different limits (live / bulk): wake them all to re-check
+            self._slot_freed.notify_all()
+
+    @contextmanager
+    def admit(self, gateway, sensor_name, bulk=False):
+        """Hold a storing slot for one reading, or raise Deferred"""
+        options = admission_settings()
+        if not options['enabled']:
+            yield
+            return
+        with self._lock:
+            buckets = self._take_tokens(gateway, sensor_name, options)
+            try:
+                self._take_slot(bulk, options)
+            except Deferred:
+                for bucket in buckets:
+                    bucket.tokens = min(bucket.burst, bucket.tokens + 1)  # not stored, so not charged
+                raise
+            if bulk:
+                self._count('bulk')
+        try:
+            yield
+        finally:
+            self._release()
+
+    def snapshot(self):
+        with self._lock:
+            counters = {'accepted': 0, 'deferred': 0, 'rejected': 0, 'bulk': 0}
+            counters.update(self._counters)
+            return {
+                'counters': counters,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'tracked_buckets': len(self._buckets),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._counters.clear()
+
+
+controller = AdmissionController()
+
+
+def gateway_of(request):
+    """
+    The client address: REMOTE_ADDR, or X-Forwarded-For read like DRF throttles
+    when REST_FRAMEWORK['NUM_PROXIES'] trusts proxies in front. An untrusted
+    header would let a client pick a fresh bucket with every request.
+    """
+    if not api_settings.NUM_PROXIES:
+        return request.META.get('REMOTE_ADDR')
+    return BaseThrottle().get_ident(request)
+
+
+def is_bulk(request):
+    """Backfill: marked so by the sender"""
+    return request.META.get(BULK_HEADER, '').strip().lower() == 'bulk'
@@ -0,0 +1,240 @@
+"""
+Streaming anomaly detection on t-factor and length.
+
+raw_data.ingest hands every stored reading to `check_reading`, which looks
+at the ReadingStats rows of its (sensor, die number) pair, one per metric,
+and updates them in O(1):
+
+* Welford's running mean / variance over every reading,
+* an exponentially weighted mean / variance (alpha) that follows slow drift,
+* P² sketches (Jain & Chlamtac) of the low and high quantiles, five markers
+  each, so the tails are known without keeping the readings.
+
+After a warm-up, a value is out of band when it is more than `z` EWMA
+standard deviations from the EWMA mean *and* outside the sketched quantile
+range, i.e. outside the wider of the two bands. It is judged before being
+folded into the statistics. Each hit writes a ReadingAlert; further hits of
+the same metric within the cool-down of the last, unacknowledged alert only
+bump its `repeats`. History is never rescanned.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ReadingStats, ReadingAlert
+
+DEFAULT_ANOMALY_SETTINGS = {
+    'warmup': 30,                # readings before a pair can raise alerts
+    'alpha': 0.05,               # EWMA weight of the newest reading
+    'z': 4.0,                    # band half-width in EWMA standard deviations
+    'quantiles': (0.005, 0.995), # P² tails that must be exceeded as well
+    'min_relative_spread': 0.01, # std floor as a share of the mean (constant signals)
+    'cooldown_seconds': 300,     # repeats within this fold into the open alert
+}
+
+METRICS = ('t_factor', 'length')
+
+
+def anomaly_settings():
+    options = dict(DEFAULT_ANOMALY_SETTINGS)
+    options.update(getattr(settings, 'READING_ANOMALY', {}))
+    return options
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# P² quantile sketch
+# ─────────────────────────────────────────────────────────────────────────────
+def p2_new(p):
+    return {'p': p, 'q': [], 'n': [], 'np': []}
+
+
+def p2_add(state, x):
+    """Add one observation to a P² sketch (a JSON-able dict, updated in place)"""
+    q, n = state['q'], state['n']
+    if len(q) < 5:
+        q.append(x)
+        q.sort()
+        if len(q) == 5:
+            p = state['p']
+            state['n'] = [0, 1, 2, 3, 4]
+            state['np'] = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        return
+
+    p = state['p']
+    if x < q[0]:
+        q[0] = x
+        k = 0
+    elif x >= q[4]:
+        q[4] = x
+        k = 3
+    else:
+        k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+    for i in range(k + 1, 5):
+        n[i] += 1
+    state['np'] = [desired + step for desired, step in zip(state['np'], (0, p / 2, p, (1 + p) / 2, 1))]
+
+    for i in (1, 2, 3):
+        d = state['np'][i] - n[i]
+        if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+            d = 1 if d > 0 else -1
+            parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+            )
+            if q[i - 1] < parabolic < q[i + 1]:
+                q[i] = parabolic
+            else:
+                q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+            n[i] += d
+
+
+def p2_value(state):
+    """Current quantile estimate (None before the first observation)"""
+    q = state['q']
+    if not q:
+        return None
+    if len(q) < 5:
+        return q[min(len(q) - 1, int(round(state['p'] * (len(q) - 1))))]
+    return q[2]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Detection
+# ─────────────────────────────────────────────────────────────────────────────
+def band(stats, options):
+    """(low, high, expected, spread) of the normal range, or None while warming up"""
+    if stats.count < options['warmup']:
+        return None
+    spread = max(stats.ewm_var ** 0.5, abs(stats.ewma) * options['min_relative_spread'])
+    low = stats.ewma - options['z'] * spread
+    high = stats.ewma + options['z'] * spread
+    tail_low = p2_value(stats.sketch.get('low', {'q': []}))
+    tail_high = p2_value(stats.sketch.get('high', {'q': []}))
+    if tail_low is not None:
+        low = min(low, tail_low)
+    if tail_high is not None:
+        high = max(high, tail_high)
+    return low, high, stats.ewma, spread
+
+
+def _fold(stats, x, options, normal=None):
+    """Welford, EWMA and sketch updates for one value (clipped to `normal` for the EWMA)"""
+    stats.count += 1
+    delta = x - stats.mean
+    stats.mean += delta / stats.count
+    stats.m2 += delta * (x - stats.mean)
+
+    if stats.count == 1:
+        stats.ewma, stats.ewm_var = x, 0.0
+    else:
+        alpha = options['alpha']
+        # An outlier clipped to the band edge, so one bad push does not blind the band
+        diff = (min(max(x, normal[0]), normal[1]) if normal else x) - stats.ewma
+        stats.ewma += alpha * diff
+        stats.ewm_var = (1 - alpha) * (stats.ewm_var + alpha * diff * diff)
+
+    low_p, high_p = options['quantiles']
+    sketch = stats.sketch or {}
+    sketch.setdefault('low', p2_new(low_p))
+    sketch.setdefault('high', p2_new(high_p))
+    p2_add(sketch['low'], x)
+    p2_add(sketch['high'], x)
+    stats.sketch = sketch
+
+
+def check_reading(raw_obj, options=None):
+    """Judge and fold one stored Raw_data row; call inside the ingest transaction. Returns new alerts"""
+    options = options or anomaly_settings()
+    values = {'t_factor': float(raw_obj.t_factor), 'length': float(raw_obj.length)}
+    now = timezone.now()
+    alerts = []
+
+    for metric in METRICS:
+        # Only the stats row is locked; last_alert is loaded when a reading is out of band
+        stats, _ = ReadingStats.objects.select_for_update().get_or_create(
+            sensor_name=raw_obj.sensor_name,
+            die_number=raw_obj.die_number,
+            metric=metric,
+            defaults={'die_id': raw_obj.die_id},
+        )
+        x = values[metric]
+        normal = band(stats, options)
+        if normal is not None and not normal[0] <= x <= normal[1]:
+            alert = _raise(stats, raw_obj, metric, x, normal, now, options)
+            if alert is not None:
+                alerts.append(alert)
+        _fold(stats, x, options, normal)
+        if raw_obj.die_id and stats.die_id != raw_obj.die_id:
+            stats.die_id = raw_obj.die_id
+        stats.save()
+    return alerts
+
+
+def _raise(stats, raw_obj, metric, x, normal, now, options):
+    low, high, expected, spread = normal
+    open_alert = stats.last_alert
+    if (
+        open_alert is not None
+        and open_alert.acknowledged_at is None
+        and (now - open_alert.last_seen_at).total_seconds() < options['cooldown_seconds']
+    ):
+        open_alert.repeats += 1
+        open_alert.last_seen_at = now
+        open_alert.save(update_fields=['repeats', 'last_seen_at'])
+        return None
+    stats.last_alert = ReadingAlert.objects.create(
+        sensor_name=raw_obj.sensor_name,
+        die_number=raw_obj.die_number,
+        die_id=raw_obj.die_id,
+        press_id=raw_obj.press_id,
+        metric=metric,
+        value=x,
+        expected=round(expected, 4),
+        band_low=round(low, 4),
+        band_high=round(high, 4),
+        score=round((x - expected) / spread, 2) if spread else 0.0,
+        reading_time=raw_obj.datetime,
+        last_seen_at=now,
+    )
+    return stats.last_alert
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Read side
+# ─────────────────────────────────────────────────────────────────────────────
+def alert_as_dict(alert):
+    return {
+        'id': alert.id,
+        'sensor': alert.sensor_name,
+        'die_number': alert.die_number,
+        'die_id': alert.die_id,
+        'press_id': alert.press_id,
+        'metric': alert.metric,
+        'value': alert.value,
+        'expected': alert.expected,
+        'band': [alert.band_low, alert.band_high],
+        'score': alert.score,
+        'reading_time': timezone.localtime(alert.reading_time).strftime("%Y-%m-%d %H:%M:%S"),
+        'repeats': alert.repeats,
+        'acknowledged': alert.acknowledged_at is not None,
+    }
+
+
+def open_alerts():
+    return ReadingAlert.objects.filter(acknowledged_at__isnull=True)
+
+
+def stats_summary(die_id):
+    """Running statistics of every sensor that pushed a die, per metric"""
+    summary = []
+    for stats in ReadingStats.objects.filter(die_id=die_id).order_by('sensor_name', 'metric'):
+        normal = band(stats, anomaly_settings())
+        summary.append({
+            'sensor': stats.sensor_name,
+            'metric': stats.metric,
+            'count': stats.count,
+            'mean': round(stats.mean, 4),
+            'std': round(stats.std, 4),
+            'ewma': round(stats.ewma, 4),
+            'band': [round(normal[0], 4), round(normal[1], 4)] if normal else None,
+        })
+    return summary
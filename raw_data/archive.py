@@ -0,0 +1,420 @@
+"""
+Compact archive tier for cold Raw_data readings.
+
+Old readings are moved out of raw_machine_data into one binary segment file
+per sensor and (local) month (RAW_ARCHIVE_DIR/<sensor>/<YYYY-MM>.seg):
+
+    b'RAWSEG01' | uint32 header length | JSON header | padding to 8 bytes | records
+
+The JSON header holds the die dictionary ([die_number, die_id] per code) and
+the press dictionary ([press_id] per code). Records are fixed-width,
+little-endian, sorted by time (RECORD below, 20 bytes each):
+
+    int64  time     microseconds since the Unix epoch (UTC)
+    int32  t_factor t-factor * 1000
+    int32  length   length * 100
+    uint16 die      code into the die dictionary
+    uint16 press    code into the press dictionary
+
+Segments are read through numpy.memmap and binary-searched on time.
+`iter_readings` merges archived and live readings, so callers do not need
+to know where a reading is stored. The rebuild commands (die usage, shift
+rollups, chart buckets, order progress) add `archived_readings` to their
+totals from the live table, and the dashboards add `archived_counts` and
+`archived_lengths`.
+"""
+import heapq
+import json
+import os
+import re
+import struct
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Raw_data
+
+MAGIC = b'RAWSEG01'
+PREFIX = struct.Struct('<8sI')
+RECORD = struct.Struct('<qiiHH')
+
+T_FACTOR_SCALE = 1000
+LENGTH_SCALE = 100
+MAX_CODES = 0xFFFF
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_SEGMENT_RE = re.compile(r'^(?P<month>\d{4}-\d{2})\.seg$')
+
+Reading = namedtuple(
+    'Reading',
+    ['datetime', 'sensor_name', 't_factor', 'die_number', 'die_id', 'press_id', 'length'],
+)
+
+
+class ArchiveError(ValueError):
+    """Raised for unreadable or inconsistent segment files"""
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("The reading archive requires numpy (pip install numpy)")
+    return np
+
+
+def record_dtype():
+    """NumPy view of RECORD (packed, little-endian)"""
+    np = _numpy()
+    return np.dtype([('time', '<i8'), ('t_factor', '<i4'), ('length', '<i4'), ('die', '<u2'), ('press', '<u2')])
+
+
+def archive_dir():
+    return str(settings.RAW_ARCHIVE_DIR)
+
+
+def _sensor_dir_name(sensor_name):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', sensor_name)
+
+
+def segment_path(sensor_name, month, root=None):
+    return os.path.join(root or archive_dir(), _sensor_dir_name(sensor_name), f"{month}.seg")
+
+
+def to_micros(value):
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value):
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Segment files
+# ─────────────────────────────────────────────────────────────────────────────
+class Segment:
+    """One memory-mapped segment file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, header_len = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ArchiveError(f"{path} is not a reading segment")
+            self.header = json.loads(f.read(header_len))
+        self.offset = self.header['data_offset']
+        self.count = self.header['count']
+        self.sensor_name = self.header['sensor']
+        self.dies = [tuple(entry) for entry in self.header['dies']]
+        self.presses = self.header['presses']
+        self._records = None
+        self._die_lengths = None
+
+    @property
+    def records(self):
+        if self._records is None:
+            np = _numpy()
+            if self.count:
+                self._records = np.memmap(self.path, dtype=record_dtype(), mode='r', offset=self.offset, shape=(self.count,))
+            else:
+                self._records = np.empty(0, dtype=record_dtype())
+        return self._records
+
+    def slice(self, start=None, end=None):
+        """Records with start <= time < end (binary search on the sorted time column)"""
+        np = _numpy()
+        times = self.records['time']
+        lo = int(np.searchsorted(times, to_micros(start), 'left')) if start else 0
+        hi = int(np.searchsorted(times, to_micros(end), 'left')) if end else self.count
+        return self.records[lo:hi]
+
+    def readings(self, start=None, end=None, press_id=None, newest_first=False, die_ids=None):
+        records = self.slice(start, end)
+        if press_id is not None:
+            if press_id not in self.presses:
+                return
+            records = records[records['press'] == self.presses.index(press_id)]
+        if die_ids is not None:
+            codes = [code for code, (_, die_id) in enumerate(self.dies) if die_id in die_ids]
+            if not codes:
+                return
+            records = records[_numpy().isin(records['die'], codes)]
+        if newest_first:
+            records = records[::-1]
+        for time_us, t_factor, length, die, press in records.tolist():
+            die_number, die_id = self.dies[die]
+            yield Reading(
+                datetime=from_micros(time_us),
+                sensor_name=self.sensor_name,
+                t_factor=Decimal(t_factor) / T_FACTOR_SCALE,
+                die_number=die_number,
+                die_id=die_id,
+                press_id=self.presses[press],
+                length=Decimal(length) / LENGTH_SCALE,
+            )
+
+    def die_lengths(self):
+        """{(die_number, die_id): total length} over the segment, summed once per file version"""
+        if self._die_lengths is None:
+            np = _numpy()
+            totals = np.bincount(self.records['die'], weights=self.records['length'], minlength=len(self.dies))
+            self._die_lengths = {
+                self.dies[code]: Decimal(int(round(total))) / LENGTH_SCALE
+                for code, total in enumerate(totals.tolist()) if total
+            }
+        return self._die_lengths
+
+    def rows(self):
+        """All records as (time_us, t_factor, length, die_number, die_id, press_id) tuples"""
+        for time_us, t_factor, length, die, press in self.records.tolist():
+            die_number, die_id = self.dies[die]
+            yield time_us, t_factor, length, die_number, die_id, self.presses[press]
+
+
+def write_segment(path, sensor_name, month, rows):
+    """
+    Write `rows` of (time_us, t_factor_milli, length_centi, die_number, die_id, press_id)
+    to `path`.tmp; the caller moves it over `path` with os.replace. Returns the tmp path.
+    """
+    rows = sorted(rows, key=lambda row: row[0])
+    dies, presses = {}, {}
+    for row in rows:
+        dies.setdefault((row[3], row[4]), len(dies))
+        presses.setdefault(row[5], len(presses))
+    if len(dies) > MAX_CODES or len(presses) > MAX_CODES:
+        raise ArchiveError(f"Too many distinct dies/presses for one segment ({sensor_name} {month})")
+
+    header = {
+        'sensor': sensor_name,
+        'month': month,
+        'count': len(rows),
+        'first': rows[0][0] if rows else None,
+        'last': rows[-1][0] if rows else None,
+        'dies': [list(key) for key in dies],
+        'presses': list(presses),
+        'data_offset': 0,
+    }
+    # The data offset is part of the header itself, so resize until it is stable
+    while True:
+        header_bytes = json.dumps(header, separators=(',', ':')).encode()
+        data_offset = PREFIX.size + len(header_bytes)
+        data_offset += -data_offset % 8
+        if data_offset == header['data_offset']:
+            break
+        header['data_offset'] = data_offset
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_offset - PREFIX.size - len(header_bytes)))
+        pack = RECORD.pack
+        f.write(b''.join(
+            pack(time_us, t_factor, length, dies[(die_number, die_id)], presses[press_id])
+            for time_us, t_factor, length, die_number, die_id, press_id in rows
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path
+
+
+class SegmentCatalog:
+    """Headers of every segment under the archive directory, reloaded when a file changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segments = {}
+
+    def segments(self, sensor_name=None, root=None):
+        root = root or archive_dir()
+        if not os.path.isdir(root):
+            return []
+        directories = [_sensor_dir_name(sensor_name)] if sensor_name else sorted(os.listdir(root))
+        found = []
+        with self._lock:
+            for directory in directories:
+                full = os.path.join(root, directory)
+                if not os.path.isdir(full):
+                    continue
+                for filename in sorted(os.listdir(full)):
+                    if not _SEGMENT_RE.match(filename):
+                        continue
+                    path = os.path.join(full, filename)
+                    mtime = os.stat(path).st_mtime_ns
+                    cached = self._segments.get(path)
+                    if cached is None or cached[0] != mtime:
+                        cached = (mtime, Segment(path))
+                        self._segments[path] = cached
+                    found.append(cached[1])
+        if sensor_name:
+            found = [segment for segment in found if segment.sensor_name == sensor_name]
+        return found
+
+
+catalog = SegmentCatalog()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Archiving
+# ─────────────────────────────────────────────────────────────────────────────
+def _live_row(time_value, t_factor, length, die_number, die_id, press_id):
+    return (
+        to_micros(time_value),
+        int(Decimal(t_factor) * T_FACTOR_SCALE),
+        int(Decimal(length) * LENGTH_SCALE),
+        die_number,
+        die_id,
+        press_id,
+    )
+
+
+def _merge(existing, rows):
+    """
+    `existing` plus the `rows` not already in it. Readings are matched on
+    their time (the sensor is the segment's), counting duplicates, so
+    archiving the same live rows again after an interrupted run adds nothing.
+    """
+    counts = {}
+    for row in existing:
+        counts[row[0]] = counts.get(row[0], 0) + 1
+    merged = list(existing)
+    for row in rows:
+        if counts.get(row[0]):
+            counts[row[0]] -= 1
+        else:
+            merged.append(row)
+    return merged
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def archive_month(sensor_name, month, ids, rows, root=None):
+    """
+    Merge `rows` (live readings of one sensor and month, with their Raw_data `ids`)
+    into the segment file, then delete them from raw_machine_data.
+    """
+    path = segment_path(sensor_name, month, root)
+    existing = list(Segment(path).rows()) if os.path.exists(path) else []
+    tmp_path = write_segment(path, sensor_name, month, _merge(existing, rows))
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    _fsync_dir(os.path.dirname(path))
+    # Only once the segment is on disk: a failed delete leaves the rows in both places and a re-run merges nothing twice
+    with transaction.atomic():
+        for start in range(0, len(ids), 1000):
+            Raw_data.objects.filter(id__in=ids[start:start + 1000]).delete()
+    return len(rows)
+
+
+def archive_before(cutoff, sensor_name=None, root=None, stdout=None):
+    """Move every reading older than `cutoff` into the archive. Returns the number archived"""
+    queryset = Raw_data.objects.filter(datetime__lt=cutoff)
+    if sensor_name:
+        queryset = queryset.filter(sensor_name=sensor_name)
+    sensors = queryset.order_by().values_list('sensor_name', flat=True).distinct()
+
+    archived = 0
+    for sensor in sorted(sensors):
+        month, ids, rows = None, [], []
+        readings = queryset.filter(sensor_name=sensor).order_by('datetime', 'id').values_list(
+            'id', 'datetime', 't_factor', 'die_number', 'die_id', 'press_id', 'length'
+        )
+        for raw_id, time_value, t_factor, die_number, die_id, press_id, length in readings.iterator(chunk_size=5000):
+            reading_month = timezone.localtime(time_value).strftime('%Y-%m')
+            if month is not None and reading_month != month:
+                archived += archive_month(sensor, month, ids, rows, root)
+                if stdout:
+                    stdout.write(f"  {sensor} {month}: {len(rows)} readings")
+                ids, rows = [], []
+            month = reading_month
+            ids.append(raw_id)
+            rows.append(_live_row(time_value, t_factor, length, die_number, die_id, press_id))
+        if rows:
+            archived += archive_month(sensor, month, ids, rows, root)
+            if stdout:
+                stdout.write(f"  {sensor} {month}: {len(rows)} readings")
+    return archived
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Queries over archive + live table
+# ─────────────────────────────────────────────────────────────────────────────
+def archived_readings(start=None, die_ids=None, root=None):
+    """
+    Every archived reading (from `start`, of `die_ids`), segment by segment
+    and not in time order: for rebuilds that add them to live totals.
+    """
+    for segment in catalog.segments(root=root):
+        last = segment.header['last']
+        if last is None or (start and last < to_micros(start)):
+            continue
+        yield from segment.readings(start, die_ids=die_ids)
+
+
+def archived_counts(sensor_names=None, root=None):
+    """Archived readings per sensor, from the segment headers"""
+    counts = {}
+    for segment in catalog.segments(root=root):
+        if sensor_names is None or segment.sensor_name in sensor_names:
+            counts[segment.sensor_name] = counts.get(segment.sensor_name, 0) + segment.count
+    return counts
+
+
+def archived_lengths(die_ids=(), die_numbers=(), root=None):
+    """
+    Archived length per die id, and per die number for readings without a
+    die, like PressProductionDataView sums the live table.
+    """
+    by_die, by_number = {}, {}
+    for segment in catalog.segments(root=root):
+        for (die_number, die_id), total in segment.die_lengths().items():
+            if die_id is not None and die_id in die_ids:
+                by_die[die_id] = by_die.get(die_id, 0) + total
+            elif die_id is None and die_number in die_numbers:
+                by_number[die_number] = by_number.get(die_number, 0) + total
+    return by_die, by_number
+
+
+def iter_readings(sensor_name=None, press_id=None, start=None, end=None, newest_first=False, root=None):
+    """
+    Readings with start <= datetime < end for a sensor and/or press, merged
+    from archive segments and raw_machine_data in time order.
+    """
+    live = Raw_data.objects.all()
+    if sensor_name:
+        live = live.filter(sensor_name=sensor_name)
+    if press_id is not None:
+        live = live.filter(press_id=press_id)
+    if start:
+        live = live.filter(datetime__gte=start)
+    if end:
+        live = live.filter(datetime__lt=end)
+    live = live.order_by('-datetime' if newest_first else 'datetime').values_list(
+        'datetime', 'sensor_name', 't_factor', 'die_number', 'die_id', 'press_id', 'length'
+    )
+
+    sources = [(Reading(*row) for row in live.iterator(chunk_size=2000))]
+    for segment in catalog.segments(sensor_name, root):
+        first, last = segment.header['first'], segment.header['last']
+        if first is None or (end and first >= to_micros(end)) or (start and last < to_micros(start)):
+            continue
+        sources.append(segment.readings(start, end, press_id=press_id, newest_first=newest_first))
+
+    if len(sources) == 1:
+        return sources[0]
+    return heapq.merge(*sources, key=lambda reading: reading.datetime, reverse=newest_first)
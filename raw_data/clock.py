@@ -0,0 +1,147 @@
+"""
+Sensor clock correction and event-time watermarks.
+
+Readings carry the sensor's own timestamp (whole seconds, no time zone).
+Sensor clocks drift, and gateways replay their buffers late, so arrival order
+says little about reading time. For every reading `observe`:
+
+* estimates the sensor's clock offset as the smallest (received - sensor
+  time) seen in a window of SENSOR_CLOCK_WINDOW_SECONDS. Delivery delay is
+  never negative, so the minimum is the skew plus the best-case delay; a
+  sample below the estimate lowers it at once. A higher window minimum may
+  just be a buffer replayed after an outage, so the estimate only rises by
+  SENSOR_CLOCK_MAX_DRIFT_SECONDS per window, unless the same minimum (within
+  the tolerance) holds for SENSOR_CLOCK_CONFIRM_WINDOWS windows in a row, as
+  after a clock step. Offsets beyond the tolerance are applied; offsets
+  beyond SENSOR_CLOCK_MAX_OFFSET_SECONDS are taken for a replay rather than
+  a wrong clock and left alone.
+* keeps a watermark per sensor, the latest corrected reading time minus
+  SENSOR_ALLOWED_LATENESS_SECONDS. A reading behind the watermark is late,
+  and chart buckets ending at or before it are final (raw_data.timeseries).
+
+`advance_idle` moves the watermark of sensors that stopped sending along
+the server clock, so their last buckets become final too.
+
+Sensor times are read in TIME_ZONE. A sensor set to another zone shows the
+zone difference as clock offset: up to SENSOR_CLOCK_MAX_OFFSET_SECONDS it is
+corrected like skew, beyond it readings keep their (wrong) time. Set
+TIME_ZONE to the plant's zone when the sensors keep local time.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SensorClock
+from . import timeseries
+
+Observation = namedtuple('Observation', ['reading_time', 'offset', 'late'])
+
+
+def _close_window(clock, window_min):
+    """Move the estimate to a finished window's minimum: down at once, up gradually or once confirmed"""
+    if abs(window_min) > settings.SENSOR_CLOCK_MAX_OFFSET_SECONDS:
+        return
+    if window_min <= clock.offset_seconds:
+        clock.offset_seconds = window_min
+        clock.candidate_offset, clock.candidate_windows = None, 0
+        return
+    # Higher: a clock that fell behind, or a backlog replayed late. Only the clock stays put window after window
+    if clock.candidate_offset is not None and abs(window_min - clock.candidate_offset) <= settings.SENSOR_CLOCK_TOLERANCE_SECONDS:
+        clock.candidate_windows += 1
+    else:
+        clock.candidate_windows = 1
+    clock.candidate_offset = window_min
+    if clock.candidate_windows >= settings.SENSOR_CLOCK_CONFIRM_WINDOWS:
+        clock.offset_seconds = window_min
+        clock.candidate_offset, clock.candidate_windows = None, 0
+    else:
+        clock.offset_seconds = min(window_min, clock.offset_seconds + settings.SENSOR_CLOCK_MAX_DRIFT_SECONDS)
+
+
+def _update_offset(clock, sample, received_at):
+    """Fold one (received - sensor time) sample into the offset window"""
+    plausible = abs(sample) <= settings.SENSOR_CLOCK_MAX_OFFSET_SECONDS
+    if clock.window_started_at is None:
+        clock.window_started_at, clock.window_min = received_at, sample
+        if plausible:
+            clock.offset_seconds = sample
+        return
+    clock.window_min = sample if clock.window_min is None else min(clock.window_min, sample)
+    if plausible and sample < clock.offset_seconds:
+        # Arrived sooner than the estimate allows, so the estimate is too high: lower it now
+        clock.offset_seconds = sample
+        clock.candidate_offset, clock.candidate_windows = None, 0
+    if (received_at - clock.window_started_at).total_seconds() >= settings.SENSOR_CLOCK_WINDOW_SECONDS:
+        _close_window(clock, clock.window_min)
+        clock.window_started_at, clock.window_min = received_at, sample
+
+
+def _advance(clock, watermark):
+    """Move the watermark forward (never back); finalize buckets when it enters a new minute"""
+    previous = clock.watermark
+    if previous is not None and watermark <= previous:
+        return
+    clock.watermark = watermark
+    if previous is None or timeseries.bucket_start(watermark, 60) != timeseries.bucket_start(previous, 60):
+        timeseries.finalize(clock.sensor_name, watermark)
+
+
+def observe(sensor_name, sensor_time, received_at=None):
+    """
+    Corrected time of a reading and whether it is late. Call inside the ingest
+    transaction: the sensor's clock row stays locked until it commits.
+    Without `received_at` (readings corrected upstream, e.g. on an edge node)
+    the offset is neither estimated nor applied.
+    """
+    clock, _ = SensorClock.objects.select_for_update().get_or_create(sensor_name=sensor_name)
+    now = timezone.now()
+
+    reading_time, offset = sensor_time, None
+    if received_at is not None:
+        _update_offset(clock, (received_at - sensor_time).total_seconds(), received_at)
+        if abs(clock.offset_seconds) > settings.SENSOR_CLOCK_TOLERANCE_SECONDS:
+            offset = clock.offset_seconds
+            reading_time = min(sensor_time + timedelta(seconds=offset), received_at)
+
+    late = clock.watermark is not None and reading_time < clock.watermark
+    clock.readings += 1
+    clock.late_readings += int(late)
+    clock.last_received_at = received_at or now
+
+    # A clock running ahead must not push the watermark into the future
+    event_time = min(reading_time, received_at or now)
+    if clock.max_event_time is None or event_time > clock.max_event_time:
+        clock.max_event_time = event_time
+        _advance(clock, event_time - timedelta(seconds=settings.SENSOR_ALLOWED_LATENESS_SECONDS))
+
+    clock.save()
+    return Observation(reading_time, offset, late)
+
+
+def advance_idle(now=None):
+    """Watermarks of sensors silent for SENSOR_IDLE_SECONDS follow the server clock. Returns the sensors moved"""
+    now = now or timezone.now()
+    idle = SensorClock.objects.filter(last_received_at__lt=now - timedelta(seconds=settings.SENSOR_IDLE_SECONDS))
+    watermark = now - timedelta(seconds=settings.SENSOR_ALLOWED_LATENESS_SECONDS)
+    moved = []
+    for clock_id in idle.filter(watermark__lt=watermark).values_list('id', flat=True):
+        with transaction.atomic():
+            # Re-checked under the lock: the sensor may have just sent a reading
+            clock = idle.select_for_update().filter(id=clock_id, watermark__lt=watermark).first()
+            if clock is None:
+                continue
+            _advance(clock, watermark)
+            clock.save(update_fields=['watermark', 'updated_at'])
+            moved.append(clock.sensor_name)
+    return moved
+
+
+def finalize_all():
+    """Re-apply every sensor's watermark to its buckets (after rebuild_reading_buckets). Returns buckets finalized"""
+    return sum(
+        timeseries.finalize(sensor_name, watermark)
+        for sensor_name, watermark in SensorClock.objects.exclude(watermark=None).values_list('sensor_name', 'watermark')
+    )
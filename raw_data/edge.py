@@ -0,0 +1,152 @@
+"""
+Store-and-forward sync between a press-side edge node and the central database.
+
+On an edge node (settings.EDGE_NODE_ID set) LoraReceiveView ingests into a
+local SQLite database in WAL mode, so readings are stored even while the
+network or the central MySQL server is down. Two idempotent steps move them on:
+
+1. `sync_edge_readings` (on the edge) copies Raw_data rows after the
+   EdgeSyncCheckpoint into the central edge_reading table. Every row carries
+   a unique edge_uid (node:epoch:edge id) and is inserted with
+   ignore_conflicts, so a batch that was committed centrally but not
+   checkpointed locally (crash, dropped connection) is simply sent again.
+2. `apply_edge_readings` (on the central server) runs each pending
+   EdgeReading through ingest.store_reading and marks it applied in the same
+   transaction, so die usage, order progress, rollups and chart buckets are
+   updated exactly once and central ids stay the central database's own.
+
+Readings are sent in edge id order, i.e. the order they were received. Do not
+archive raw data on an edge node before it has been synced.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .ingest import store_reading
+from .models import Raw_data, EdgeReading, EdgeSyncCheckpoint
+
+logger = logging.getLogger(__name__)
+
+SYNC_FIELDS = ['id', 'sensor_name', 'datetime', 't_factor', 'die_number', 'length']
+
+
+def central_alias():
+    return settings.EDGE_CENTRAL_ALIAS
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Edge side
+# ─────────────────────────────────────────────────────────────────────────────
+def get_checkpoint(target=None):
+    checkpoint, _ = EdgeSyncCheckpoint.objects.get_or_create(
+        target=target or central_alias(),
+        defaults={'epoch': uuid.uuid4().hex[:8]},
+    )
+    return checkpoint
+
+
+def backlog(checkpoint):
+    """Readings received on this node and not yet shipped"""
+    return Raw_data.objects.filter(id__gt=checkpoint.last_id)
+
+
+def sync_batch(checkpoint, node=None, target=None, batch_size=None):
+    """Ship the next batch after the checkpoint. Returns the number of readings sent"""
+    node = node or settings.EDGE_NODE_ID
+    target = target or central_alias()
+    rows = list(
+        backlog(checkpoint).order_by('id').values(*SYNC_FIELDS)[:batch_size or settings.EDGE_SYNC_BATCH_SIZE]
+    )
+    if not rows:
+        return 0
+
+    with transaction.atomic(using=target):
+        EdgeReading.objects.using(target).bulk_create(
+            [
+                EdgeReading(
+                    edge_uid=f"{node}:{checkpoint.epoch}:{row['id']}",
+                    node=node,
+                    sensor_name=row['sensor_name'],
+                    datetime=row['datetime'],
+                    t_factor=row['t_factor'],
+                    die_number=row['die_number'],
+                    length=row['length'],
+                )
+                for row in rows
+            ],
+            ignore_conflicts=True,
+        )
+
+    # Only after the central commit; losing this write just re-sends the batch
+    checkpoint.last_id = rows[-1]['id']
+    checkpoint.rows_sent += len(rows)
+    checkpoint.last_success_at = timezone.now()
+    checkpoint.save(update_fields=['last_id', 'rows_sent', 'last_success_at'])
+    return len(rows)
+
+
+def sync(node=None, target=None, batch_size=None):
+    """Ship everything pending. Returns the number sent; connection errors are recorded and re-raised"""
+    target = target or central_alias()
+    checkpoint = get_checkpoint(target)
+    sent = 0
+    try:
+        while True:
+            shipped = sync_batch(checkpoint, node, target, batch_size)
+            if not shipped:
+                return sent
+            sent += shipped
+    except Exception as e:
+        # A half-open connection would fail every retry; reconnect next time
+        connections[target].close()
+        checkpoint.last_error = f"{type(e).__name__}: {e}"
+        checkpoint.last_error_at = timezone.now()
+        checkpoint.save(update_fields=['last_error', 'last_error_at'])
+        raise
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Central side
+# ─────────────────────────────────────────────────────────────────────────────
+def pending():
+    return EdgeReading.objects.filter(applied_at__isnull=True)
+
+
+def apply_batch(batch_size=None):
+    """Ingest the next pending edge readings. Returns the number applied"""
+    applied = 0
+    ids = list(
+        pending().order_by('id').values_list('id', flat=True)[:batch_size or settings.EDGE_SYNC_BATCH_SIZE]
+    )
+    for edge_reading_id in ids:
+        with transaction.atomic():
+            # skip_locked: several appliers can run side by side
+            edge_reading = (
+                pending().select_for_update(skip_locked=True).filter(id=edge_reading_id).first()
+            )
+            if edge_reading is None:
+                continue
+            raw_obj, _ = store_reading(
+                edge_reading.sensor_name,
+                edge_reading.datetime,
+                edge_reading.t_factor,
+                edge_reading.die_number,
+                edge_reading.length,
+            )
+            edge_reading.raw_data = raw_obj
+            edge_reading.applied_at = timezone.now()
+            edge_reading.save(update_fields=['raw_data', 'applied_at'])
+        applied += 1
+    return applied
+
+
+def apply_pending(batch_size=None):
+    applied = 0
+    while True:
+        done = apply_batch(batch_size)
+        if not done:
+            return applied
+        applied += done
@@ -0,0 +1,393 @@
+"""
+Columnar (Parquet) export of sensor and production history.
+
+Each dataset is written under PARQUET_EXPORT_DIR as hive-style partitions,
+e.g. raw_machine_data/month=2025-10/sensor=1234/part-<run>.parquet, with an
+explicit Arrow schema. Rows are read from the database in keyset-ordered
+chunks, so memory stays flat whatever the table size. An ExportCheckpoint
+per dataset records the cursor; the next run only appends newer rows.
+
+Ids are handed out at insert but become visible at commit, so a row can
+appear below the cursor after a run has passed it (a long transaction, a
+lagging replica). The ids a run skips are kept in the checkpoint's `gaps`,
+and every run looks them up again and exports the rows that have turned up.
+Gaps older than PARQUET_EXPORT_LATE_COMMIT_SECONDS are dropped (rolled back
+or deleted rows).
+
+online_production_report rows can be edited, so that dataset follows
+updated_at: an edited report is exported again and readers should keep the
+row with the latest updated_at per id. Each run re-reads the last
+PARQUET_EXPORT_LATE_COMMIT_SECONDS of updated_at for the same reason, so
+recent rows can appear more than once.
+
+Exports read through the read replica when one is configured. The API runs
+them in a background thread; a lock file in the export directory lets one
+export run at a time.
+
+pyarrow is optional and only needed here (pip install pyarrow).
+"""
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from Aluminium_Extrusions.db_routers import use_read_replica
+from production.models import OnlineProductionReport
+from .models import Raw_data, ProductionData, ExportCheckpoint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_COMPRESSION = 'zstd'
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+class ExportDataset:
+    """
+    A table to export: `columns` are (field, type) pairs where type is one of
+    int64, float64, string, timestamp, date, time. `month_field` and
+    `partition_field` pick the partition directories.
+    """
+
+    def __init__(self, name, model, columns, month_field, partition_field, partition_name, updated_field=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.month_field = month_field
+        self.partition_field = partition_field
+        self.partition_name = partition_name
+        self.updated_field = updated_field
+
+    @property
+    def fields(self):
+        return [field for field, _ in self.columns]
+
+    def schema(self, pa):
+        types = {
+            'int64': pa.int64(),
+            'float64': pa.float64(),
+            'string': pa.string(),
+            'timestamp': pa.timestamp('us', tz='UTC'),
+            'date': pa.date32(),
+            'time': pa.time64('us'),
+        }
+        return pa.schema([(field, types[kind]) for field, kind in self.columns])
+
+    def late(self, gaps):
+        """Rows that turned up in id gaps below the cursor, in id order"""
+        query = Q()
+        for first, last, _ in gaps:
+            query |= Q(id__range=(first, last))
+        return self.model.objects.filter(query).order_by('id')
+
+    def pending(self, checkpoint):
+        """Rows after the checkpoint, in cursor order"""
+        queryset = self.model.objects.all()
+        if self.updated_field:
+            if checkpoint.last_updated_at is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{self.updated_field}__gt': checkpoint.last_updated_at})
+                    | Q(**{self.updated_field: checkpoint.last_updated_at, 'id__gt': checkpoint.last_id})
+                )
+            return queryset.order_by(self.updated_field, 'id')
+        return queryset.filter(id__gt=checkpoint.last_id).order_by('id')
+
+
+DATASETS = {
+    dataset.name: dataset for dataset in [
+        ExportDataset(
+            'raw_machine_data', Raw_data,
+            columns=[
+                ('id', 'int64'), ('sensor_name', 'string'), ('datetime', 'timestamp'),
+                ('t_factor', 'float64'), ('die_number', 'string'), ('length', 'float64'),
+                ('die_id', 'int64'), ('press_id', 'int64'), ('created_at', 'timestamp'),
+            ],
+            month_field='datetime', partition_field='sensor_name', partition_name='sensor',
+        ),
+        ExportDataset(
+            'production_data', ProductionData,
+            columns=[
+                ('id', 'int64'), ('sensor_name', 'string'), ('datetime', 'timestamp'),
+                ('t_factor', 'float64'), ('die_name', 'string'), ('length', 'float64'),
+                ('created_at', 'timestamp'),
+            ],
+            month_field='datetime', partition_field='sensor_name', partition_name='sensor',
+        ),
+        ExportDataset(
+            'online_production_report', OnlineProductionReport,
+            columns=[
+                ('id', 'int64'), ('production_id', 'string'), ('date', 'date'),
+                ('date_of_production', 'date'), ('press_id', 'int64'), ('shift_id', 'int64'),
+                ('operator_id', 'int64'), ('die_no', 'string'), ('section_no', 'string'),
+                ('section_name', 'string'), ('no_of_cavity', 'string'), ('cut_length', 'string'),
+                ('planned_qty', 'int64'), ('start_time', 'time'), ('end_time', 'time'),
+                ('billet_size', 'string'), ('no_of_billet', 'int64'), ('input_qty', 'float64'),
+                ('wt_per_piece_output', 'float64'), ('no_of_pieces', 'int64'),
+                ('total_output', 'float64'), ('status', 'string'),
+                ('created_at', 'timestamp'), ('updated_at', 'timestamp'),
+            ],
+            month_field='date_of_production', partition_field='press_id', partition_name='press',
+            updated_field='updated_at',
+        ),
+    ]
+}
+
+
+def export_dir():
+    return str(settings.PARQUET_EXPORT_DIR)
+
+
+def _partition_value(value):
+    if value is None or value == '':
+        return NULL_PARTITION
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(value))
+
+
+def _month(value):
+    if value is None:
+        return NULL_PARTITION
+    if hasattr(value, 'hour'):
+        value = timezone.localtime(value)
+    return value.strftime('%Y-%m')
+
+
+def _column(values):
+    return [float(v) if isinstance(v, Decimal) else v for v in values]
+
+
+def _without(gaps, found_ids):
+    """Id gaps ([first, last, seen at]) minus the ids found in them"""
+    found_ids = sorted(found_ids)
+    remaining = []
+    for first, last, seen_at in gaps:
+        for found in found_ids:
+            if first <= found <= last:
+                if found > first:
+                    remaining.append([first, found - 1, seen_at])
+                first = found + 1
+        if first <= last:
+            remaining.append([first, last, seen_at])
+    return remaining
+
+
+def export_dataset(name, out_dir=None, chunk_size=DEFAULT_CHUNK_SIZE, compression=DEFAULT_COMPRESSION, full=False):
+    """
+    Append the rows of one dataset exported since its checkpoint (everything
+    when `full`, replacing earlier files). Returns a summary dict.
+    """
+    pa, pq = _require_pyarrow()
+    dataset = DATASETS[name]
+    schema = dataset.schema(pa)
+    fields = dataset.fields
+    id_index = fields.index('id')
+    month_index = fields.index(dataset.month_field)
+    partition_index = fields.index(dataset.partition_field)
+    late_window = settings.PARQUET_EXPORT_LATE_COMMIT_SECONDS
+
+    root = os.path.join(out_dir or export_dir(), name)
+    checkpoint, _ = ExportCheckpoint.objects.get_or_create(dataset=name)
+    if full:
+        checkpoint.last_id = 0
+        checkpoint.last_updated_at = None
+        checkpoint.rows_exported = 0
+        checkpoint.gaps = []
+    previous_run = checkpoint.last_id, checkpoint.last_updated_at, checkpoint.gaps
+
+    run_id = f"{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    staging = os.path.join(out_dir or export_dir(), f".{name}-{run_id}")
+    writers = {}
+    rows_written = 0
+
+    def write(rows):
+        partitions = {}
+        for row in rows:
+            key = (_month(row[month_index]), _partition_value(row[partition_index]))
+            partitions.setdefault(key, []).append(row)
+
+        for (month, value), part_rows in partitions.items():
+            writer = writers.get((month, value))
+            if writer is None:
+                directory = os.path.join(staging, f"month={month}", f"{dataset.partition_name}={value}")
+                os.makedirs(directory, exist_ok=True)
+                writer = pq.ParquetWriter(
+                    os.path.join(directory, f"part-{run_id}.parquet"), schema, compression=compression
+                )
+                writers[(month, value)] = writer
+            columns = [_column(values) for values in zip(*part_rows)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    try:
+        if dataset.updated_field:
+            if checkpoint.last_updated_at is not None:
+                # Re-read the trailing window: edits committed late with an earlier updated_at
+                checkpoint.last_updated_at -= timedelta(seconds=late_window)
+                checkpoint.last_id = 0
+        else:
+            now = time.time()
+            gaps = [gap for gap in checkpoint.gaps if now - gap[2] < late_window]
+            if gaps:
+                late_rows = list(dataset.late(gaps).values_list(*fields))
+                if late_rows:
+                    write(late_rows)
+                    rows_written += len(late_rows)
+                gaps = _without(gaps, [row[id_index] for row in late_rows])
+            checkpoint.gaps = gaps
+
+        while True:
+            rows = list(dataset.pending(checkpoint).values_list(*fields)[:chunk_size])
+            if not rows:
+                break
+            write(rows)
+            rows_written += len(rows)
+
+            if not dataset.updated_field:
+                # Ids skipped in this chunk may still be committed later
+                seen_at, previous = time.time(), checkpoint.last_id
+                for row in rows:
+                    if row[id_index] > previous + 1:
+                        checkpoint.gaps.append([previous + 1, row[id_index] - 1, seen_at])
+                    previous = row[id_index]
+            last = rows[-1]
+            checkpoint.last_id = last[id_index]
+            if dataset.updated_field:
+                checkpoint.last_updated_at = last[fields.index(dataset.updated_field)]
+    except BaseException:
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        checkpoint.last_id, checkpoint.last_updated_at, checkpoint.gaps = previous_run
+        raise
+
+    if dataset.updated_field and checkpoint.last_updated_at is not None and not rows_written:
+        # Nothing new or re-read: keep the cursor where it was
+        checkpoint.last_id, checkpoint.last_updated_at = previous_run[:2]
+
+    for writer in writers.values():
+        writer.close()
+
+    # Move this run's files into place only once they are all complete
+    if full:
+        shutil.rmtree(root, ignore_errors=True)
+    files = []
+    for directory, _, filenames in os.walk(staging):
+        target = os.path.join(root, os.path.relpath(directory, staging))
+        for filename in filenames:
+            os.makedirs(target, exist_ok=True)
+            os.replace(os.path.join(directory, filename), os.path.join(target, filename))
+            files.append(os.path.join(target, filename))
+    shutil.rmtree(staging, ignore_errors=True)
+
+    checkpoint.rows_exported += rows_written
+    checkpoint.last_run_at = timezone.now()
+    checkpoint.save()
+
+    return {
+        'dataset': name,
+        'rows': rows_written,
+        'files': files,
+        'last_id': checkpoint.last_id,
+        'rows_exported': checkpoint.rows_exported,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Running exports
+# ─────────────────────────────────────────────────────────────────────────────
+def _lock(out_dir=None):
+    """Exclusive, non-blocking lock on the export directory; None if an export is running"""
+    import fcntl
+
+    directory = out_dir or export_dir()
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, '.lock'), 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def is_running(out_dir=None):
+    lock_file = _lock(out_dir)
+    if lock_file is None:
+        return True
+    lock_file.close()
+    return False
+
+
+def _run(names, lock_file, **options):
+    try:
+        with use_read_replica():
+            return [export_dataset(name, **options) for name in names]
+    finally:
+        lock_file.close()
+
+
+def export_datasets(names, **options):
+    """
+    Export datasets one after the other, reading through the read replica
+    when configured. Returns their summaries, or None if an export is running.
+    """
+    lock_file = _lock(options.get('out_dir'))
+    if lock_file is None:
+        return None
+    return _run(names, lock_file, **options)
+
+
+def start_export(names, full=False):
+    """Run an export in a background thread. Returns False if an export is running"""
+    _require_pyarrow()
+    lock_file = _lock()
+    if lock_file is None:
+        return False
+
+    def run():
+        try:
+            _run(names, lock_file, full=full)
+        except Exception:
+            logger.exception("Parquet export of %s failed", ', '.join(names))
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, name='parquet-export', daemon=True).start()
+    return True
+
+
+def export_status(out_dir=None):
+    """Checkpoint and file count per dataset"""
+    checkpoints = {c.dataset: c for c in ExportCheckpoint.objects.all()}
+    status = []
+    for name in DATASETS:
+        checkpoint = checkpoints.get(name)
+        root = os.path.join(out_dir or export_dir(), name)
+        file_count = sum(len(filenames) for _, _, filenames in os.walk(root))
+        status.append({
+            'dataset': name,
+            'last_id': checkpoint.last_id if checkpoint else 0,
+            'last_updated_at': checkpoint.last_updated_at.isoformat() if checkpoint and checkpoint.last_updated_at else None,
+            'rows_exported': checkpoint.rows_exported if checkpoint else 0,
+            'ids_awaited': sum(last - first + 1 for first, last, _ in checkpoint.gaps) if checkpoint else 0,
+            'last_run_at': checkpoint.last_run_at.isoformat() if checkpoint and checkpoint.last_run_at else None,
+            'files': file_count,
+        })
+    return status
@@ -0,0 +1,64 @@
+"""
+Ingest pipeline for sensor readings.
+
+LoraReceiveView (and any bulk/backfill job) hands a parsed reading to
+`store_reading`, which resolves master-data links once, writes the
+Raw_data / ProductionData rows and updates the incremental counters
+that hang off a reading (die usage, order progress, shift rollups, chart
+buckets, anomaly statistics).
+
+Sensor timestamps are corrected for clock skew first, and readings behind
+the sensor's watermark are flagged late (raw_data.clock), which only
+re-opens the chart buckets they fall in.
+"""
+from django.db import transaction
+
+from master.die_life import record_push
+from order_management import lineage
+from production import rollups
+from .lookups import master_lookup
+from .models import Raw_data, ProductionData
+from . import anomaly, clock, timeseries
+
+
+def store_reading(sensor_name, reading_time, t_factor, die_number, length, received_at=None):
+    """
+    Save one reading; `reading_time` (the sensor's timestamp) must be
+    timezone-aware. Pass `received_at` for readings straight from a sensor so
+    its clock offset is estimated and applied. Returns (raw_obj, prod_obj)
+    """
+    die_id = master_lookup.die_id(die_number)
+    press_id = master_lookup.press_id(sensor_name)
+
+    with transaction.atomic():
+        observation = clock.observe(sensor_name, reading_time, received_at)
+        reading_time = observation.reading_time
+
+        raw_obj = Raw_data.objects.create(
+            sensor_name=sensor_name,
+            datetime=reading_time,
+            t_factor=t_factor,
+            die_number=die_number,
+            length=length,
+            die_id=die_id,
+            press_id=press_id,
+            clock_offset=observation.offset,
+        )
+
+        prod_obj = ProductionData.objects.create(
+            sensor_name=sensor_name,
+            datetime=reading_time,
+            t_factor=t_factor,
+            die_name=f"Die {die_number}",
+            length=length,
+        )
+
+        if die_id is not None:
+            record_push(die_id, length, t_factor, reading_time)
+            lineage.add_reading(die_id, reading_time, length)
+        if press_id is not None:
+            rollups.add_reading(press_id, reading_time, length, t_factor)
+        timeseries.add_reading(sensor_name, press_id, reading_time, length, t_factor, late=observation.late)
+        anomaly.check_reading(raw_obj)
+
+    return raw_obj, prod_obj
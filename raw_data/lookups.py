@@ -0,0 +1,65 @@
+"""
+In-process lookup tables used at ingest to resolve the free-text
+`die_number` / `sensor_name` of a reading to master.Die / master.CompanyPress ids.
+
+The tables are loaded lazily, dropped by the post_save/post_delete signals in
+raw_data.signals, and additionally refreshed after LOOKUP_TTL seconds so that
+changes made by another worker process are picked up.
+"""
+import threading
+import time
+
+from master.models import Die, CompanyPress
+
+LOOKUP_TTL = 300          # seconds before a table is reloaded anyway
+MISS_REFRESH_AFTER = 30   # an unknown key triggers a reload at most this often
+
+
+class MasterDataLookup:
+    """die_no -> Die.id and sensor -> CompanyPress.id (lowest id wins, like .first())"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dies = None
+        self._presses = None
+        self._loaded_at = 0.0
+
+    def _load(self):
+        dies = dict(Die.objects.values_list('die_no', 'id'))
+        presses = {}
+        for press_id, sensor in CompanyPress.objects.order_by('id').values_list('id', 'sensor'):
+            if sensor:
+                presses.setdefault(sensor.strip(), press_id)
+        self._dies, self._presses = dies, presses
+        self._loaded_at = time.monotonic()
+
+    def _tables(self, force=False):
+        with self._lock:
+            age = time.monotonic() - self._loaded_at
+            if force or self._dies is None or age > LOOKUP_TTL:
+                self._load()
+            return self._dies, self._presses
+
+    def _get(self, index, key):
+        if not key:
+            return None
+        key = key.strip()
+        value = self._tables()[index].get(key)
+        if value is None and time.monotonic() - self._loaded_at > MISS_REFRESH_AFTER:
+            value = self._tables(force=True)[index].get(key)
+        return value
+
+    def die_id(self, die_number):
+        return self._get(0, die_number)
+
+    def press_id(self, sensor_name):
+        return self._get(1, sensor_name)
+
+    def invalidate(self, *args, **kwargs):
+        """Signal receiver: drop both tables, they are reloaded on next use"""
+        with self._lock:
+            self._dies = None
+            self._presses = None
+
+
+master_lookup = MasterDataLookup()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from raw_data import clock
+from raw_data.models import SensorClock
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the watermark of sensors that stopped sending along the server clock, so their "
+        "last chart buckets become final. Run every few minutes (cron); ingest advances the "
+        "watermarks of active sensors itself."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='store_true', help="Only list the sensor clocks")
+
+    def handle(self, *args, **options):
+        if options['status']:
+            for sensor in SensorClock.objects.order_by('sensor_name'):
+                self.stdout.write(
+                    f"{sensor.sensor_name}: offset {sensor.offset_seconds:+.1f}s, watermark {sensor.watermark}, "
+                    f"{sensor.late_readings}/{sensor.readings} late, last received {sensor.last_received_at}"
+                )
+            return
+
+        moved = clock.advance_idle()
+        self.stdout.write(self.style.SUCCESS(
+            f"Advanced {len(moved)} idle sensor watermarks" + (f": {', '.join(moved)}" if moved else "")
+        ))
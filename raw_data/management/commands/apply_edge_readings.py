@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from raw_data import edge
+
+
+class Command(BaseCommand):
+    help = (
+        "On the central server: run readings shipped by edge nodes (edge_reading) through the "
+        "ingest pipeline, exactly once each. Several instances may run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EDGE_SYNC_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep running")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            applied = edge.apply_pending(options['batch_size'])
+            if applied or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Applied {applied} edge readings ({edge.pending().count()} pending)"
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
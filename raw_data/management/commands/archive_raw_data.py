@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from raw_data.archive import archive_before, archive_dir, catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Move raw_machine_data readings of whole months older than --older-than-days into "
+        "compact per-sensor/month segment files (see raw_data.archive). Queries through "
+        "raw_data.archive.iter_readings keep seeing them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.RAW_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--sensor', help="Only archive this sensor")
+        parser.add_argument('--out', help="Archive directory (default: settings.RAW_ARCHIVE_DIR)")
+        parser.add_argument('--stats', action='store_true', help="Only list the existing segments")
+
+    def handle(self, *args, **options):
+        root = options['out'] or archive_dir()
+        if options['stats']:
+            for segment in catalog.segments(options['sensor'], root):
+                size = segment.offset + segment.count * segment.records.dtype.itemsize
+                self.stdout.write(
+                    f"{segment.sensor_name} {segment.header['month']}: {segment.count} readings, "
+                    f"{len(segment.dies)} dies, {size} bytes"
+                )
+            return
+
+        if options['older_than_days'] < 0:
+            raise CommandError("--older-than-days must not be negative")
+        # Only whole months, so a segment never needs the month it is still receiving
+        limit = timezone.localtime() - timedelta(days=options['older_than_days'])
+        cutoff = limit.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        self.stdout.write(f"Archiving readings before {cutoff:%Y-%m-%d} into {root}")
+        archived = archive_before(cutoff, sensor_name=options['sensor'], root=root, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} readings"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from raw_data.lookups import master_lookup
+from raw_data.models import Raw_data
+
+
+class Command(BaseCommand):
+    help = "Resolve die / press foreign keys for Raw_data rows stored before ingest did it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Re-resolve every row, not only rows whose FK is still empty",
+        )
+
+    def handle(self, *args, **options):
+        master_lookup.invalidate()
+        rows = Raw_data.objects.all()
+
+        # One UPDATE per distinct die number / sensor instead of one per row
+        die_rows = rows if options['all'] else rows.filter(die__isnull=True)
+        die_numbers = die_rows.values_list('die_number', flat=True).distinct()
+        dies_updated = 0
+        for die_number in list(die_numbers):
+            die_id = master_lookup.die_id(die_number)
+            if die_id is not None:
+                dies_updated += die_rows.filter(die_number=die_number).update(die_id=die_id)
+
+        press_rows = rows if options['all'] else rows.filter(press__isnull=True)
+        sensors = press_rows.values_list('sensor_name', flat=True).distinct()
+        presses_updated = 0
+        for sensor_name in list(sensors):
+            press_id = master_lookup.press_id(sensor_name)
+            if press_id is not None:
+                presses_updated += press_rows.filter(sensor_name=sensor_name).update(press_id=press_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {dies_updated} readings to dies and {presses_updated} readings to presses"
+        ))
@@ -0,0 +1,107 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from master.models import Die
+from raw_data import spool, spool_worker
+from raw_data.models import IngestSpoolCheckpoint, Raw_data
+from raw_data.parser import ParsedReading
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure spooled ingest throughput (readings/s) against the number of worker processes, "
+        "in a throwaway test database: the same readings are spooled for each worker count and "
+        "drained by run_ingest_workers' worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readings', type=int, default=20000, help="Readings per run")
+        parser.add_argument('--sensors', type=int, default=64, help="Distinct sensors the readings come from")
+        parser.add_argument('--workers', default='1,2,4', help="Comma separated worker counts to compare")
+        parser.add_argument('--batch-size', type=int, help="Readings per transaction (INGEST_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(count) for count in options['workers'].split(',') if count.strip()]
+        except ValueError:
+            raise CommandError("--workers must be comma separated integers")
+        if not counts or min(counts) < 1:
+            raise CommandError("--workers must be positive")
+
+        connection = connections['default']
+        temp_dir = tempfile.mkdtemp(prefix='bench_ingest_')
+        if connection.vendor == 'sqlite':
+            # The worker processes need the test database on disk, not in memory
+            connection.settings_dict['TEST']['NAME'] = os.path.join(temp_dir, 'bench.sqlite3')
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            call_command('generate_plant_data', scale='small', days=1, stdout=io.StringIO())
+            die_numbers = list(Die.objects.values_list('die_no', flat=True)) or ['1']
+            database = dict(connection.settings_dict)
+            if connection.vendor == 'sqlite':
+                # One writer at a time: wait for the lock instead of failing
+                database['OPTIONS'] = {**database['OPTIONS'], 'timeout': 60, 'transaction_mode': 'IMMEDIATE'}
+            connection.close()
+
+            results = []
+            for run, workers in enumerate(counts):
+                spool_dir = os.path.join(temp_dir, f'spool-{run}')
+                elapsed = self.run_once(run, workers, spool_dir, database, die_numbers, options)
+                results.append((workers, elapsed))
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.stdout.write(f"\n{'workers':>7}  {'seconds':>8}  {'readings/s':>10}  {'speedup':>7}")
+        base = options['readings'] / results[0][1]
+        for workers, elapsed in results:
+            rate = options['readings'] / elapsed
+            self.stdout.write(f"{workers:>7}  {elapsed:>8.2f}  {rate:>10.0f}  {rate / base:>6.2f}x")
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                "SQLite allows one writer at a time: run this against MySQL to see workers scale"
+            ))
+
+    def run_once(self, run, workers, spool_dir, database, die_numbers, options):
+        readings, sensors = options['readings'], options['sensors']
+        prefix = f'BENCH{run}-'
+        start = timezone.localtime().replace(tzinfo=None, microsecond=0) - timedelta(seconds=readings)
+        received_at = timezone.now() - timedelta(minutes=1)
+        for i in range(readings):
+            spool.append(ParsedReading(
+                f'{prefix}{i % sensors:03d}', start + timedelta(seconds=i), 1.120,
+                die_numbers[i % len(die_numbers)], 37.3,
+            ), received_at=received_at, spool_dir=spool_dir)
+        IngestSpoolCheckpoint.objects.all().delete()
+        connections['default'].close()
+
+        self.stdout.write(f"{workers} worker(s): storing {readings} readings from {sensors} sensors...")
+        started = time.perf_counter()
+        processes = spool_worker.start(
+            workers, os.environ['DJANGO_SETTINGS_MODULE'], database=database, spool_dir=spool_dir,
+            batch_size=options['batch_size'], drain=True,
+        )
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        if any(process.exitcode for process in processes):
+            raise CommandError(f"An ingest worker failed ({[process.exitcode for process in processes]})")
+        stored = Raw_data.objects.filter(sensor_name__startswith=prefix).count()
+        if stored != readings:
+            raise CommandError(f"{stored} of {readings} readings were stored")
+        return elapsed
@@ -0,0 +1,75 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from raw_data.parser import parse_message, parse_batch
+
+
+def _legacy_parse(message):
+    """The split/strptime/replace parsing LoraReceiveView used before raw_data.parser"""
+    parts = [p.strip() for p in message.split(",")]
+    if len(parts) < 6:
+        raise ValueError("Invalid message format")
+    naive_dt = datetime.strptime(parts[1], "%d/%m/%y %H:%M:%S")
+    length_str = parts[5].replace("Feet", "").replace("Inch", "").strip()
+    pieces = length_str.split()
+    length = float(pieces[0]) + float(pieces[1]) / 10 if len(pieces) >= 2 else float(length_str)
+    return parts[0], naive_dt, float(parts[2]), parts[3], round(length, 2)
+
+
+def _sample_messages(count, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 30, 6, 0, 0)
+    messages = []
+    for i in range(count):
+        ts = start + timedelta(seconds=i * 20)
+        messages.append(
+            f"{rng.choice(['1234', '1235', '1236'])},{ts:%d/%m/%y %H:%M:%S}, "
+            f"{rng.uniform(0.8, 1.4):.3f},{rng.randint(900, 990)}, {rng.uniform(9, 13):.3f}, "
+            f"{rng.randint(30, 40)} Feet{rng.randint(0, 9)} Inch"
+        )
+    return messages
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark the LoRa message parser against the legacy split/strptime parsing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=50000, help="Messages per run")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per variant (best is reported)")
+
+    def handle(self, *args, **options):
+        messages = _sample_messages(options['count'])
+
+        def best_of(func):
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            return min(timings)
+
+        # Sanity check: both parsers agree before timing them
+        for message in messages[:100]:
+            legacy = _legacy_parse(message)
+            current = parse_message(message)
+            assert legacy == tuple(current), (legacy, current)
+
+        results = [
+            ("legacy split/strptime", best_of(lambda: [_legacy_parse(m) for m in messages])),
+            ("parse_message", best_of(lambda: [parse_message(m) for m in messages])),
+        ]
+        try:
+            results.append(("parse_batch (numpy)", best_of(lambda: parse_batch(messages))))
+        except ImportError as e:
+            self.stdout.write(self.style.WARNING(f"Skipping batch mode: {e}"))
+
+        baseline = results[0][1]
+        self.stdout.write(f"{len(messages)} messages, best of {options['repeat']} runs")
+        for name, seconds in results:
+            self.stdout.write(
+                f"  {name:<24} {seconds * 1000:9.1f} ms  "
+                f"{len(messages) / seconds:12,.0f} msg/s  x{baseline / seconds:.2f}"
+            )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from raw_data.export import DATASETS, DEFAULT_CHUNK_SIZE, DEFAULT_COMPRESSION, export_datasets, export_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Export raw_machine_data, production_data and online_production_report to partitioned "
+        "Parquet files (month / sensor or press). Appends only rows added since the last run "
+        "unless --full is given. Reads through the read replica when configured. Requires pyarrow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('datasets', nargs='*', help=f"Datasets to export (default: all of {', '.join(DATASETS)})")
+        parser.add_argument('--out', help="Output directory (default: settings.PARQUET_EXPORT_DIR)")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--compression', default=DEFAULT_COMPRESSION, help="zstd, snappy, gzip or none")
+        parser.add_argument('--full', action='store_true', help="Re-export everything and replace earlier files")
+
+    def handle(self, *args, **options):
+        names = options['datasets'] or list(DATASETS)
+        unknown = [name for name in names if name not in DATASETS]
+        if unknown:
+            raise CommandError(f"Unknown dataset(s): {', '.join(unknown)}")
+
+        try:
+            results = export_datasets(
+                names,
+                out_dir=options['out'],
+                chunk_size=options['chunk_size'],
+                compression=options['compression'],
+                full=options['full'],
+            )
+        except ImportError as e:
+            raise CommandError(str(e))
+        if results is None:
+            raise CommandError("Another export is running")
+
+        for result in results:
+            self.stdout.write(self.style.SUCCESS(
+                f"{result['dataset']}: {result['rows']} rows in {len(result['files'])} files "
+                f"(total {result['rows_exported']}, last id {result['last_id']})"
+            ))
+        self.stdout.write(f"Output: {options['out'] or export_dir()}")
@@ -0,0 +1,76 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from raw_data import clock
+from raw_data.archive import archived_readings
+from raw_data.models import Raw_data, ReadingBucket
+from raw_data.timeseries import RESOLUTIONS, bucket_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the downsampled chart buckets (reading_bucket) from raw_machine_data and archived readings. "
+        "Ingest keeps them up to date; run this once, or after a backfill."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Only rebuild buckets from this date (YYYY-MM-DD) onwards")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        readings = Raw_data.objects.order_by()
+        buckets = ReadingBucket.objects.all()
+        since = None
+        if options['since']:
+            since_day = parse_date(options['since'])
+            if since_day is None:
+                raise CommandError("--since must be YYYY-MM-DD")
+            # Rebuild whole days so that daily buckets are complete
+            first = Raw_data.objects.filter(datetime__date__gte=since_day).order_by('datetime').first()
+            if first is None:
+                self.stdout.write("No live readings since that date")
+                return
+            since = bucket_start(first.datetime, RESOLUTIONS[-1][1])
+            readings = readings.filter(datetime__gte=since)
+            buckets = buckets.filter(bucket_start__gte=since)
+
+        totals = defaultdict(lambda: [None, 0, Decimal(0), Decimal(0), None, None])
+        rows = readings.values_list('sensor_name', 'press_id', 'datetime', 'length', 't_factor')
+        archived = (
+            (reading.sensor_name, reading.press_id, reading.datetime, reading.length, reading.t_factor)
+            for reading in archived_readings(start=since)
+        )
+        for sensor_name, press_id, reading_time, length, t_factor in chain(
+            rows.iterator(chunk_size=options['chunk_size']), archived
+        ):
+            for resolution, seconds in RESOLUTIONS:
+                cell = totals[(sensor_name, resolution, bucket_start(reading_time, seconds))]
+                cell[0] = cell[0] or press_id
+                cell[1] += 1
+                cell[2] += length
+                cell[3] += t_factor
+                cell[4] = t_factor if cell[4] is None else min(cell[4], t_factor)
+                cell[5] = t_factor if cell[5] is None else max(cell[5], t_factor)
+
+        with transaction.atomic():
+            buckets.delete()
+            ReadingBucket.objects.bulk_create(
+                [
+                    ReadingBucket(
+                        sensor_name=sensor_name, press_id=press_id, resolution=resolution, bucket_start=start,
+                        count=count, total_length=length, t_factor_sum=t_sum,
+                        t_factor_min=t_min, t_factor_max=t_max,
+                    )
+                    for (sensor_name, resolution, start), (press_id, count, length, t_sum, t_min, t_max)
+                    in totals.items()
+                ],
+                batch_size=1000,
+            )
+            clock.finalize_all()
+
+        self.stdout.write(self.style.SUCCESS(f"Reading buckets rebuilt: {len(totals)} buckets"))
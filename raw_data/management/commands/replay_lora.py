@@ -0,0 +1,317 @@
+import json
+import queue
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from raw_data.parser import MESSAGE_RE, MessageParseError, parse_message, parse_rcv_frame
+
+RECEIVED_MARKER = '[ RECEIVED ]'
+MESSAGE_KEYS = ('message', 'payload', 'data')
+DEFERRED_STATUSES = (429, 503)  # the endpoint's admission control: send again after Retry-After
+
+
+def read_messages(path):
+    """
+    Messages from a recording, in file order. Accepts JSONL ({"message": ...}
+    per line), receiver logs (+RCV= frames or '[ RECEIVED ] <message>' lines
+    printed by reciver.py) and files of bare messages.
+    Returns (messages, skipped_lines).
+    """
+    messages, skipped = [], 0
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            message = None
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = {}
+                message = next((record[key] for key in MESSAGE_KEYS if isinstance(record.get(key), str)), None)
+            elif '+RCV=' in line:
+                message = parse_rcv_frame(line[line.index('+RCV='):])
+            elif RECEIVED_MARKER in line:
+                message = line.split(RECEIVED_MARKER, 1)[1].strip()
+            elif MESSAGE_RE.match(line):
+                message = line
+            if message:
+                messages.append(message)
+            else:
+                skipped += 1
+    return messages, skipped
+
+
+def sensor_times(messages):
+    """Sensor timestamp of each message (None where it cannot be parsed)"""
+    times = []
+    for message in messages:
+        try:
+            times.append(parse_message(message).datetime)
+        except MessageParseError:
+            times.append(None)
+    return times
+
+
+def retime(message, reading_time):
+    """Replace the date/time fields of a message, keeping everything else byte for byte"""
+    match = MESSAGE_RE.match(message)
+    if not match:
+        return message
+    return (
+        message[:match.start('date')] + reading_time.strftime('%d/%m/%y')
+        + message[match.end('date'):match.start('time')] + reading_time.strftime('%H:%M:%S')
+        + message[match.end('time'):]
+    )
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(fraction):
+        return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))], 2)
+
+    return {
+        'p50': at(0.50), 'p90': at(0.90), 'p95': at(0.95), 'p99': at(0.99),
+        'max': round(ordered[-1], 2), 'mean': round(statistics.fmean(ordered), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay recorded LoRa traffic (JSONL, +RCV serial logs or bare messages) against the "
+        "ingest endpoint at the original pace, a multiple of it, or flat-out, and report "
+        "throughput, latency percentiles and errors. --test-client runs in-process against "
+        "throwaway test databases, so no server is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('recordings', nargs='+', help="Recorded message files")
+        parser.add_argument('--url', help="Ingest URL, e.g. http://localhost:8000/api/lora/receive/")
+        parser.add_argument('--test-client', action='store_true',
+                            help="Post through django.test.Client into freshly created test databases")
+        parser.add_argument('--plant', choices=['small', 'medium', 'large'],
+                            help="With --test-client: generate master data of this scale first")
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help="Replay pace: 1 = original timing, 10 = ten times faster, 0 = flat-out")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--limit', type=int, help="Replay at most this many messages")
+        parser.add_argument('--retime', action='store_true',
+                            help="Shift message timestamps so the recording ends now")
+        parser.add_argument('--timeout', type=float, default=10.0, help="HTTP timeout in seconds")
+        parser.add_argument('--live', action='store_true',
+                            help="Send as live traffic; by default replays are marked as backfill (X-Ingest-Priority: bulk)")
+        parser.add_argument('--max-deferrals', type=int, default=5,
+                            help="Times a deferred message (429 / 503) is sent again after its Retry-After")
+        parser.add_argument('--output', help="Write the JSON report here")
+
+    def handle(self, *args, **options):
+        if bool(options['url']) == bool(options['test_client']):
+            raise CommandError("Give exactly one of --url or --test-client")
+        if options['concurrency'] < 1 or options['speed'] < 0:
+            raise CommandError("--concurrency must be >= 1 and --speed >= 0")
+
+        messages, skipped = [], 0
+        for path in options['recordings']:
+            found, bad = read_messages(path)
+            messages += found
+            skipped += bad
+        if options['limit']:
+            messages = messages[:options['limit']]
+        if not messages:
+            raise CommandError(f"No messages found ({skipped} lines skipped)")
+        self.stdout.write(f"Loaded {len(messages)} messages ({skipped} lines skipped)")
+
+        offsets = self.schedule(messages, options)
+
+        if options['test_client']:
+            from django.test.runner import DiscoverRunner
+            from django.test.utils import setup_test_environment, teardown_test_environment
+
+            setup_test_environment()
+            runner = DiscoverRunner(verbosity=0, interactive=False)
+            old_config = runner.setup_databases()
+            from django.db import connection
+            if connection.vendor == 'sqlite' and options['concurrency'] > 1:
+                self.stdout.write(self.style.WARNING(
+                    "SQLite test databases lock the whole table on write; concurrent posts will fail "
+                    "with 'database table is locked'. Use --concurrency 1 or a MySQL test database."
+                ))
+            try:
+                if options['plant']:
+                    call_command('generate_plant_data', scale=options['plant'], days=1, skip_derived=True,
+                                 stdout=self.stdout)
+                report = self.replay(messages, offsets, self.client_sender(options), options)
+            finally:
+                runner.teardown_databases(old_config)
+                teardown_test_environment()
+        else:
+            report = self.replay(messages, offsets, self.http_sender(options['url'], options['timeout'], options), options)
+
+        report['skipped_lines'] = skipped
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Timing
+    # ─────────────────────────────────────────────────────────────────────────
+    def schedule(self, messages, options):
+        """
+        Send offset (seconds from replay start) per message, from the sensor
+        timestamps scaled by --speed. Messages without a readable timestamp
+        go out together with the previous one.
+        """
+        times = sensor_times(messages)
+        known = [t for t in times if t is not None]
+        first = min(known) if known else None
+
+        if options['retime'] and known:
+            shift = timezone.localtime().replace(tzinfo=None) - max(known)
+            for i, t in enumerate(times):
+                if t is not None:
+                    messages[i] = retime(messages[i], t + shift)
+
+        offsets, last = [], 0.0
+        for t in times:
+            if options['speed'] and t is not None and first is not None:
+                last = max(last, (t - first).total_seconds() / options['speed'])
+            offsets.append(last if options['speed'] else 0.0)
+        return offsets
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Senders: message -> (ok, status) ; raise on transport errors
+    # ─────────────────────────────────────────────────────────────────────────
+    def deferring(self, send, max_deferrals):
+        """Send again while the endpoint defers the message (429 / 503), waiting its Retry-After"""
+        def send_with_retries(message):
+            for _ in range(max_deferrals):
+                ok, status, retry_after = send(message)
+                if status not in DEFERRED_STATUSES:
+                    return ok, status
+                time.sleep(float(retry_after or 1))
+            return send(message)[:2]
+        return send_with_retries
+
+    def http_sender(self, url, timeout, options):
+        headers = {'Content-Type': 'application/json'}
+        if not options['live']:
+            headers['X-Ingest-Priority'] = 'bulk'
+
+        def send(message):
+            request = urllib.request.Request(
+                url,
+                data=json.dumps({'message': message}).encode(),
+                headers=headers,
+                method='POST',
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                    return 200 <= response.status < 300, response.status, None
+            except urllib.error.HTTPError as e:
+                return False, e.code, e.headers.get('Retry-After')
+        return self.deferring(send, options['max_deferrals'])
+
+    def client_sender(self, options):
+        from django.db import connection
+        from django.test import Client
+        from django.urls import reverse
+
+        url = reverse('lora_receive')
+        extra = {} if options['live'] else {'HTTP_X_INGEST_PRIORITY': 'bulk'}
+        local = threading.local()
+
+        def send(message):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            try:
+                response = client.post(url, {'message': message}, content_type='application/json', **extra)
+            finally:
+                connection.close()
+            return 200 <= response.status_code < 300, response.status_code, response.headers.get('Retry-After')
+        return self.deferring(send, options['max_deferrals'])
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Replay
+    # ─────────────────────────────────────────────────────────────────────────
+    def replay(self, messages, offsets, send, options):
+        work = queue.Queue()
+        for item in zip(offsets, messages):
+            work.put(item)
+        lock = threading.Lock()
+        latencies, lags, statuses, errors = [], [], {}, {}
+        started = time.perf_counter()
+
+        def worker():
+            while True:
+                try:
+                    offset, message = work.get_nowait()
+                except queue.Empty:
+                    return
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                sent_at = time.perf_counter()
+                try:
+                    ok, status = send(message)
+                    key = str(status)
+                except Exception as e:
+                    ok, key = False, type(e).__name__
+                elapsed = (time.perf_counter() - sent_at) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    lags.append(max(0.0, (sent_at - started - offset) * 1000))
+                    statuses[key] = statuses.get(key, 0) + 1
+                    if not ok:
+                        errors[key] = errors.get(key, 0) + 1
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        failed = sum(errors.values())
+        return {
+            'target': options['url'] or 'test-client',
+            'messages': len(messages),
+            'speed': options['speed'],
+            'concurrency': options['concurrency'],
+            'duration_s': round(duration, 3),
+            'throughput_per_s': round(len(messages) / duration, 2) if duration else None,
+            'recorded_span_s': round(offsets[-1] * options['speed'], 3) if options['speed'] else None,
+            'ok': len(messages) - failed,
+            'failed': failed,
+            'error_rate': round(failed / len(messages), 4),
+            'statuses': statuses,
+            'latency_ms': _percentiles(latencies),
+            'schedule_lag_ms': _percentiles(lags),
+        }
+
+    def print_report(self, report):
+        latency = report['latency_ms']
+        self.stdout.write(
+            f"{report['messages']} messages in {report['duration_s']} s "
+            f"({report['throughput_per_s']}/s, concurrency {report['concurrency']}, speed {report['speed']})"
+        )
+        self.stdout.write(
+            f"latency ms  p50 {latency['p50']}  p90 {latency['p90']}  p95 {latency['p95']}  "
+            f"p99 {latency['p99']}  max {latency['max']}"
+        )
+        self.stdout.write(f"schedule lag p95 {report['schedule_lag_ms']['p95']} ms; statuses {report['statuses']}")
+        style = self.style.ERROR if report['failed'] else self.style.SUCCESS
+        self.stdout.write(style(f"{report['failed']} failed ({report['error_rate']:.2%})"))
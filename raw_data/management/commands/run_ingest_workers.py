@@ -0,0 +1,73 @@
+import os
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from raw_data import spool, spool_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Store readings spooled by the LoRa endpoint (INGEST_SPOOL_DIR set), in worker "
+        "processes that each own a share of the sensor shards. Runs until stopped; a worker "
+        "that dies is restarted and carries on from its shards' checkpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.INGEST_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=settings.INGEST_BATCH_SIZE,
+                            help="Readings per transaction")
+        parser.add_argument('--poll', type=float, default=1.0, help="Seconds between looks at an idle spool")
+        parser.add_argument('--drain', action='store_true',
+                            help="Store everything spooled, then exit (only with the endpoint stopped)")
+        parser.add_argument('--status', action='store_true', help="Only show the shard checkpoints")
+
+    def handle(self, *args, **options):
+        if not spool.enabled():
+            raise CommandError("Spooled ingest is off: set INGEST_SPOOL_DIR")
+        workers = options['workers']
+        if not 1 <= workers <= settings.INGEST_SHARDS:
+            raise CommandError(f"--workers must be between 1 and INGEST_SHARDS ({settings.INGEST_SHARDS})")
+
+        if options['status']:
+            for shard, pending, checkpoint in spool.status():
+                self.stdout.write(
+                    f"shard {shard:>2}: {pending} segment(s) pending, "
+                    + (f"{checkpoint.readings} stored, {checkpoint.rejected} rejected, at {checkpoint.segment or '-'}"
+                       f"@{checkpoint.offset}, updated {checkpoint.updated_at}" if checkpoint else "never run")
+                )
+            return
+
+        worker_options = {
+            'batch_size': options['batch_size'],
+            'poll': options['poll'],
+            'drain': options['drain'],
+        }
+        settings_module = os.environ['DJANGO_SETTINGS_MODULE']
+        # Stopped by a service manager: stop the workers too, like Ctrl+C
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        processes = spool_worker.start(workers, settings_module, **worker_options)
+        self.stdout.write(f"{workers} ingest worker(s) on {settings.INGEST_SHARDS} shards in {settings.INGEST_SPOOL_DIR}")
+        try:
+            while processes:
+                time.sleep(1)
+                for index, process in enumerate(processes):
+                    if process.is_alive():
+                        continue
+                    if options['drain'] and process.exitcode == 0:
+                        continue
+                    self.stderr.write(f"{process.name} exited with {process.exitcode}, restarting it")
+                    processes[index] = spool_worker.start_one(index, workers, settings_module, **worker_options)
+                if options['drain'] and not any(process.is_alive() for process in processes):
+                    break
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current batches...")
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+        self.stdout.write(self.style.SUCCESS("Ingest workers stopped"))
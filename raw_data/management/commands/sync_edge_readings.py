@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from raw_data import edge
+
+
+class Command(BaseCommand):
+    help = (
+        "On an edge node (EDGE_NODE_ID set): ship readings stored locally to the central "
+        "database's edge_reading table. Safe to re-run; with --loop it keeps syncing and "
+        "retries with backoff while the central database is unreachable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EDGE_SYNC_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep running")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between syncs with --loop")
+        parser.add_argument('--max-backoff', type=float, default=300.0, help="Longest wait after failures")
+        parser.add_argument('--status', action='store_true', help="Only show the sync checkpoint")
+
+    def handle(self, *args, **options):
+        target = edge.central_alias()
+        if not settings.EDGE_NODE_ID or target not in settings.DATABASES:
+            raise CommandError("Edge mode is off: set EDGE_NODE_ID (and CENTRAL_DB_*) to sync")
+
+        if options['status']:
+            checkpoint = edge.get_checkpoint(target)
+            self.stdout.write(
+                f"{settings.EDGE_NODE_ID} → {target}: last id {checkpoint.last_id}, "
+                f"{checkpoint.rows_sent} sent, {edge.backlog(checkpoint).count()} pending, "
+                f"last success {checkpoint.last_success_at or '-'}"
+            )
+            if checkpoint.last_error:
+                self.stdout.write(f"Last error at {checkpoint.last_error_at}: {checkpoint.last_error}")
+            return
+
+        backoff = options['interval']
+        while True:
+            try:
+                sent = edge.sync(target=target, batch_size=options['batch_size'])
+            except DatabaseError as e:
+                if not options['loop']:
+                    raise CommandError(f"Sync to {target} failed: {e}")
+                self.stderr.write(f"Sync to {target} failed, retrying in {backoff:.0f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, options['max_backoff'])
+                continue
+
+            backoff = options['interval']
+            if sent or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} readings to {target}"))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0002_rename_capacity_companypress_sensor'),
+        ('raw_data', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='raw_data',
+            name='die',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='raw_readings', to='master.die', verbose_name='Die'),
+        ),
+        migrations.AddField(
+            model_name='raw_data',
+            name='press',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='raw_readings', to='master.companypress', verbose_name='Press'),
+        ),
+        migrations.AddIndex(
+            model_name='raw_data',
+            index=models.Index(fields=['press', 'datetime'], name='raw_press_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='raw_data',
+            index=models.Index(fields=['die', 'datetime'], name='raw_die_datetime_idx'),
+        ),
+    ]
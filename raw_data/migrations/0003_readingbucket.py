@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0003_dieusage'),
+        ('raw_data', '0002_raw_data_die_press'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_name', models.CharField(max_length=50, verbose_name='Sensor Name')),
+                ('resolution', models.CharField(choices=[('1m', '1 minute'), ('15m', '15 minutes'), ('1h', '1 hour'), ('1d', '1 day')], max_length=3, verbose_name='Resolution')),
+                ('bucket_start', models.DateTimeField(verbose_name='Bucket Start')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Readings')),
+                ('total_length', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total Length')),
+                ('t_factor_sum', models.DecimalField(decimal_places=3, default=0, max_digits=16, verbose_name='T-Factor Sum')),
+                ('t_factor_min', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='T-Factor Min')),
+                ('t_factor_max', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='T-Factor Max')),
+                ('press', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reading_buckets', to='master.companypress', verbose_name='Press')),
+            ],
+            options={
+                'db_table': 'reading_bucket',
+                'indexes': [models.Index(fields=['press', 'resolution', 'bucket_start'], name='bucket_press_res_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('sensor_name', 'resolution', 'bucket_start'), name='uniq_reading_bucket')],
+            },
+        ),
+    ]
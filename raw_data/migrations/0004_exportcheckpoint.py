@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raw_data', '0003_readingbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=50, unique=True, verbose_name='Dataset')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Last Exported ID')),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Exported Update')),
+                ('rows_exported', models.BigIntegerField(default=0, verbose_name='Rows Exported')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Run')),
+            ],
+            options={
+                'db_table': 'export_checkpoint',
+            },
+        ),
+    ]
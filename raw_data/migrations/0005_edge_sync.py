@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raw_data', '0004_exportcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EdgeSyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(max_length=50, unique=True, verbose_name='Target Database')),
+                ('epoch', models.CharField(max_length=16, verbose_name='Edge Database Epoch')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Last Shipped ID')),
+                ('rows_sent', models.BigIntegerField(default=0, verbose_name='Rows Shipped')),
+                ('last_success_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Successful Batch')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('last_error_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Error At')),
+            ],
+            options={
+                'db_table': 'edge_sync_checkpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='EdgeReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('edge_uid', models.CharField(max_length=80, unique=True, verbose_name='Edge UID')),
+                ('node', models.CharField(max_length=50, verbose_name='Edge Node')),
+                ('sensor_name', models.CharField(max_length=50, verbose_name='Sensor Name')),
+                ('datetime', models.DateTimeField(verbose_name='Date & Time')),
+                ('t_factor', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='T-Factor')),
+                ('die_number', models.CharField(max_length=50, verbose_name='Die Number')),
+                ('length', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Length (ft.in)')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Received At')),
+                ('applied_at', models.DateTimeField(blank=True, null=True, verbose_name='Applied At')),
+                ('raw_data', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edge_reading', to='raw_data.raw_data', verbose_name='Raw Data')),
+            ],
+            options={
+                'db_table': 'edge_reading',
+                'indexes': [models.Index(fields=['applied_at', 'id'], name='edge_reading_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+        ('raw_data', '0005_edge_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorClock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_name', models.CharField(max_length=50, unique=True, verbose_name='Sensor Name')),
+                ('offset_seconds', models.FloatField(default=0, verbose_name='Clock Offset (s)')),
+                ('window_min', models.FloatField(blank=True, null=True, verbose_name='Window Minimum Offset (s)')),
+                ('window_started_at', models.DateTimeField(blank=True, null=True, verbose_name='Window Started At')),
+                ('max_event_time', models.DateTimeField(blank=True, null=True, verbose_name='Latest Reading Time')),
+                ('watermark', models.DateTimeField(blank=True, null=True, verbose_name='Watermark')),
+                ('last_received_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Received At')),
+                ('readings', models.BigIntegerField(default=0, verbose_name='Readings')),
+                ('late_readings', models.BigIntegerField(default=0, verbose_name='Late Readings')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sensor_clock',
+            },
+        ),
+        migrations.AddField(
+            model_name='raw_data',
+            name='clock_offset',
+            field=models.FloatField(blank=True, null=True, verbose_name='Clock Offset (s)'),
+        ),
+        migrations.AddField(
+            model_name='readingbucket',
+            name='finalized_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Finalized At'),
+        ),
+        migrations.AddField(
+            model_name='readingbucket',
+            name='is_final',
+            field=models.BooleanField(default=False, verbose_name='Final'),
+        ),
+        migrations.AddField(
+            model_name='readingbucket',
+            name='late_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Late Readings'),
+        ),
+        migrations.AddIndex(
+            model_name='readingbucket',
+            index=models.Index(fields=['sensor_name', 'resolution', 'is_final', 'bucket_start'], name='bucket_open_idx'),
+        ),
+    ]
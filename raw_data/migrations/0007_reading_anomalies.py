@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_resourceversion'),
+        ('raw_data', '0006_sensor_clock_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_name', models.CharField(max_length=50, verbose_name='Sensor Name')),
+                ('die_number', models.CharField(max_length=50, verbose_name='Die Number')),
+                ('metric', models.CharField(choices=[('t_factor', 'T-Factor'), ('length', 'Length')], max_length=10, verbose_name='Metric')),
+                ('value', models.FloatField(verbose_name='Value')),
+                ('expected', models.FloatField(verbose_name='Expected')),
+                ('band_low', models.FloatField(verbose_name='Band Low')),
+                ('band_high', models.FloatField(verbose_name='Band High')),
+                ('score', models.FloatField(verbose_name='Z-Score')),
+                ('reading_time', models.DateTimeField(verbose_name='Reading Time')),
+                ('repeats', models.PositiveIntegerField(default=0, verbose_name='Repeats')),
+                ('last_seen_at', models.DateTimeField(verbose_name='Last Seen At')),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True, verbose_name='Acknowledged At')),
+                ('die', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reading_alerts', to='master.die', verbose_name='Die')),
+                ('press', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reading_alerts', to='master.companypress', verbose_name='Press')),
+            ],
+            options={
+                'db_table': 'reading_alert',
+                'ordering': ['-reading_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReadingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_name', models.CharField(max_length=50, verbose_name='Sensor Name')),
+                ('die_number', models.CharField(max_length=50, verbose_name='Die Number')),
+                ('metric', models.CharField(choices=[('t_factor', 'T-Factor'), ('length', 'Length')], max_length=10, verbose_name='Metric')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Readings')),
+                ('mean', models.FloatField(default=0, verbose_name='Mean')),
+                ('m2', models.FloatField(default=0, verbose_name='Sum of Squared Deviations')),
+                ('ewma', models.FloatField(default=0, verbose_name='EWMA Mean')),
+                ('ewm_var', models.FloatField(default=0, verbose_name='EWMA Variance')),
+                ('sketch', models.JSONField(default=dict, verbose_name='Quantile Sketch')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('die', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reading_stats', to='master.die', verbose_name='Die')),
+                ('last_alert', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='raw_data.readingalert', verbose_name='Last Alert')),
+            ],
+            options={
+                'db_table': 'reading_stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='readingalert',
+            index=models.Index(fields=['die', 'reading_time'], name='alert_die_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingalert',
+            index=models.Index(fields=['press', 'reading_time'], name='alert_press_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='readingstats',
+            constraint=models.UniqueConstraint(fields=('sensor_name', 'die_number', 'metric'), name='uniq_reading_stats'),
+        ),
+    ]
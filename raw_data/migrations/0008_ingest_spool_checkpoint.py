@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raw_data', '0007_reading_anomalies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestSpoolCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(unique=True, verbose_name='Shard')),
+                ('segment', models.CharField(blank=True, max_length=32, verbose_name='Current Segment')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Byte Offset')),
+                ('readings', models.BigIntegerField(default=0, verbose_name='Readings Stored')),
+                ('rejected', models.BigIntegerField(default=0, verbose_name='Readings Rejected')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'db_table': 'ingest_spool_checkpoint',
+            },
+        ),
+    ]
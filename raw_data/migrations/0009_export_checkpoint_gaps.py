@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raw_data', '0008_ingest_spool_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportcheckpoint',
+            name='gaps',
+            field=models.JSONField(blank=True, default=list, verbose_name='Unexported ID Ranges'),
+        ),
+    ]
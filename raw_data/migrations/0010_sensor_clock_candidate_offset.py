@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raw_data', '0009_export_checkpoint_gaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorclock',
+            name='candidate_offset',
+            field=models.FloatField(blank=True, null=True, verbose_name='Candidate Offset (s)'),
+        ),
+        migrations.AddField(
+            model_name='sensorclock',
+            name='candidate_windows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Candidate Windows'),
+        ),
+    ]
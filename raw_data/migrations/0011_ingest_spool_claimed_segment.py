@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('raw_data', '0010_sensor_clock_candidate_offset'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestspoolcheckpoint',
+            name='segment',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Current Segment'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0005_image_derivative'),
+        ('raw_data', '0011_ingest_spool_claimed_segment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='raw_data',
+            index=models.Index(fields=['sensor_name', 'datetime'], name='raw_sensor_datetime_idx'),
+        ),
+    ]
@@ -8,9 +8,34 @@ class Raw_data(models.Model):
     die_number = models.CharField(max_length=50, verbose_name="Die Number")
     length = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Length (ft.in)")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Record Created At")
+    # Seconds added to the sensor's own timestamp by the clock correction (raw_data.clock)
+    clock_offset = models.FloatField(null=True, blank=True, verbose_name="Clock Offset (s)")
+
+    # Resolved once at ingest from die_number / sensor_name (see raw_data.lookups)
+    die = models.ForeignKey(
+        'master.Die',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='raw_readings',
+        verbose_name="Die"
+    )
+    press = models.ForeignKey(
+        'master.CompanyPress',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='raw_readings',
+        verbose_name="Press"
+    )
 
     class Meta:
         db_table = "raw_machine_data"
+        indexes = [
+            models.Index(fields=['press', 'datetime'], name='raw_press_datetime_idx'),
+            models.Index(fields=['die', 'datetime'], name='raw_die_datetime_idx'),
+            models.Index(fields=['sensor_name', 'datetime'], name='raw_sensor_datetime_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sensor_name} @ {self.datetime} → {self.length} ft"
@@ -38,3 +63,259 @@ class ProductionData(models.Model):
 
     def __str__(self):
         return f"{self.die_name} → {self.length} ft @ {self.datetime}"
+
+
+class ReadingBucket(models.Model):
+    """
+    Downsampled Raw_data for charts: one row per sensor, resolution and bucket,
+    maintained incrementally by raw_data.timeseries.
+    """
+    RESOLUTION_CHOICES = [
+        ('1m', '1 minute'),
+        ('15m', '15 minutes'),
+        ('1h', '1 hour'),
+        ('1d', '1 day'),
+    ]
+
+    sensor_name = models.CharField(max_length=50, verbose_name="Sensor Name")
+    press = models.ForeignKey(
+        'master.CompanyPress',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reading_buckets',
+        verbose_name="Press"
+    )
+    resolution = models.CharField(max_length=3, choices=RESOLUTION_CHOICES, verbose_name="Resolution")
+    bucket_start = models.DateTimeField(verbose_name="Bucket Start")
+
+    count = models.PositiveIntegerField(default=0, verbose_name="Readings")
+    total_length = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total Length")
+    t_factor_sum = models.DecimalField(max_digits=16, decimal_places=3, default=0, verbose_name="T-Factor Sum")
+    t_factor_min = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="T-Factor Min")
+    t_factor_max = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="T-Factor Max")
+
+    # Final once the sensor's watermark has passed the bucket end; a late reading re-opens it
+    is_final = models.BooleanField(default=False, verbose_name="Final")
+    finalized_at = models.DateTimeField(null=True, blank=True, verbose_name="Finalized At")
+    late_count = models.PositiveIntegerField(default=0, verbose_name="Late Readings")
+
+    class Meta:
+        db_table = "reading_bucket"
+        constraints = [
+            models.UniqueConstraint(fields=['sensor_name', 'resolution', 'bucket_start'], name='uniq_reading_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['press', 'resolution', 'bucket_start'], name='bucket_press_res_start_idx'),
+            models.Index(fields=['sensor_name', 'resolution', 'is_final', 'bucket_start'], name='bucket_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sensor_name} [{self.resolution}] @ {self.bucket_start} → {self.count}"
+
+
+class SensorClock(models.Model):
+    """Clock offset estimate and event-time watermark of one sensor (see raw_data.clock)"""
+    sensor_name = models.CharField(max_length=50, unique=True, verbose_name="Sensor Name")
+
+    # received time - sensor time, the smallest seen per window (network delay is never negative)
+    offset_seconds = models.FloatField(default=0, verbose_name="Clock Offset (s)")
+    window_min = models.FloatField(null=True, blank=True, verbose_name="Window Minimum Offset (s)")
+    window_started_at = models.DateTimeField(null=True, blank=True, verbose_name="Window Started At")
+    # A higher window minimum, and for how many windows in a row it held (raw_data.clock._close_window)
+    candidate_offset = models.FloatField(null=True, blank=True, verbose_name="Candidate Offset (s)")
+    candidate_windows = models.PositiveIntegerField(default=0, verbose_name="Candidate Windows")
+
+    max_event_time = models.DateTimeField(null=True, blank=True, verbose_name="Latest Reading Time")
+    watermark = models.DateTimeField(null=True, blank=True, verbose_name="Watermark")
+    last_received_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Received At")
+    readings = models.BigIntegerField(default=0, verbose_name="Readings")
+    late_readings = models.BigIntegerField(default=0, verbose_name="Late Readings")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "sensor_clock"
+
+    def __str__(self):
+        return f"{self.sensor_name}: offset {self.offset_seconds:+.1f}s, watermark {self.watermark}"
+
+
+class ReadingStats(models.Model):
+    """
+    Running statistics of one metric for a (sensor, die number) pair, updated
+    per reading by raw_data.anomaly: Welford mean / variance over all
+    readings, an EWMA mean / variance that follows drift, and P² quantile
+    sketches of the low and high tails.
+    """
+    METRIC_CHOICES = [
+        ('t_factor', 'T-Factor'),
+        ('length', 'Length'),
+    ]
+
+    sensor_name = models.CharField(max_length=50, verbose_name="Sensor Name")
+    die_number = models.CharField(max_length=50, verbose_name="Die Number")
+    die = models.ForeignKey(
+        'master.Die',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reading_stats',
+        verbose_name="Die"
+    )
+    metric = models.CharField(max_length=10, choices=METRIC_CHOICES, verbose_name="Metric")
+
+    count = models.BigIntegerField(default=0, verbose_name="Readings")
+    mean = models.FloatField(default=0, verbose_name="Mean")
+    m2 = models.FloatField(default=0, verbose_name="Sum of Squared Deviations")
+    ewma = models.FloatField(default=0, verbose_name="EWMA Mean")
+    ewm_var = models.FloatField(default=0, verbose_name="EWMA Variance")
+    sketch = models.JSONField(default=dict, verbose_name="Quantile Sketch")
+    last_alert = models.ForeignKey(
+        'ReadingAlert',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Last Alert"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "reading_stats"
+        constraints = [
+            models.UniqueConstraint(fields=['sensor_name', 'die_number', 'metric'], name='uniq_reading_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.sensor_name}/{self.die_number} {self.metric}: {self.mean:.3f} over {self.count}"
+
+    @property
+    def std(self):
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+
+class ReadingAlert(models.Model):
+    """An out-of-band push flagged at ingest; repeats within the cool-down are folded into `repeats`"""
+    sensor_name = models.CharField(max_length=50, verbose_name="Sensor Name")
+    die_number = models.CharField(max_length=50, verbose_name="Die Number")
+    die = models.ForeignKey(
+        'master.Die',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reading_alerts',
+        verbose_name="Die"
+    )
+    press = models.ForeignKey(
+        'master.CompanyPress',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reading_alerts',
+        verbose_name="Press"
+    )
+    metric = models.CharField(max_length=10, choices=ReadingStats.METRIC_CHOICES, verbose_name="Metric")
+    value = models.FloatField(verbose_name="Value")
+    expected = models.FloatField(verbose_name="Expected")
+    band_low = models.FloatField(verbose_name="Band Low")
+    band_high = models.FloatField(verbose_name="Band High")
+    score = models.FloatField(verbose_name="Z-Score")
+    reading_time = models.DateTimeField(verbose_name="Reading Time")
+    repeats = models.PositiveIntegerField(default=0, verbose_name="Repeats")
+    last_seen_at = models.DateTimeField(verbose_name="Last Seen At")
+    acknowledged_at = models.DateTimeField(null=True, blank=True, verbose_name="Acknowledged At")
+
+    class Meta:
+        db_table = "reading_alert"
+        ordering = ['-reading_time']
+        indexes = [
+            models.Index(fields=['die', 'reading_time'], name='alert_die_time_idx'),
+            models.Index(fields=['press', 'reading_time'], name='alert_press_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sensor_name}/{self.die_number} {self.metric}={self.value} @ {self.reading_time}"
+
+
+class ExportCheckpoint(models.Model):
+    """How far a dataset has been exported to Parquet (see raw_data.export)"""
+    dataset = models.CharField(max_length=50, unique=True, verbose_name="Dataset")
+    last_id = models.BigIntegerField(default=0, verbose_name="Last Exported ID")
+    last_updated_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Exported Update")
+    rows_exported = models.BigIntegerField(default=0, verbose_name="Rows Exported")
+    # [first id, last id, epoch seen] below last_id not committed yet when the cursor passed them
+    gaps = models.JSONField(default=list, blank=True, verbose_name="Unexported ID Ranges")
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Run")
+
+    class Meta:
+        db_table = "export_checkpoint"
+
+    def __str__(self):
+        return f"{self.dataset} → id {self.last_id}"
+
+
+class EdgeSyncCheckpoint(models.Model):
+    """On an edge node: how far local Raw_data has been shipped to a central database (see raw_data.edge)"""
+    target = models.CharField(max_length=50, unique=True, verbose_name="Target Database")
+    # Random per edge database, so ids of a re-created edge database never collide with shipped ones
+    epoch = models.CharField(max_length=16, verbose_name="Edge Database Epoch")
+    last_id = models.BigIntegerField(default=0, verbose_name="Last Shipped ID")
+    rows_sent = models.BigIntegerField(default=0, verbose_name="Rows Shipped")
+    last_success_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Successful Batch")
+    last_error = models.TextField(blank=True, verbose_name="Last Error")
+    last_error_at = models.DateTimeField(null=True, blank=True, verbose_name="Last Error At")
+
+    class Meta:
+        db_table = "edge_sync_checkpoint"
+
+    def __str__(self):
+        return f"{self.target} → id {self.last_id}"
+
+
+class IngestSpoolCheckpoint(models.Model):
+    """How far an ingest spool shard has been stored (see raw_data.spool)"""
+    shard = models.PositiveSmallIntegerField(unique=True, verbose_name="Shard")
+    segment = models.CharField(max_length=64, blank=True, verbose_name="Current Segment")
+    offset = models.BigIntegerField(default=0, verbose_name="Byte Offset")
+    readings = models.BigIntegerField(default=0, verbose_name="Readings Stored")
+    rejected = models.BigIntegerField(default=0, verbose_name="Readings Rejected")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    class Meta:
+        db_table = "ingest_spool_checkpoint"
+
+    def __str__(self):
+        return f"shard {self.shard} → {self.segment or '-'}@{self.offset}"
+
+
+class EdgeReading(models.Model):
+    """
+    On the central database: a reading shipped by an edge node, waiting to go
+    through the normal ingest pipeline (apply_edge_readings).
+    """
+    edge_uid = models.CharField(max_length=80, unique=True, verbose_name="Edge UID")  # node:epoch:edge id
+    node = models.CharField(max_length=50, verbose_name="Edge Node")
+    sensor_name = models.CharField(max_length=50, verbose_name="Sensor Name")
+    datetime = models.DateTimeField(verbose_name="Date & Time")
+    t_factor = models.DecimalField(max_digits=10, decimal_places=3, verbose_name="T-Factor")
+    die_number = models.CharField(max_length=50, verbose_name="Die Number")
+    length = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Length (ft.in)")
+    received_at = models.DateTimeField(auto_now_add=True, verbose_name="Received At")
+    applied_at = models.DateTimeField(null=True, blank=True, verbose_name="Applied At")
+    raw_data = models.OneToOneField(
+        Raw_data,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='edge_reading',
+        verbose_name="Raw Data"
+    )
+
+    class Meta:
+        db_table = "edge_reading"
+        indexes = [
+            models.Index(fields=['applied_at', 'id'], name='edge_reading_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.edge_uid} ({'applied' if self.applied_at else 'pending'})"
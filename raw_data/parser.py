@@ -0,0 +1,229 @@
+"""
+Parser for messages coming from the LoRa receiver.
+
+A message looks like:
+    "1234,30/10/25 17:27:58, 1.120,960, 11.366, 37 Feet3 Inch"
+     sensor, date time, t-factor, die no, (unused), length
+
+`parse_message` handles one message (used by LoraReceiveView) and
+`parse_batch` turns thousands of lines into NumPy column arrays for bulk
+ingest and backfill jobs.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+
+class MessageParseError(ValueError):
+    """Raised when a message (or one of its fields) cannot be decoded"""
+
+
+ParsedReading = namedtuple(
+    'ParsedReading',
+    ['sensor_name', 'datetime', 't_factor', 'die_number', 'length'],
+)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Compiled patterns
+# ─────────────────────────────────────────────────────────────────────────────
+MESSAGE_RE = re.compile(
+    r' *(?P<sensor>[^,]+?) *,'
+    r' *(?P<date>\d\d?/\d\d?/\d\d) +(?P<time>\d\d?:\d\d:\d\d) *,'
+    r' *(?P<t_factor>[-+]?(?:\d+\.?\d*|\.\d+)) *,'
+    r' *(?P<die>[^,]*?) *,'
+    r'[^,]*,'
+    r' *(?P<length>[^,]*)'
+)
+
+LENGTH_RE = re.compile(
+    r'^(?P<feet>\d+(?:\.\d+)?)\s*(?:feet|foot|ft)?'
+    r'\s*(?:(?P<inch>\d+(?:\.\d+)?)\s*(?:inches|inch|in)?)?$',
+    re.IGNORECASE,
+)
+
+# +RCV=<address>,<length>,<message>,<rssi>,<snr> frames written by reciver.py
+RCV_RE = re.compile(r'^\+RCV=(?P<address>\d+),(?P<length>\d+),(?P<rest>.*)$')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Field decoders
+# ─────────────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=4096)
+def _day_start(date_str):
+    """Midnight of a 'dd/mm/yy' date, cached because a sensor sends thousands of readings per day"""
+    try:
+        day, month, year = map(int, date_str.split('/'))
+        # Same century rule as strptime's %y
+        return datetime(2000 + year if year < 69 else 1900 + year, month, day)
+    except ValueError as e:
+        raise MessageParseError(f"Invalid date '{date_str}': {e}")
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def _day_epoch_seconds(date_str):
+    """Seconds from 1970-01-01 to midnight of a 'dd/mm/yy' date (batch mode timestamps)"""
+    return int((_day_start(date_str) - _EPOCH).total_seconds())
+
+
+@lru_cache(maxsize=86400)
+def _seconds_of_day(time_str):
+    """'HH:MM:SS' -> seconds since midnight (at most one cache entry per second of the day)"""
+    try:
+        hour, minute, second = map(int, time_str.split(':'))
+    except ValueError:
+        raise MessageParseError(f"Invalid time '{time_str}'")
+    if hour > 23 or minute > 59 or second > 59:
+        raise MessageParseError(f"Invalid time '{time_str}'")
+    return hour * 3600 + minute * 60 + second
+
+
+@lru_cache(maxsize=86400)
+def _time_of_day(time_str):
+    return timedelta(seconds=_seconds_of_day(time_str))
+
+
+def parse_timestamp(dt_str):
+    """Convert '30/10/25 17:27:58' -> datetime(2025, 10, 30, 17, 27, 58) without strptime"""
+    try:
+        date_part, time_part = dt_str.split()
+    except ValueError:
+        raise MessageParseError(f"Invalid timestamp '{dt_str}'")
+    return _day_start(date_part) + _time_of_day(time_part)
+
+
+@lru_cache(maxsize=4096)
+def parse_length(length_str):
+    """
+    Convert '37 Feet3 Inch' -> 37.3 (feet + inch / 10, as stored in Raw_data.length).
+    Unlike the old view helper this raises MessageParseError instead of returning 0.0.
+    """
+    match = LENGTH_RE.match(length_str.strip())
+    if not match:
+        raise MessageParseError(f"Invalid length '{length_str.strip()}'")
+    feet = float(match.group('feet'))
+    inch = match.group('inch')
+    if inch is None:
+        return feet
+    return round(feet + float(inch) / 10, 2)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Single message
+# ─────────────────────────────────────────────────────────────────────────────
+def parse_message(message):
+    """Parse one LoRa message into a ParsedReading (naive sensor-local datetime)"""
+    match = MESSAGE_RE.match(message)
+    if not match:
+        raise MessageParseError("Invalid message format")
+
+    sensor_name, date_str, time_str, t_factor, die_number, length_str = match.groups()
+    if not die_number:
+        raise MessageParseError("Missing die number")
+
+    return ParsedReading(
+        sensor_name=sensor_name,
+        datetime=_day_start(date_str) + _time_of_day(time_str),
+        t_factor=float(t_factor),
+        die_number=die_number,
+        length=parse_length(length_str),
+    )
+
+
+def parse_rcv_frame(line):
+    """
+    Extract the message from a '+RCV=2,52,<message>,-40,12' receiver frame.
+    Returns None for lines that are not RCV frames.
+    """
+    match = RCV_RE.match(line.strip())
+    if not match:
+        return None
+    length = int(match.group('length'))
+    return match.group('rest')[:length]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch mode
+# ─────────────────────────────────────────────────────────────────────────────
+class ReadingColumns:
+    """
+    Column arrays for a batch of parsed messages.
+
+    `datetime` is datetime64[s] (naive, sensor-local), `t_factor` and `length`
+    are float64, `sensor_name` and `die_number` are unicode arrays.
+    `errors` holds (line_index, message) for every rejected line.
+    """
+
+    def __init__(self, sensor_name, datetime, t_factor, die_number, length, errors):
+        self.sensor_name = sensor_name
+        self.datetime = datetime
+        self.t_factor = t_factor
+        self.die_number = die_number
+        self.length = length
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.sensor_name)
+
+    def rows(self):
+        """Iterate as ParsedReading tuples (python datetimes / floats)"""
+        timestamps = self.datetime.astype('datetime64[us]').astype(datetime)
+        for i in range(len(self)):
+            yield ParsedReading(
+                sensor_name=str(self.sensor_name[i]),
+                datetime=timestamps[i],
+                t_factor=float(self.t_factor[i]),
+                die_number=str(self.die_number[i]),
+                length=float(self.length[i]),
+            )
+
+
+def parse_batch(lines):
+    """
+    Parse many messages at once into ReadingColumns.
+
+    Lines are matched one by one with the compiled pattern; numeric and
+    timestamp columns are then converted in whole-array operations.
+    Bad lines are skipped and reported in `errors`.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("parse_batch requires numpy (pip install numpy)")
+
+    match = MESSAGE_RE.match
+    sensors, timestamps, t_factors, dies, lengths = [], [], [], [], []
+    errors = []
+
+    for index, line in enumerate(lines):
+        m = match(line)
+        if m is None:
+            errors.append((index, "Invalid message format"))
+            continue
+        sensor_name, date_str, time_str, t_factor, die_number, length_str = m.groups()
+        if not die_number:
+            errors.append((index, "Missing die number"))
+            continue
+        try:
+            timestamp = _day_epoch_seconds(date_str) + _seconds_of_day(time_str)
+            length = parse_length(length_str)
+        except MessageParseError as e:
+            errors.append((index, str(e)))
+            continue
+        sensors.append(sensor_name)
+        timestamps.append(timestamp)
+        t_factors.append(t_factor)
+        dies.append(die_number)
+        lengths.append(length)
+
+    return ReadingColumns(
+        sensor_name=np.array(sensors, dtype=str),
+        datetime=np.array(timestamps, dtype=np.int64).astype('datetime64[s]'),
+        t_factor=np.array(t_factors, dtype=np.float64),
+        die_number=np.array(dies, dtype=str),
+        length=np.array(lengths, dtype=np.float64),
+        errors=errors,
+    )
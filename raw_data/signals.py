@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+
+from master.models import Die, CompanyPress
+from .lookups import master_lookup
+
+
+for model in (Die, CompanyPress):
+    post_save.connect(master_lookup.invalidate, sender=model, dispatch_uid=f"raw_data_lookup_{model.__name__}_save")
+    post_delete.connect(master_lookup.invalidate, sender=model, dispatch_uid=f"raw_data_lookup_{model.__name__}_delete")
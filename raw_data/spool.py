@@ -0,0 +1,228 @@
+"""
+Spooled ingest with sharded worker processes.
+
+With INGEST_SPOOL_DIR set, LoraReceiveView no longer writes to the database
+in the request: it parses the message, appends the reading to its sensor's
+shard of the spool and answers 202. A request costs one small file append,
+however busy the database is.
+
+Layout: <spool>/shard-NN/<segment>.jsonl, one JSON line per reading.
+NN is crc32(sensor) % INGEST_SHARDS, so a sensor always lands in the same
+shard. The segment number is the clock time of the write in
+INGEST_SEGMENT_SECONDS steps, so readers never share a file with writers: a
+segment is read once its time has passed, plus INGEST_SEGMENT_GRACE_SECONDS
+for a writer that picked its name just before and was held up.
+
+A worker first renames a closed segment to <segment>.<ns>.claimed, a name
+no writer uses, and reads that to the end before deleting it. A writer held
+up past the grace recreates <segment>.jsonl instead of writing into a file
+that is being deleted; the recreated file is claimed and read from its
+start like any other.
+
+`run_ingest_workers` starts worker processes. Each owns the shards with
+shard % workers == index and takes an exclusive lock on them, so two runs
+never consume the same shard. A worker reads its closed segments in order
+and runs the readings through ingest.store_reading, INGEST_BATCH_SIZE per
+transaction. The shard's IngestSpoolCheckpoint (segment, byte offset) is
+saved in that same transaction, so after a crash the uncommitted batch is
+read again and no reading is stored twice; a claimed file left by a crash
+is resumed from the checkpoint's offset. Per-sensor order is arrival order:
+one sensor, one shard, one worker, segments in order.
+
+Sensors never share a shard across workers, so their clock, bucket and
+statistics rows are never contended. A reading store_reading rejects
+(bad value) is appended to <spool>/rejected.jsonl; a database error rolls
+the batch back and it is retried.
+"""
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .ingest import store_reading
+from .models import IngestSpoolCheckpoint
+
+SEGMENT_SUFFIX = '.jsonl'
+CLAIMED_SUFFIX = '.claimed'
+
+
+def enabled():
+    return bool(settings.INGEST_SPOOL_DIR)
+
+
+def shard_of(sensor_name):
+    """Stable across processes (unlike hash())"""
+    return zlib.crc32(sensor_name.encode('utf-8')) % settings.INGEST_SHARDS
+
+
+def shard_dir(shard, spool_dir=None):
+    return os.path.join(spool_dir or settings.INGEST_SPOOL_DIR, f'shard-{shard:02d}')
+
+
+def _segment(timestamp):
+    return int(timestamp // settings.INGEST_SEGMENT_SECONDS)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing (request side)
+# ─────────────────────────────────────────────────────────────────────────────
+def append(reading, received_at=None, spool_dir=None):
+    """
+    Spool one parser.ParsedReading (naive sensor-local time). Returns the
+    shard. The segment is picked from the clock now, not from `received_at`:
+    the request may have waited for admission since it arrived.
+    """
+    received_at = received_at or timezone.now()
+    shard = shard_of(reading.sensor_name)
+    directory = shard_dir(shard, spool_dir)
+    os.makedirs(directory, exist_ok=True)
+    line = json.dumps({
+        'sensor': reading.sensor_name,
+        'time': reading.datetime.isoformat(),
+        't_factor': reading.t_factor,
+        'die': reading.die_number,
+        'length': reading.length,
+        'received_at': received_at.isoformat(),
+    }, separators=(',', ':')) + '\n'
+    path = os.path.join(directory, f'{_segment(time.time()):012d}{SEGMENT_SUFFIX}')
+    # One O_APPEND write per line: concurrent request processes never interleave lines
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+    return shard
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading (worker side)
+# ─────────────────────────────────────────────────────────────────────────────
+def closed_segments(shard, spool_dir=None, drain=False, now=None):
+    """Segment file names of a shard that writers are done with, oldest first (all of them with drain)"""
+    directory = shard_dir(shard, spool_dir)
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    except FileNotFoundError:
+        return []
+    if drain:
+        return names
+    open_from = _segment((now or time.time()) - settings.INGEST_SEGMENT_GRACE_SECONDS)
+    return [name for name in names if int(name[:-len(SEGMENT_SUFFIX)]) < open_from]
+
+
+def claimed_segments(shard, spool_dir=None):
+    """Segments a worker claimed and has not finished (after a crash), oldest first"""
+    try:
+        return sorted(name for name in os.listdir(shard_dir(shard, spool_dir)) if name.endswith(CLAIMED_SUFFIX))
+    except FileNotFoundError:
+        return []
+
+
+def _claim(directory, segment):
+    """Rename a closed segment to a name no writer uses; a late writer starts a new file instead"""
+    claimed = f'{segment[:-len(SEGMENT_SUFFIX)]}.{time.time_ns()}{CLAIMED_SUFFIX}'
+    os.rename(os.path.join(directory, segment), os.path.join(directory, claimed))
+    return claimed
+
+
+def lock_shard(shard, spool_dir=None):
+    """Exclusive, non-blocking lock on a shard for the life of the process; None if another worker has it"""
+    import fcntl
+
+    directory = shard_dir(shard, spool_dir)
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, '.lock'), 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _read_batches(path, offset, batch_size):
+    """Yield (lines, end offset) from a byte offset; a torn last line (crash mid-write) is yielded as is"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        lines = []
+        for line in f:
+            offset += len(line)
+            lines.append(line)
+            if len(lines) >= batch_size:
+                yield lines, offset
+                lines = []
+        if lines:
+            yield lines, offset
+
+
+def _decode(line):
+    data = json.loads(line)
+    reading_time = timezone.make_aware(datetime.fromisoformat(data['time']), timezone.get_current_timezone())
+    return data['sensor'], reading_time, data['t_factor'], data['die'], data['length'], parse_datetime(data['received_at'])
+
+
+def store_batch(checkpoint, segment, lines, end_offset):
+    """Store a batch and move the checkpoint in one transaction. Returns (stored, rejected lines)"""
+    stored, rejected = 0, []
+    with transaction.atomic():
+        for line in lines:
+            try:
+                sensor_name, reading_time, t_factor, die_number, length, received_at = _decode(line)
+                # store_reading's own atomic block is a savepoint here: a rejected reading leaves the batch intact
+                store_reading(sensor_name, reading_time, t_factor, die_number, length, received_at=received_at)
+                stored += 1
+            except (ValueError, KeyError, TypeError, ValidationError, IntegrityError, DataError) as e:
+                rejected.append({'line': line.decode('utf-8', 'replace').rstrip('\n'), 'error': f"{type(e).__name__}: {e}"})
+        checkpoint.segment = segment
+        checkpoint.offset = end_offset
+        checkpoint.readings += stored
+        checkpoint.rejected += len(rejected)
+        checkpoint.save(update_fields=['segment', 'offset', 'readings', 'rejected', 'updated_at'])
+    return stored, rejected
+
+
+def _reject(rejected, spool_dir=None):
+    if rejected:
+        with open(os.path.join(spool_dir or settings.INGEST_SPOOL_DIR, 'rejected.jsonl'), 'a') as f:
+            f.writelines(json.dumps(item) + '\n' for item in rejected)
+
+
+def drain_shard(shard, batch_size=None, spool_dir=None, drain=False):
+    """Ingest a shard's closed segments. Returns the number of readings stored"""
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    checkpoint, _ = IngestSpoolCheckpoint.objects.get_or_create(shard=shard)
+    directory = shard_dir(shard, spool_dir)
+    stored = 0
+    # Claimed names are unique, so the checkpoint's offset only ever applies to the file it was taken in
+    segments = claimed_segments(shard, spool_dir)
+    segments += [_claim(directory, segment) for segment in closed_segments(shard, spool_dir, drain)]
+    for segment in segments:
+        path = os.path.join(directory, segment)
+        offset = checkpoint.offset if segment == checkpoint.segment else 0
+        for lines, end_offset in _read_batches(path, offset, batch_size):
+            done, rejected = store_batch(checkpoint, segment, lines, end_offset)
+            _reject(rejected, spool_dir)
+            stored += done
+        # Read to the end: nothing can be appended to a claimed file after the grace
+        os.remove(path)
+    return stored
+
+
+def status(spool_dir=None):
+    """Per shard: (shard, pending segment files, checkpoint)"""
+    checkpoints = {checkpoint.shard: checkpoint for checkpoint in IngestSpoolCheckpoint.objects.all()}
+    return [
+        (
+            shard,
+            len(closed_segments(shard, spool_dir, drain=True)) + len(claimed_segments(shard, spool_dir)),
+            checkpoints.get(shard),
+        )
+        for shard in range(settings.INGEST_SHARDS)
+    ]
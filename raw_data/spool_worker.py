@@ -0,0 +1,83 @@
+"""
+Ingest worker processes (raw_data.spool).
+
+Kept free of Django imports at module level: processes are spawned, and the
+child imports this module before Django is set up in it.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+logger = logging.getLogger('raw_data.spool')
+
+
+def run(index, workers, settings_module, database=None, spool_dir=None, batch_size=None, poll=1.0, drain=False,
+        max_backoff=60.0):
+    """
+    Body of worker `index` of `workers`: store the spooled readings of the
+    shards it owns until stopped (SIGTERM/SIGINT, after the current batch). With
+    drain=True it also takes the segments still being written and returns once
+    its shards are empty, for when no requests are coming in.
+    `database` (the default connection's settings) and `spool_dir` override
+    the configured ones, for benchmarks.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import DatabaseError, close_old_connections, connections
+    from raw_data import spool
+
+    if database:
+        connections['default'].settings_dict.update(database)
+    if spool_dir:
+        settings.INGEST_SPOOL_DIR = spool_dir
+
+    stopping = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stopping.append(True))
+
+    locks = {}
+    for shard in range(index, settings.INGEST_SHARDS, workers):
+        lock = spool.lock_shard(shard)
+        if lock is None:
+            logger.warning("Ingest worker %s: shard %s is taken by another worker, skipping it", index, shard)
+        else:
+            locks[shard] = lock
+
+    stored, backoff = 0, poll
+    while not stopping:
+        try:
+            done = sum(spool.drain_shard(shard, batch_size, drain=drain) for shard in locks)
+        except DatabaseError as e:
+            # The failed batch rolled back with its checkpoint, so it is read again
+            logger.warning("Ingest worker %s: database error, retrying in %.0fs: %s", index, backoff, e)
+            close_old_connections()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+            continue
+        backoff = poll
+        stored += done
+        if drain and not done:
+            break
+        if not done:
+            time.sleep(poll)
+    connections.close_all()
+    return stored
+
+
+def start_one(index, workers, settings_module, **options):
+    """Spawn worker `index` of `workers`"""
+    process = multiprocessing.get_context('spawn').Process(
+        target=run, args=(index, workers, settings_module), kwargs=options, name=f'ingest-worker-{index}',
+    )
+    process.start()
+    return process
+
+
+def start(workers, settings_module, **options):
+    """Spawn all `workers` worker processes"""
+    return [start_one(index, workers, settings_module, **options) for index in range(workers)]
@@ -1,3 +1,256 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import QuerySet
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import admission, anomaly, archive, clock, edge, spool
+from .models import EdgeReading, EdgeSyncCheckpoint, IngestSpoolCheckpoint, Raw_data, ReadingAlert, SensorClock
+from .parser import ParsedReading
+
+# Edge mode with CENTRAL_DB_ENGINE=django.db.backends.sqlite3 gives a second real database, e.g.
+# EDGE_NODE_ID=test CENTRAL_DB_ENGINE=django.db.backends.sqlite3 CENTRAL_DB_NAME=central.sqlite3 manage.py test
+SECOND_ALIAS = getattr(settings, 'EDGE_CENTRAL_ALIAS', 'central')
+HAS_SECOND_DATABASE = SECOND_ALIAS in settings.DATABASES
+
+START = timezone.make_aware(datetime(2025, 10, 30, 10, 0))
+
+
+def _readings(count, sensor_name='EDGE-1', using=DEFAULT_DB_ALIAS):
+    Raw_data.objects.using(using).bulk_create([
+        Raw_data(sensor_name=sensor_name, datetime=START + timedelta(minutes=i), t_factor=1.12,
+                 die_number='1', length=37.3)
+        for i in range(count)
+    ])
+
+
+@unittest.skipUnless(HAS_SECOND_DATABASE, "needs a second database alias (see SECOND_ALIAS)")
+@override_settings(EDGE_NODE_ID='test-node', EDGE_CENTRAL_ALIAS=SECOND_ALIAS)
+class EdgeSyncTests(TestCase):
+    databases = {DEFAULT_DB_ALIAS, SECOND_ALIAS} if HAS_SECOND_DATABASE else {DEFAULT_DB_ALIAS}
+
+    def central_uids(self):
+        return list(EdgeReading.objects.using(SECOND_ALIAS).order_by('id').values_list('edge_uid', flat=True))
+
+    def test_readings_are_shipped_once_in_order(self):
+        _readings(5)
+        self.assertEqual(edge.sync(batch_size=2), 5)
+        self.assertEqual(edge.sync(batch_size=2), 0)
+
+        checkpoint = edge.get_checkpoint()
+        ids = list(Raw_data.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(self.central_uids(), [f"test-node:{checkpoint.epoch}:{raw_id}" for raw_id in ids])
+        self.assertEqual((checkpoint.last_id, checkpoint.rows_sent), (ids[-1], 5))
+        # Nothing is written to the edge's own edge_reading table
+        self.assertFalse(EdgeReading.objects.exists())
+
+    def test_resending_after_a_lost_checkpoint_adds_nothing(self):
+        _readings(4)
+        edge.sync()
+        shipped = self.central_uids()
+
+        # The central commit succeeded but the edge crashed before saving its checkpoint
+        EdgeSyncCheckpoint.objects.update(last_id=0)
+        _readings(1)
+        self.assertEqual(edge.sync(), 5)
+        uids = self.central_uids()
+        self.assertEqual(len(uids), 5)
+        self.assertEqual(uids[:4], shipped)
+
+    def test_new_readings_continue_after_the_checkpoint(self):
+        _readings(3)
+        edge.sync()
+        _readings(2, sensor_name='EDGE-2')
+        self.assertEqual(edge.sync(), 2)
+        self.assertEqual(
+            list(EdgeReading.objects.using(SECOND_ALIAS).values_list('sensor_name', flat=True).order_by('id')),
+            ['EDGE-1'] * 3 + ['EDGE-2'] * 2,
+        )
+
+
+class EdgeApplyTests(TestCase):
+    def setUp(self):
+        EdgeReading.objects.bulk_create([
+            EdgeReading(edge_uid=f"node:epoch:{i}", node='node', sensor_name='EDGE-1',
+                        datetime=START + timedelta(minutes=i), t_factor=1.12, die_number='1', length=37.3)
+            for i in range(3)
+        ])
+
+    def test_each_edge_reading_is_applied_once(self):
+        self.assertEqual(edge.apply_pending(batch_size=2), 3)
+        self.assertEqual(edge.apply_pending(), 0)
+
+        self.assertEqual(Raw_data.objects.count(), 3)
+        self.assertFalse(edge.pending().exists())
+        self.assertEqual(
+            sorted(EdgeReading.objects.values_list('raw_data__datetime', flat=True)),
+            sorted(Raw_data.objects.values_list('datetime', flat=True)),
+        )
+
+
+class SensorClockTests(TestCase):
+    def observe(self, sensor_time, delay, sensor_name='CLOCK-1'):
+        return clock.observe(sensor_name, sensor_time, sensor_time + timedelta(seconds=delay))
+
+    def offset(self, sensor_name='CLOCK-1'):
+        return SensorClock.objects.get(sensor_name=sensor_name).offset_seconds
+
+    def test_replayed_backlog_keeps_its_sensor_times(self):
+        # A reading every 10s; after an outage the gateway drains its queue at one reading per 5s
+        moved = 0
+        for i in range(360):
+            sensor_time = START + timedelta(seconds=10 * i)
+            delay = max(1, 2200 + 5 * (i - 100) - 10 * i) if i >= 100 else 1
+            moved += self.observe(sensor_time, delay).reading_time != sensor_time
+        self.assertEqual(moved, 0)
+        self.assertLessEqual(abs(self.offset()), settings.SENSOR_CLOCK_TOLERANCE_SECONDS)
+
+    def test_slow_constant_delay_rises_by_the_drift_limit_until_confirmed(self):
+        windows = settings.SENSOR_CLOCK_CONFIRM_WINDOWS
+        self.observe(START, 0)
+        # Every reading of a window 600s late: one window is not enough to trust it
+        readings = settings.SENSOR_CLOCK_WINDOW_SECONDS // 10 + 1
+        for i in range(1, readings + 1):
+            self.observe(START + timedelta(seconds=10 * i), 600)
+        self.assertEqual(self.offset(), settings.SENSOR_CLOCK_MAX_DRIFT_SECONDS)
+
+        # The same minimum window after window: the clock really is behind
+        for i in range(readings + 1, readings * (windows + 1)):
+            self.observe(START + timedelta(seconds=10 * i), 600)
+        self.assertEqual(self.offset(), 600)
+        sensor_time = START + timedelta(seconds=10 * readings * (windows + 1))
+        self.assertEqual(self.observe(sensor_time, 600).reading_time, sensor_time + timedelta(seconds=600))
+
+    def test_clock_running_ahead_is_corrected_at_once(self):
+        self.observe(START, 1)
+        observation = self.observe(START + timedelta(seconds=10), -120)
+        self.assertEqual(self.offset(), -120)
+        self.assertEqual(observation.reading_time, START + timedelta(seconds=10 - 120))
+
+
+class SpoolTests(TestCase):
+    def setUp(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_dir = spool_dir.name
+        self.shard = spool.shard_of('SPOOL-1')
+        # Well before the grace, so the segments written are closed
+        self.written_at = time.time() - 2 * settings.INGEST_SEGMENT_GRACE_SECONDS
+
+    def append(self, count, received_at=None):
+        with mock.patch('raw_data.spool.time.time', return_value=self.written_at):
+            for i in range(count):
+                reading = ParsedReading('SPOOL-1', datetime(2025, 10, 30, 10, i), 1.12, '1', 37.3)
+                spool.append(reading, received_at=received_at, spool_dir=self.spool_dir)
+
+    def drain(self, batch_size=None):
+        return spool.drain_shard(self.shard, batch_size, spool_dir=self.spool_dir)
+
+    def files(self):
+        return os.listdir(spool.shard_dir(self.shard, self.spool_dir))
+
+    def test_crashed_worker_resumes_from_the_checkpoint(self):
+        self.append(5)
+        store_batch = spool.store_batch
+
+        def crash_after_first_batch(checkpoint, *args):
+            if checkpoint.readings:
+                raise RuntimeError("worker killed")
+            return store_batch(checkpoint, *args)
+
+        with mock.patch.object(spool, 'store_batch', crash_after_first_batch), self.assertRaises(RuntimeError):
+            self.drain(batch_size=2)
+        self.assertEqual(Raw_data.objects.count(), 2)
+        claimed, = self.files()
+        self.assertEqual(IngestSpoolCheckpoint.objects.get(shard=self.shard).segment, claimed)
+
+        self.assertEqual(self.drain(batch_size=2), 3)
+        self.assertEqual(Raw_data.objects.count(), 5)
+        self.assertEqual(self.files(), [])
+
+    def test_late_append_to_a_drained_segment_is_stored(self):
+        self.append(2)
+        self.assertEqual(self.drain(), 2)
+
+        # A request held up since long before picks the segment from the clock when it writes
+        self.append(1, received_at=timezone.now() - timedelta(hours=1))
+        self.append(1)
+        self.assertEqual(self.drain(), 2)
+        self.assertEqual(Raw_data.objects.filter(sensor_name='SPOOL-1').count(), 4)
+        self.assertEqual(self.files(), [])
+
+
+class AdmissionPriorityTests(SimpleTestCase):
+    def test_only_the_header_marks_backfill(self):
+        factory = RequestFactory()
+        self.assertTrue(admission.is_bulk(factory.post('/', HTTP_X_INGEST_PRIORITY='bulk')))
+        # A sensor whose clock runs hours behind still sends live readings
+        self.assertFalse(admission.is_bulk(factory.post('/')))
+
+    def test_gateway_is_the_peer_address_unless_proxies_are_trusted(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.5', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.9')
+        self.assertEqual(admission.gateway_of(request), '10.0.0.5')
+        with mock.patch('rest_framework.settings.api_settings.NUM_PROXIES', 1):
+            self.assertEqual(admission.gateway_of(request), '10.0.0.9')
+
+    def test_queued_requests_write_well_within_the_segment_grace(self):
+        self.assertLessEqual(admission.admission_settings()['queue_timeout'] * 4,
+                             settings.INGEST_SEGMENT_GRACE_SECONDS)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.root = archive_dir.name
+        _readings(5, sensor_name='ARCHIVE-1')
+
+    def segment(self):
+        segment, = archive.catalog.segments('ARCHIVE-1', self.root)
+        return segment
+
+    def test_rerun_after_a_failed_delete_archives_each_reading_once(self):
+        with mock.patch.object(QuerySet, 'delete', side_effect=DatabaseError("lost connection")), \
+                self.assertRaises(DatabaseError):
+            archive.archive_before(START + timedelta(days=1), root=self.root)
+        # The segment was published first: the readings are in both places, none is lost
+        self.assertEqual(self.segment().count, 5)
+        self.assertEqual(Raw_data.objects.count(), 5)
+
+        self.assertEqual(archive.archive_before(START + timedelta(days=1), root=self.root), 5)
+        self.assertEqual(self.segment().count, 5)
+        self.assertFalse(Raw_data.objects.exists())
+
+    def test_archived_totals_match_the_live_table(self):
+        length = sum(Raw_data.objects.values_list('length', flat=True))
+        archive.archive_before(START + timedelta(days=1), root=self.root)
+
+        self.assertEqual(archive.archived_counts(root=self.root), {'ARCHIVE-1': 5})
+        self.assertEqual(archive.archived_lengths(die_numbers={'1'}, root=self.root), ({}, {'1': length}))
+
+
+class AnomalyTests(TestCase):
+    def push(self, length):
+        raw_obj = Raw_data.objects.create(sensor_name='BAND-1', datetime=START, t_factor=1.12, die_number='1',
+                                          length=length)
+        return anomaly.check_reading(raw_obj)
+
+    def test_repeated_outliers_fold_into_the_open_alert(self):
+        for _ in range(anomaly.anomaly_settings()['warmup']):
+            self.assertEqual(self.push(37.3), [])
+        alert, = self.push(80)
+        self.assertEqual(alert.metric, 'length')
+        self.assertEqual(self.push(80), [])
+
+        alert = ReadingAlert.objects.get()
+        self.assertEqual(alert.repeats, 1)
+        alert.acknowledged_at = START
+        alert.save()
+        self.assertEqual(len(self.push(80)), 1)
@@ -0,0 +1,157 @@
+"""
+Downsampled reading series for charts.
+
+Every stored reading is added to one ReadingBucket per resolution (1 minute,
+15 minutes, 1 hour, 1 day; buckets start on local-time boundaries). `series`
+answers a chart query from the coarsest-enough resolution so that the number
+of points stays within a budget, whatever the requested span.
+
+Buckets whose end the sensor's watermark has passed are marked final
+(`finalize`, driven by raw_data.clock). A late reading still lands in its own
+buckets only; any of them that were final are re-opened and finalized again
+when the watermark next moves, so nothing else of the day is recomputed.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Value, Case, When, DecimalField, Count, Sum, Min, Max
+from django.db.models.functions import Least, Greatest
+from django.utils import timezone
+
+from .models import ReadingBucket
+
+# (resolution, bucket width in seconds), finest first
+RESOLUTIONS = (
+    ('1m', 60),
+    ('15m', 15 * 60),
+    ('1h', 60 * 60),
+    ('1d', 24 * 60 * 60),
+)
+RESOLUTION_SECONDS = dict(RESOLUTIONS)
+
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+
+
+def bucket_start(reading_time, seconds):
+    """Start of the `seconds`-wide bucket containing `reading_time`, counted from local midnight"""
+    local = timezone.localtime(reading_time)
+    midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = (local.hour * 3600 + local.minute * 60 + local.second) // seconds * seconds
+    return midnight + timedelta(seconds=offset)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Incremental maintenance
+# ─────────────────────────────────────────────────────────────────────────────
+def _bucket(sensor_name, resolution, start):
+    return ReadingBucket.objects.filter(sensor_name=sensor_name, resolution=resolution, bucket_start=start)
+
+
+def add_reading(sensor_name, press_id, reading_time, length, t_factor, late=False):
+    """Add one reading to its bucket at every resolution; `late` readings re-open final buckets"""
+    length = Decimal(str(length))
+    t_factor = Decimal(str(t_factor))
+    t_value = Value(t_factor, output_field=DecimalField(max_digits=10, decimal_places=3))
+
+    for resolution, seconds in RESOLUTIONS:
+        start = bucket_start(reading_time, seconds)
+        updates = dict(
+            count=F('count') + 1,
+            total_length=F('total_length') + length,
+            t_factor_sum=F('t_factor_sum') + t_factor,
+            t_factor_min=Least(F('t_factor_min'), t_value),
+            t_factor_max=Greatest(F('t_factor_max'), t_value),
+        )
+        if late:
+            # late_count first: MySQL evaluates SET assignments left to right
+            updates.update(
+                late_count=F('late_count') + Case(When(is_final=True, then=Value(1)), default=Value(0)),
+                is_final=False,
+                finalized_at=None,
+            )
+        if _bucket(sensor_name, resolution, start).update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                ReadingBucket.objects.create(
+                    sensor_name=sensor_name, press_id=press_id, resolution=resolution, bucket_start=start,
+                    count=1, total_length=length, t_factor_sum=t_factor,
+                    t_factor_min=t_factor, t_factor_max=t_factor,
+                )
+        except IntegrityError:
+            _bucket(sensor_name, resolution, start).update(**updates)
+
+
+def finalize(sensor_name, watermark):
+    """Mark the open buckets of a sensor that end at or before `watermark` final. Returns the number"""
+    now = timezone.now()
+    finalized = 0
+    for resolution, seconds in RESOLUTIONS:
+        finalized += ReadingBucket.objects.filter(
+            sensor_name=sensor_name,
+            resolution=resolution,
+            is_final=False,
+            bucket_start__lte=watermark - timedelta(seconds=seconds),
+        ).update(is_final=True, finalized_at=now)
+    return finalized
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Queries
+# ─────────────────────────────────────────────────────────────────────────────
+def pick_resolution(start, end, max_points=DEFAULT_MAX_POINTS):
+    """Finest resolution that covers [start, end) in at most `max_points` buckets"""
+    span = (end - start).total_seconds()
+    for resolution, seconds in RESOLUTIONS:
+        if span / seconds <= max_points:
+            return resolution
+    return RESOLUTIONS[-1][0]
+
+
+def series(start, end, sensor_name=None, press_id=None, max_points=DEFAULT_MAX_POINTS, resolution=None):
+    """
+    Points for [start, end) of one sensor or of every sensor on a press.
+    Returns (resolution, points); each point is a dict keyed by bucket start
+    ('final' once every bucket behind it is final).
+    """
+    max_points = max(1, min(int(max_points), MAX_POINTS_LIMIT))
+    resolution = resolution or pick_resolution(start, end, max_points)
+    seconds = RESOLUTION_SECONDS[resolution]
+
+    buckets = ReadingBucket.objects.filter(
+        resolution=resolution,
+        bucket_start__gte=bucket_start(start, seconds),
+        bucket_start__lt=end,
+    )
+    if sensor_name:
+        buckets = buckets.filter(sensor_name=sensor_name)
+    if press_id:
+        buckets = buckets.filter(press_id=press_id)
+
+    rows = (
+        buckets.values('bucket_start')
+        .annotate(
+            readings=Sum('count'),
+            length=Sum('total_length'),
+            t_sum=Sum('t_factor_sum'),
+            t_min=Min('t_factor_min'),
+            t_max=Max('t_factor_max'),
+            open_buckets=Count('id', filter=Q(is_final=False)),
+        )
+        .order_by('bucket_start')[:max_points]
+    )
+
+    points = []
+    for row in rows:
+        points.append({
+            'time': timezone.localtime(row['bucket_start']).isoformat(),
+            'count': row['readings'],
+            'length': float(row['length']),
+            't_factor_min': float(row['t_min']),
+            't_factor_max': float(row['t_max']),
+            't_factor_mean': round(float(row['t_sum']) / row['readings'], 3) if row['readings'] else None,
+            'final': not row['open_buckets'],
+        })
+    return resolution, points
@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import LoraReceiveView
+from .views import LoraReceiveView, ReadingSeriesAPI, ParquetExportAPI, ReadingAlertAPI, IngestAdmissionAPI
 
 urlpatterns = [
     path('lora/receive/', LoraReceiveView.as_view(), name='lora_receive'),
+    path('lora/admission/', IngestAdmissionAPI.as_view(), name='ingest_admission_api'),
+    path('readings/series/', ReadingSeriesAPI.as_view(), name='reading_series_api'),
+    path('readings/alerts/', ReadingAlertAPI.as_view(), name='reading_alert_api'),
+    path('exports/parquet/', ParquetExportAPI.as_view(), name='parquet_export_api'),
 ]
 #https://demo.extruedge.cloud/api/lora/receive/
@@ -1,9 +1,24 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from datetime import datetime
+from django.db import DatabaseError
 from django.utils import timezone
-from .models import Raw_data, ProductionData
+from django.utils.dateparse import parse_datetime, parse_date
+from datetime import datetime, time, timedelta
+import os
+from .models import Raw_data, ReadingAlert
+from .ingest import store_reading
+from .parser import parse_message
+from . import admission, anomaly, timeseries
+from . import export, spool
+
+
+def _deferred_response(deferred, status_code):
+    return Response(
+        {'status': 'deferred', 'error': str(deferred), 'retry_after': deferred.retry_after},
+        status=status_code,
+        headers={'Retry-After': str(deferred.retry_after)},
+    )
 
 
 class LoraReceiveView(APIView):
@@ -12,46 +27,48 @@ class LoraReceiveView(APIView):
 
     def post(self, request):
         try:
+            received_at = timezone.now()
             data = request.data
             message = data.get('message', '')
 
             print(f"\n Received raw message: {message}")
 
             # Expected: "1234,30/10/25 17:27:58, 1.120,960, 11.366, 37 Feet3 Inch"
-            parts = [p.strip() for p in message.split(",")]
-            if len(parts) < 6:
-                raise ValueError("Invalid message format")
+            reading = parse_message(message)
 
-            sensor_name = parts[0]
-            dt_str = parts[1]
-            t_factor = float(parts[2])
-            die_number = parts[3]  # string for now
-            length_raw = parts[5]
+            sensor_name = reading.sensor_name
+            t_factor = reading.t_factor
+            die_number = reading.die_number  # string for now
 
             # Convert datetime (timezone-aware)
-            naive_dt = datetime.strptime(dt_str, "%d/%m/%y %H:%M:%S")
-            reading_time = timezone.make_aware(naive_dt, timezone.get_current_timezone())
-
-            # Convert "37 Feet3 Inch" -> 37.3
-            length_num = self._convert_length(length_raw)
-
-            #  1️ Save raw data
-            raw_obj = Raw_data.objects.create(
-                sensor_name=sensor_name,
-                datetime=reading_time,
-                t_factor=t_factor,
-                die_number=die_number,
-                length=length_num,
-            )
-
-            #  2️ Save refined data into ProductionData
-            prod_obj = ProductionData.objects.create(
-                sensor_name=sensor_name,
-                datetime=reading_time,
-                t_factor=t_factor,
-                die_name=f"Die {die_number}",
-                length=length_num,
-            )
+            reading_time = timezone.make_aware(reading.datetime, timezone.get_current_timezone())
+
+            # "37 Feet3 Inch" -> 37.3 (parse_message rejects unreadable lengths)
+            length_num = reading.length
+
+            # Rate limits per gateway / sensor and a bounded number of readings stored at once
+            bulk = admission.is_bulk(request)
+            with admission.controller.admit(admission.gateway_of(request), sensor_name, bulk=bulk):
+                if spool.enabled():
+                    # Stored by run_ingest_workers, in this sensor's arrival order
+                    shard = spool.append(reading, received_at=received_at)
+                    admission.controller.record('accepted')
+                    return Response(
+                        {'status': 'accepted', 'message': 'Data queued for storage', 'shard': shard},
+                        status=status.HTTP_202_ACCEPTED
+                    )
+
+                #  1️ Save raw data (die / press resolved to FKs)
+                #  2️ Save refined data into ProductionData
+                raw_obj, prod_obj = store_reading(
+                    sensor_name=sensor_name,
+                    reading_time=reading_time,
+                    t_factor=t_factor,
+                    die_number=die_number,
+                    length=length_num,
+                    received_at=received_at,
+                )
+            admission.controller.record('accepted')
 
             #  Terminal logs
             print(
@@ -59,7 +76,7 @@ class LoraReceiveView(APIView):
                 f"   Raw Table (ID {raw_obj.id})     → raw_machine_data\n"
                 f"   Production Table (ID {prod_obj.id}) → production_data\n"
                 f"   Sensor Name : {sensor_name}\n"
-                f"   Date/Time   : {reading_time}\n"
+                f"   Date/Time   : {raw_obj.datetime}\n"
                 f"   T-Factor    : {t_factor}\n"
                 f"   Die Number  : {die_number}\n"
                 f"   Length (ft) : {length_num}\n"
@@ -70,7 +87,16 @@ class LoraReceiveView(APIView):
                 status=status.HTTP_201_CREATED
             )
 
+        except admission.Deferred as e:
+            return _deferred_response(e, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        except DatabaseError as e:
+            # Overloaded or unreachable database: the gateway keeps the reading and retries
+            print(f" Database error while storing message: {e}\n")
+            return _deferred_response(admission.controller.defer('database'), status.HTTP_503_SERVICE_UNAVAILABLE)
+
         except Exception as e:
+            admission.controller.record('rejected')
             print(f" Error while processing message: {e}\n")
             return Response({'status': 'error', 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -78,19 +104,139 @@ class LoraReceiveView(APIView):
         data = list(Raw_data.objects.values())
         return Response({'received_data': data})
 
-    def _convert_length(self, length_str):
-        """Convert '37 Feet3 Inch' -> 37.3"""
-        length_str = length_str.replace("Feet", "").replace("Inch", "").strip()
-        parts = length_str.split()
-        if len(parts) >= 2:
-            try:
-                feet = float(parts[0])
-                inch = float(parts[1])
-                return round(feet + inch / 10, 2)
-            except ValueError:
-                pass
+
+def _parse_bound(value):
+    """'2025-10-30' or '2025-10-30T17:00[:00]' -> aware datetime (local time zone if naive)"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date/time '{value}'")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_current_timezone())
+    return parsed
+
+
+class ReadingSeriesAPI(APIView):
+    """
+    GET ?sensor=<name> | ?press=<id>, &from=, &to= (date or datetime), &points=<max points>, &resolution=1m|15m|1h|1d
+    Chart series from the downsampled buckets; defaults to the last 24 hours.
+    """
+
+    def get(self, request):
+        sensor_name = request.GET.get('sensor')
+        press_id = request.GET.get('press')
+        if not sensor_name and not press_id:
+            return Response({'status': 'error', 'error': 'sensor or press is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        resolution = request.GET.get('resolution') or None
+        if resolution and resolution not in timeseries.RESOLUTION_SECONDS:
+            return Response({'status': 'error', 'error': f"Unknown resolution '{resolution}'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            return float(length_str)
+            end = _parse_bound(request.GET['to']) if request.GET.get('to') else timezone.now()
+            start = _parse_bound(request.GET['from']) if request.GET.get('from') else end - timedelta(days=1)
+            max_points = int(request.GET.get('points', timeseries.DEFAULT_MAX_POINTS))
+        except ValueError as e:
+            return Response({'status': 'error', 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if end <= start:
+            return Response({'status': 'error', 'error': 'to must be after from'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        resolution, points = timeseries.series(
+            start, end,
+            sensor_name=sensor_name,
+            press_id=press_id,
+            max_points=max_points,
+            resolution=resolution,
+        )
+        return Response({
+            'status': 'ok',
+            'sensor': sensor_name,
+            'press': press_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'resolution': resolution,
+            'points': points,
+        })
+
+
+class ParquetExportAPI(APIView):
+    """
+    GET  → export checkpoints per dataset, and whether an export is running
+    POST {"datasets": [...], "full": false} → start an (incremental) Parquet export in the background (202)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'status': 'ok', 'running': export.is_running(), 'datasets': export.export_status()})
+
+    def post(self, request):
+        names = request.data.get('datasets') or list(export.DATASETS)
+        unknown = [name for name in names if name not in export.DATASETS]
+        if unknown:
+            return Response({'status': 'error', 'error': f"Unknown dataset(s): {', '.join(unknown)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            started = export.start_export(names, full=bool(request.data.get('full')))
+        except ImportError as e:
+            return Response({'status': 'error', 'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if not started:
+            return Response({'status': 'error', 'error': 'An export is already running'},
+                            status=status.HTTP_409_CONFLICT)
+
+        return Response({'status': 'started', 'datasets': names}, status=status.HTTP_202_ACCEPTED)
+
+
+class ReadingAlertAPI(APIView):
+    """
+    GET  ?die=<id> | ?press=<id> | ?sensor=<name>, &open=1, &limit=<n> → latest out-of-band pushes
+    POST {"ids": [...]} → acknowledge alerts
+    """
+
+    def get(self, request):
+        alerts = anomaly.open_alerts() if request.GET.get('open') else ReadingAlert.objects.all()
+        if request.GET.get('die'):
+            alerts = alerts.filter(die_id=request.GET['die'])
+        if request.GET.get('press'):
+            alerts = alerts.filter(press_id=request.GET['press'])
+        if request.GET.get('sensor'):
+            alerts = alerts.filter(sensor_name=request.GET['sensor'])
+        try:
+            limit = max(1, min(int(request.GET.get('limit', 50)), 500))
         except ValueError:
-            return 0.0
+            return Response({'status': 'error', 'error': 'limit must be a number'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': 'ok',
+            'alerts': [anomaly.alert_as_dict(alert) for alert in alerts.order_by('-reading_time')[:limit]],
+        })
+
+    def post(self, request):
+        ids = request.data.get('ids') or []
+        if not isinstance(ids, list):
+            return Response({'status': 'error', 'error': 'ids must be a list'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        acknowledged = anomaly.open_alerts().filter(id__in=ids).update(acknowledged_at=timezone.now())
+        return Response({'status': 'ok', 'acknowledged': acknowledged})
+
 
+class IngestAdmissionAPI(APIView):
+    """
+    GET → this server process's ingest admission counters (accepted / deferred / rejected readings),
+          slots in use and the limits in force
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({
+            'status': 'ok',
+            'pid': os.getpid(),
+            **admission.controller.snapshot(),
+            'limits': admission.admission_settings(),
+        })
@@ -83,7 +83,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 // Create a comma-separated string of IDs for bulk printing
                 const idsParam = selectedIds.join(',');
                 // Use the print requisition URL with ids parameter
-                const printUrl = `/order/print-requisition/?ids=${idsParam}`;
+                const printUrl = `/order/print-requisition/?ids=${idsParam}&format=pdf`;
                 window.open(printUrl, '_blank');
             } else {
                 alert('Please select at least one requisition to print.');
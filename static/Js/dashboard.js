@@ -76,41 +76,45 @@ async function loadRecoveryTableData() {
         }
 
         const data = await response.json();
+        renderRecoveryTable(data.success ? data.reports : []);
+    } catch (error) {
+        document.getElementById('recoveryTableBody').innerHTML =
+            `<tr><td colspan="6" class="text-center">Error: ${error.message}</td></tr>`;
+    }
+}
 
-        const tbody = document.getElementById('recoveryTableBody');
+// ▶ Render Recovery Table rows
+function renderRecoveryTable(reports) {
+    const tbody = document.getElementById('recoveryTableBody');
 
-        if (data.success && data.reports && data.reports.length > 0) {
-            tbody.innerHTML = '';
+    if (reports && reports.length > 0) {
+        tbody.innerHTML = '';
 
-            data.reports.forEach((report, index) => {
-                const row = document.createElement('tr');
+        reports.forEach((report, index) => {
+            const row = document.createElement('tr');
 
-                // Calculate recovery: (input / output) * 100
-                let recovery = 0;
-                if (report.total_output > 0) {
-                    // recovery = Math.round((report.input_qty / report.total_output) * 100);
-                    recovery = Math.round((report.total_output / report.input_qty) * 100);
-                }
+            // Calculate recovery: (input / output) * 100
+            let recovery = 0;
+            if (report.total_output > 0) {
+                // recovery = Math.round((report.input_qty / report.total_output) * 100);
+                recovery = Math.round((report.total_output / report.input_qty) * 100);
+            }
 
-                row.innerHTML = `
-                    <td>${report.die_no || '-'}</td>
-                    <td>${report.no_of_cavity || '-'}</td>
-                    <td>${report.press || '-'}</td>
-                    <td>${report.input_qty || 0}kg</td>
-                    <td>${report.total_output || 0}kg</td>
-                    <td class="${recovery >= 80 ? 'recovery-good' : 'recovery-bad'}">
-                        ${recovery}%
-                    </td>
-                `;
-
-                tbody.appendChild(row);
-            });
-        } else {
-            tbody.innerHTML = '<tr><td colspan="6" class="text-center">No data available</td></tr>';
-        }
-    } catch (error) {
-        document.getElementById('recoveryTableBody').innerHTML =
-            `<tr><td colspan="6" class="text-center">Error: ${error.message}</td></tr>`;
+            row.innerHTML = `
+                <td>${report.die_no || '-'}</td>
+                <td>${report.no_of_cavity || '-'}</td>
+                <td>${report.press || '-'}</td>
+                <td>${report.input_qty || 0}kg</td>
+                <td>${report.total_output || 0}kg</td>
+                <td class="${recovery >= 80 ? 'recovery-good' : 'recovery-bad'}">
+                    ${recovery}%
+                </td>
+            `;
+
+            tbody.appendChild(row);
+        });
+    } else {
+        tbody.innerHTML = '<tr><td colspan="6" class="text-center">No data available</td></tr>';
     }
 }
 
@@ -132,46 +136,51 @@ async function loadProductionTableData() {
         }
 
         const data = await response.json();
-        const tbody = document.getElementById('productionTableBody');
-
-        if (data.success && data.reports && data.reports.length > 0) {
-            tbody.innerHTML = '';
-
-            data.reports.forEach((report, index) => {
-                const row = document.createElement('tr');
-
-                // Determine status badge
-                let statusBadge = '';
-                if (report.status === 'completed') {
-                    statusBadge = '<span class="status-badge completed">Completed</span>';
-                } else if (report.status === 'in_progress') {
-                    statusBadge = '<span class="status-badge in-progress">In Progress</span>';
-                } else if (report.status === 'on_hold') {
-                    statusBadge = '<span class="status-badge on-hold">On Hold</span>';
-                } else if (report.status === 'cancelled') {
-                    statusBadge = '<span class="status-badge cancelled">Cancelled</span>';
-                } else {
-                    statusBadge = '<span class="status-badge idle">-</span>';
-                }
-
-                row.innerHTML = `
-                    <td>${report.die_no || '-'}</td>
-                    <td>${report.cut_length || '-'}</td>
-                    <td>${report.operator || '-'}</td>
-                    <td>${statusBadge}</td>
-                `;
-
-                tbody.appendChild(row);
-            });
-        } else {
-            tbody.innerHTML = '<tr><td colspan="4" class="text-center">No data available</td></tr>';
-        }
+        renderProductionTable(data.success ? data.reports : []);
     } catch (error) {
         document.getElementById('productionTableBody').innerHTML =
             `<tr><td colspan="4" class="text-center">Error: ${error.message}</td></tr>`;
     }
 }
 
+// ▶ Render Production Table rows
+function renderProductionTable(reports) {
+    const tbody = document.getElementById('productionTableBody');
+
+    if (reports && reports.length > 0) {
+        tbody.innerHTML = '';
+
+        reports.forEach((report, index) => {
+            const row = document.createElement('tr');
+
+            // Determine status badge
+            let statusBadge = '';
+            if (report.status === 'completed') {
+                statusBadge = '<span class="status-badge completed">Completed</span>';
+            } else if (report.status === 'in_progress') {
+                statusBadge = '<span class="status-badge in-progress">In Progress</span>';
+            } else if (report.status === 'on_hold') {
+                statusBadge = '<span class="status-badge on-hold">On Hold</span>';
+            } else if (report.status === 'cancelled') {
+                statusBadge = '<span class="status-badge cancelled">Cancelled</span>';
+            } else {
+                statusBadge = '<span class="status-badge idle">-</span>';
+            }
+
+            row.innerHTML = `
+                <td>${report.die_no || '-'}</td>
+                <td>${report.cut_length || '-'}</td>
+                <td>${report.operator || '-'}</td>
+                <td>${statusBadge}</td>
+            `;
+
+            tbody.appendChild(row);
+        });
+    } else {
+        tbody.innerHTML = '<tr><td colspan="4" class="text-center">No data available</td></tr>';
+    }
+}
+
 // ▶ Load Order Table Data
 async function loadOrderTableData() {
     const filter = window.currentFilter || 'today';
@@ -192,51 +201,86 @@ async function loadOrderTableData() {
         }
 
         const data = await response.json();
-        const tbody = document.getElementById('orderTableBody');
-
-        if (data.success && data.orders && data.orders.length > 0) {
-            tbody.innerHTML = '';
-
-            data.orders.forEach((order, index) => {
-                const row = document.createElement('tr');
-
-                // Map Requisition status to badges
-                let statusBadge = '';
-                if (order.status === 'completed') {
-                    statusBadge = '<span class="status-badge completed">Completed</span>';
-                } else if (order.status === 'in_production') {
-                    statusBadge = '<span class="status-badge in-progress">In Production</span>';
-                } else if (order.status === 'in_planning') {
-                    statusBadge = '<span class="status-badge on-hold">In Planning</span>';
-                } else if (order.status === 'rejected') {
-                    statusBadge = '<span class="status-badge cancelled">Rejected</span>';
-                } else if (order.status === 'created') {
-                    statusBadge = '<span class="status-badge created">Created</span>';
-                } else {
-                    statusBadge = '<span class="status-badge idle">-</span>';
-                }
+        renderOrderTable(data.success ? data.orders : []);
+    } catch (error) {
+        document.getElementById('orderTableBody').innerHTML =
+            `<tr><td colspan="2" class="text-center">Error: ${error.message}</td></tr>`;
+    }
+}
 
-                row.innerHTML = `
-                    <td>${order.production_id || '-'}</td>
-                    <td>${statusBadge}</td>
-                `;
+// ▶ Render Order Table rows
+function renderOrderTable(orders) {
+    const tbody = document.getElementById('orderTableBody');
+
+    if (orders && orders.length > 0) {
+        tbody.innerHTML = '';
+
+        orders.forEach((order, index) => {
+            const row = document.createElement('tr');
+
+            // Map Requisition status to badges
+            let statusBadge = '';
+            if (order.status === 'completed') {
+                statusBadge = '<span class="status-badge completed">Completed</span>';
+            } else if (order.status === 'in_production') {
+                statusBadge = '<span class="status-badge in-progress">In Production</span>';
+            } else if (order.status === 'in_planning') {
+                statusBadge = '<span class="status-badge on-hold">In Planning</span>';
+            } else if (order.status === 'rejected') {
+                statusBadge = '<span class="status-badge cancelled">Rejected</span>';
+            } else if (order.status === 'created') {
+                statusBadge = '<span class="status-badge created">Created</span>';
+            } else {
+                statusBadge = '<span class="status-badge idle">-</span>';
+            }
 
-                tbody.appendChild(row);
-            });
-        } else {
-            tbody.innerHTML = '<tr><td colspan="2" class="text-center">No data available</td></tr>';
+            row.innerHTML = `
+                <td>${order.production_id || '-'}</td>
+                <td>${statusBadge}</td>
+            `;
+
+            tbody.appendChild(row);
+        });
+    } else {
+        tbody.innerHTML = '<tr><td colspan="2" class="text-center">No data available</td></tr>';
+    }
+}
+
+// ▶ Load all three tables with a single request to the dashboard bundle API
+async function loadDashboardBundle() {
+    const filter = window.currentFilter || 'today';
+    const selectedDate = getSelectedDate();
+
+    let url = `/dashboard/api/dashboard-bundle/?filter=${filter}`;
+    if (selectedDate) {
+        url += `&date=${selectedDate}`;
+    }
+
+    try {
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error('Bundle request failed');
         }
+
+        renderRecoveryTable(data.recovery_reports);
+        renderProductionTable(data.production_reports);
+        renderOrderTable(data.orders);
     } catch (error) {
-        document.getElementById('orderTableBody').innerHTML =
-            `<tr><td colspan="2" class="text-center">Error: ${error.message}</td></tr>`;
+        // Fall back to the individual table APIs
+        loadRecoveryTableData();
+        loadProductionTableData();
+        loadOrderTableData();
     }
 }
 
 // Load tables on page load
 document.addEventListener('DOMContentLoaded', function () {
-    loadRecoveryTableData();
-    loadProductionTableData();
-    loadOrderTableData();
+    loadDashboardBundle();
 });
 
 // Filter functionality
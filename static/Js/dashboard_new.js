@@ -95,7 +95,7 @@ function showPressDetail(pressId, pressName) {
     fetch(`/dashboard_new/press/${pressId}/production/`)
         .then(response => response.json())
         .then(data => {
-            if (data.success) displayDetailedProduction(data.production_data);
+            if (data.success) displayDetailedProduction(data.production_data, data.alerts);
             else throw new Error(data.message || 'Error');
         })
         .catch(error => {
@@ -104,7 +104,17 @@ function showPressDetail(pressId, pressName) {
         });
 }
 
-function displayDetailedProduction(productionData) {
+// Out-of-band pushes of today per die number, shown next to the die
+function alertBadge(alerts, dieNo) {
+    const dieAlerts = (alerts || []).filter(a => a.die_number === dieNo);
+    if (dieAlerts.length === 0) return '';
+    const details = dieAlerts.map(a =>
+        `${a.reading_time} ${a.metric} ${a.value} (expected ${a.band[0]} – ${a.band[1]})`
+    ).join('\n');
+    return `<i class="fa fa-exclamation-triangle text-red-500 ml-2" title="${details}"></i>`;
+}
+
+function displayDetailedProduction(productionData, alerts) {
     document.getElementById('detailLoadingState').classList.add('hidden');
     const tableBody = document.getElementById('detailTableBody');
     const noDataState = document.getElementById('detailNoDataState');
@@ -117,7 +127,7 @@ function displayDetailedProduction(productionData) {
     tableBody.innerHTML = productionData.map((plan, index) => `
         <tr class="${index % 2 === 0 ? 'bg-gray-800' : 'bg-gray-900'} hover:bg-gray-700 transition-colors duration-150 fade-in">
             <td class="px-8 py-5 text-gray-300 text-lg font-medium">${plan.order_no}</td>
-            <td class="px-8 py-5 text-blue-400 text-lg font-semibold">${plan.die_no}</td>
+            <td class="px-8 py-5 text-blue-400 text-lg font-semibold">${plan.die_no}${alertBadge(alerts, plan.die_no)}</td>
             <td class="px-8 py-5 text-yellow-400 text-lg font-medium text-center">${plan.cut_length}</td>
             <td class="px-8 py-5 text-green-400 text-xl font-bold text-center">${plan.planned_qty}</td>
             <!-- ✅ Updated: Show actual production from Raw_data -->
@@ -168,7 +168,7 @@ document.addEventListener('DOMContentLoaded', function () {
                         <div class="detail-section">
                             <h4>Die Image</h4>
                             <div class="die-image">
-                                <img src="${die.image_url}" alt="Die Image">
+                                <img src="${die.image_preview_url || die.image_url}" alt="Die Image">
                             </div>
                         </div>
                     ` : ''}
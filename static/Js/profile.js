@@ -61,7 +61,7 @@ document.addEventListener("DOMContentLoaded", function () {
                         <td>${profile.width_mm !== null ? profile.width_mm : '-'}</td>
                         <td>${profile.thickness_mm !== null ? profile.thickness_mm : '-'}</td>
                         <td>${profile.weight_type} - ${profile.weight_value || '-'}</td>
-                        <td>${profile.shape_image ? `<img src="${profile.shape_image}" width="40">` : "-"}</td>
+                        <td>${profile.shape_image ? `<img src="${profile.shape_image_thumb || profile.shape_image}" width="40">` : "-"}</td>
                         <td class="date-column">${profile.date_added}</td>
                         <td class="actions-column">
                             <button class="editProfileBtn edit-btn"
@@ -73,7 +73,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 // Create a comma-separated string of IDs for bulk printing
                 const idsParam = selectedIds.join(',');
                 // Use the existing print work order URL with ids parameter
-                const printUrl = `/order/print-work-order/?ids=${idsParam}`;
+                const printUrl = `/order/print-work-order/?ids=${idsParam}&format=pdf`;
                 window.open(printUrl, '_blank');
             } else {
                 alert('Please select at least one work order to print.');